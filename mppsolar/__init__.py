@@ -1,11 +1,17 @@
 # !/usr/bin/python3
 import logging
 from argparse import ArgumentParser
+from functools import partial
 
 from mppsolar.version import __version__  # noqa: F401
 
+from .devices.asyncdevice import AsyncDevice
 from .helpers import get_device_class
 from .libs.mqttbrokerc import MqttBroker
+from .libs.outputpipeline import OutputPipeline
+from .libs.outputqueue import BLOCK, DROP_OLDEST, POLICIES, QUEUE_SIZE, OutputQueue
+from .libs.portworkers import COMMAND_DEADLINE, PortWorkerPool
+from .libs.scheduler import FixedRateScheduler
 from .outputs import get_outputs, list_outputs
 from .protocols import list_protocols
 
@@ -151,6 +157,21 @@ def main():
         help="Mongo db name (default: mppsolar)",
         default="mppsolar",
     )
+    parser.add_argument(
+        "--influx_url",
+        type=str,
+        help="InfluxDB write url, example http://server:8086/api/v2/write?org=home&bucket=solar or udp://server:8089",
+    )
+    parser.add_argument(
+        "--influx_token",
+        type=str,
+        help="InfluxDB API token, if needed",
+    )
+    parser.add_argument(
+        "--influx_spill",
+        type=str,
+        help="File to keep the InfluxDB lines in while the server is unavailable (default: None)",
+    )
     parser.add_argument(
         "-c",
         "--command",
@@ -179,6 +200,34 @@ def main():
             default=None,
         )
     parser.add_argument("--daemon", action="store_true", help="Run as daemon")
+    parser.add_argument(
+        "--async",
+        dest="use_async",
+        action="store_true",
+        help="Poll the devices on different ports concurrently (commands on the same port are still run in order), the outputs are always queued",
+    )
+    parser.add_argument(
+        "--workers",
+        action="store_true",
+        help="Poll the devices with a worker thread per port, so a slow or hung device does not delay the others",
+    )
+    parser.add_argument(
+        "--output-queue",
+        dest="output_queue",
+        type=int,
+        nargs="?",
+        const=QUEUE_SIZE,
+        default=None,
+        metavar="SIZE",
+        help=f"Send the results to the outputs from background threads, queuing up to SIZE results per output (default {QUEUE_SIZE})",
+    )
+    parser.add_argument(
+        "--output-policy",
+        dest="output_policy",
+        choices=POLICIES,
+        default=DROP_OLDEST,
+        help="What to do with a new result when an output queue is full (default drop-oldest)",
+    )
     parser.add_argument("--getstatus", action="store_true", help="Get Inverter Status")
     parser.add_argument("--getsettings", action="store_true", help="Get Inverter Settings")
     parser.add_argument("--getDeviceId", action="store_true", help="Generate Device ID")
@@ -244,6 +293,10 @@ def main():
     mongo_url = args.mongo_url
     mongo_db = args.mongo_db
     log.debug(f"Using Mongo {mongo_url} with {mongo_db}")
+    influx_url = args.influx_url
+    influx_token = args.influx_token
+    influx_spill = args.influx_spill
+    log.debug(f"Using Influx {influx_url}")
     ##
     filter = args.filter
     excl_filter = args.exclfilter
@@ -251,10 +304,18 @@ def main():
     mqtt_topic = args.mqtttopic
 
     _commands = []
+    # the outputs are set up as the commands are added, the polling loop just sends the results
+    pipeline = OutputPipeline(mqtt_broker=mqtt_broker, mqtt_topic=mqtt_topic)
+    # seconds a command can take in --workers mode, per section overrides
+    command_deadline = COMMAND_DEADLINE
+    deadlines = {}
+    # background output queue size (None sends the results inline) and overflow policy
+    output_queue_size = args.output_queue
+    output_policy = args.output_policy
+    # per section (pause, offset) for the --daemon schedulers (sequential, --workers and --async)
+    schedules = {}
     # Initialize Daemon
     if args.daemon:
-        import time
-
         import systemd.daemon
 
         # Tell systemd that our service is ready
@@ -282,11 +343,16 @@ def main():
             exit(1)
         # Process setup section
         pause = config["SETUP"].getint("pause", fallback=60)
+        command_deadline = config["SETUP"].getfloat("command_deadline", fallback=COMMAND_DEADLINE)
+        output_queue_size = config["SETUP"].getint("output_queue", fallback=output_queue_size)
+        output_policy = config["SETUP"].get("output_policy", fallback=output_policy)
         # Overide mqtt_broker settings
         mqtt_broker.update("name", config["SETUP"].get("mqtt_broker", fallback=None))
         mqtt_broker.update("port", config["SETUP"].getint("mqtt_port", fallback=None))
         mqtt_broker.update("username", config["SETUP"].get("mqtt_user", fallback=None))
         mqtt_broker.update("password", config["SETUP"].get("mqtt_pass", fallback=None))
+        mqtt_broker.update("qos", config["SETUP"].getint("mqtt_qos", fallback=None))
+        mqtt_broker.update("window", config["SETUP"].getint("mqtt_window", fallback=None))
         sections.remove("SETUP")
 
         # Process 'command' sections
@@ -306,8 +372,19 @@ def main():
             postgres_url = config[section].get("postgres_url", fallback=None)
             mongo_url = config[section].get("mongo_url", fallback=None)
             mongo_db = config[section].get("mongo_db", fallback=None)
+            influx_url = config[section].get("influx_url", fallback=None)
+            influx_token = config[section].get("influx_token", fallback=None)
+            influx_spill = config[section].get("influx_spill", fallback=None)
+            section_pause = config[section].getfloat("pause", fallback=pause)
+            offset = config[section].getfloat("offset", fallback=0)
+            schedules[name] = (section_pause, offset)
+            deadline = config[section].getfloat("deadline", fallback=None)
+            if deadline is not None:
+                deadlines[name] = deadline
             #
             device_class = get_device_class(_type)
+            if args.use_async:
+                device_class = partial(AsyncDevice, type=_type)
             log.debug(f"device_class {device_class}")
             # The device class __init__ will instantiate the port communications and protocol classes
             device = device_class(
@@ -326,8 +403,25 @@ def main():
             # build array of commands
             commands = _command.split("#")
 
+            # the section output settings
+            route = pipeline.add(
+                outputs,
+                filter=filter,
+                excl_filter=excl_filter,
+                tag=tag,
+                name=name,
+                udp_port=udp_port,
+                postgres_url=postgres_url,
+                mongo_url=mongo_url,
+                mongo_db=mongo_db,
+                influx_url=influx_url,
+                influx_token=influx_token,
+                influx_spill=influx_spill,
+                keep_case=keep_case,
+            )
+
             for command in commands:
-                _commands.append((device, command, tag, outputs, filter, excl_filter))
+                _commands.append((device, command, tag, outputs, filter, excl_filter, route))
             log.debug(f"Commands from config file {_commands}")
 
             if args.daemon:
@@ -348,6 +442,8 @@ def main():
             f'Creating device "{args.name}" (type: "{s_prog_name}") on port "{args.port} (porttype={args.porttype})" using protocol "{args.protocol}"'
         )
         device_class = get_device_class(s_prog_name)
+        if args.use_async:
+            device_class = partial(AsyncDevice, type=s_prog_name)
         log.debug(f"device_class {device_class}")
         # The device class __init__ will instantiate the port communications and protocol classes
         device = device_class(
@@ -398,59 +494,108 @@ def main():
                 tag = args.tag
             else:
                 tag = command
-            _commands.append((device, command, tag, outputs, filter, excl_filter))
+            route = pipeline.add(
+                outputs,
+                filter=filter,
+                excl_filter=excl_filter,
+                tag=tag,
+                name=args.name,
+                udp_port=udp_port,
+                postgres_url=postgres_url,
+                mongo_url=mongo_url,
+                mongo_db=mongo_db,
+                influx_url=influx_url,
+                influx_token=influx_token,
+                influx_spill=influx_spill,
+                keep_case=keep_case,
+            )
+            _commands.append((device, command, tag, outputs, filter, excl_filter, route))
         log.debug(f"Commands {_commands}")
 
-    while True:
-        # Loop through the configured commands
-        if not args.daemon:
-            log.info(f"Looping {len(_commands)} commands")
-        for _device, _command, _tag, _outputs, filter, excl_filter in _commands:
-            # for item in mppUtilArray:
-            # Tell systemd watchdog we are still alive
-            if args.daemon:
-                systemd.daemon.notify("WATCHDOG=1")
-                print(
-                    f"Getting results from device: {_device} for command: {_command}, tag: {_tag}, outputs: {_outputs}"
-                )
-            else:
-                log.info(
-                    f"Getting results from device: {_device} for command: {_command}, tag: {_tag}, outputs: {_outputs}"
-                )
-            results = _device.run_command(command=_command)
-            log.debug(f"results: {results}")
-            # send to output processor(s)
-            outputs = get_outputs(_outputs)
-            for op in outputs:
-                # maybe include the command and what the command is im the output
-                # eg QDI run, Display Inverter Default Settings
-                log.debug(f"Using output filter: {filter}")
-                op.output(
-                    data=results,
-                    tag=_tag,
-                    name=_device._name,
-                    mqtt_broker=mqtt_broker,
-                    udp_port=udp_port,
-                    postgres_url=postgres_url,
-                    mongo_url=mongo_url,
-                    mongo_db=mongo_db,
-                    # mqtt_port=mqtt_port,
-                    # mqtt_user=mqtt_user,
-                    # mqtt_pass=mqtt_pass,
-                    mqtt_topic=mqtt_topic,
-                    filter=filter,
-                    excl_filter=excl_filter,
-                    keep_case=keep_case,
-                )
-                # Tell systemd watchdog we are still alive
+    if args.use_async and not output_queue_size:
+        # the outputs would otherwise run on the event loop, where a slow output stalls the polling of every port
+        output_queue_size = QUEUE_SIZE
+    if args.use_async and output_policy == BLOCK:
+        log.warning("--output-policy block with --async stalls the polling of every port while an output queue is full")
+    if output_queue_size:
+        # outputs are run by background threads, so a slow output does not delay the next command
+        pipeline.output_queue = OutputQueue(output_queue_size, output_policy)
+    log.debug(pipeline)
+
+    def output_results(item, results):
+        _device, _command, _tag, _outputs, filter, excl_filter, route = item
+        # send to output processor(s)
+        pipeline.send(route, results, key=(_device._name, _command))
+
+    if args.use_async:
+        # ports are polled concurrently, commands on each port in order
+        import asyncio
+
+        from .asyncloop import run_loop
+
+        if args.daemon:
+            asyncio.run(run_loop(_commands, output_results, schedules=schedules, pause=pause, notify=lambda: systemd.daemon.notify("WATCHDOG=1")))
+        else:
+            asyncio.run(run_loop(_commands, output_results))
+        pipeline.close()
+        return
+
+    if args.workers:
+        # a worker thread per port, each polling on its own schedule, so a slow or hung port does not hold up the others
+        if args.daemon:
+            pool = PortWorkerPool(_commands, deadline=command_deadline, deadlines=deadlines, schedules=schedules, pause=pause)
+            log.debug(pool)
+            pool.run(output_results, notify=lambda: systemd.daemon.notify("WATCHDOG=1"))
+        else:
+            pool = PortWorkerPool(_commands, deadline=command_deadline, deadlines=deadlines)
+            log.debug(pool)
+            pool.run(output_results)
+        pool.stop()
+        pipeline.close()
+        return
+
+    def run_item(item):
+        _device, _command, _tag, _outputs, filter, excl_filter, route = item
+        # Tell systemd watchdog we are still alive
         if args.daemon:
             systemd.daemon.notify("WATCHDOG=1")
-            print(f"Sleeping for {pause} sec")
-            time.sleep(pause)
+            print(f"Getting results from device: {_device} for command: {_command}, tag: {_tag}, outputs: {_outputs}")
         else:
-            # Dont loop unless running as daemon
-            log.debug("Not daemon, so not looping")
-            break
+            log.info(f"Getting results from device: {_device} for command: {_command}, tag: {_tag}, outputs: {_outputs}")
+        # the outputs only read the results, so they are decoded as a Reading
+        results = _device.run_command(command=_command, as_reading=True)
+        log.debug(f"results: {results}")
+        output_results(item, results)
+
+    if not args.daemon:
+        # Dont loop unless running as daemon
+        log.info(f"Looping {len(_commands)} commands")
+        for item in _commands:
+            run_item(item)
+        pipeline.close()
+        return
+
+    # Run each section on a fixed rate grid (every pause seconds plus its offset),
+    # so the time taken by the commands does not add to the period
+    scheduler = FixedRateScheduler()
+    section_commands = {}
+    for item in _commands:
+        section_commands.setdefault(item[0]._name, []).append(item)
+    for name in section_commands:
+        interval, offset = schedules.get(name, (pause, 0))
+        scheduler.add(name, interval, offset)
+    print(f"Scheduling sections: {scheduler}")
+    while True:
+        for name in scheduler.wait():
+            for item in section_commands[name]:
+                run_item(item)
+            missed = scheduler.complete(name)
+            if missed:
+                print(f"Section {name} overran, skipped {missed} run(s)")
+        if pipeline.output_queue is not None:
+            log.debug(f"Output queue metrics: {pipeline.output_queue.metrics()}")
+        # Tell systemd watchdog we are still alive
+        systemd.daemon.notify("WATCHDOG=1")
 
 
 if __name__ == "__main__":
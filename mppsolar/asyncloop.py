@@ -0,0 +1,90 @@
+import asyncio
+import logging
+
+from .libs.scheduler import FixedRateScheduler
+
+log = logging.getLogger("asyncloop")
+
+
+def group_by_port(commands) -> dict:
+    """
+    Group (device, command, ...) tuples by the port of the device, keeping the order of the commands
+    """
+    groups = {}
+    for item in commands:
+        device = item[0]
+        key = getattr(device, "_port_name", None) or id(device)
+        groups.setdefault(key, []).append(item)
+    return groups
+
+
+def group_by_section(commands) -> dict:
+    """
+    Group (device, command, ...) tuples by the device (config section) name, keeping the order of the commands
+    """
+    sections = {}
+    for item in commands:
+        sections.setdefault(item[0]._name, []).append(item)
+    return sections
+
+
+async def run_port_commands(commands, handle_results) -> None:
+    """
+    Run the commands for a single port, one after another
+    """
+    for item in commands:
+        device, command = item[0], item[1]
+        try:
+            results = await device.run_command(command=command, as_reading=True)
+        except Exception as e:
+            log.error(f"Error running command {command} on {device}: {e}")
+            results = {"ERROR": [f"Error running command {command}: {e}", ""]}
+        log.debug(f"results: {results}")
+        handle_results(item, results)
+
+
+async def run_commands(commands, handle_results) -> None:
+    """
+    Run all the commands, the ports are polled concurrently and the commands for each port sequentially
+    - commands are (device, command, ...) tuples where device is an AsyncDevice
+    - handle_results(item, results) is called with each command tuple and its results
+    """
+    groups = group_by_port(commands)
+    log.info(f"Running {len(commands)} commands on {len(groups)} ports")
+    await asyncio.gather(*(run_port_commands(group, handle_results) for group in groups.values()))
+
+
+async def run_port_schedule(commands, handle_results, schedules, pause, notify=None) -> None:
+    """
+    Run the sections of a single port on their own fixed rate grid (see FixedRateScheduler), until cancelled
+    - schedules is {section name: (interval, offset)}, sections not in it run every pause seconds
+    """
+    sections = group_by_section(commands)
+    scheduler = FixedRateScheduler()
+    for name in sections:
+        interval, offset = schedules.get(name, (pause, 0))
+        scheduler.add(name, interval, offset)
+    log.info(f"Scheduling sections: {scheduler}")
+    while True:
+        await asyncio.sleep(scheduler.delay())
+        for name in scheduler.due():
+            await run_port_commands(sections[name], handle_results)
+            missed = scheduler.complete(name)
+            if missed:
+                print(f"Section {name} overran, skipped {missed} run(s)")
+        if notify is not None:
+            notify()
+
+
+async def run_loop(commands, handle_results, schedules=None, pause=None, notify=None) -> None:
+    """
+    Run the commands once, or if pause is set keep running each port on its own schedule
+    - each port waits for its own sections' pause (or schedules) so a slow port does not delay the others
+    - notify (if supplied) is called after each run of a port, eg for the systemd watchdog
+    """
+    if pause is None:
+        await run_commands(commands, handle_results)
+        return
+    groups = group_by_port(commands)
+    log.info(f"Scheduling {len(commands)} commands on {len(groups)} ports")
+    await asyncio.gather(*(run_port_schedule(group, handle_results, schedules or {}, pause, notify) for group in groups.values()))
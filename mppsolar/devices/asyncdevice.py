@@ -0,0 +1,77 @@
+import logging
+
+from mppsolar.helpers import get_kwargs
+from mppsolar.inout import get_async_port
+from mppsolar.protocols import get_protocol
+
+from .device import AbstractDevice
+
+log = logging.getLogger("asyncdevice")
+
+
+class AsyncDevice(AbstractDevice):
+    """
+    AsyncDevice - a device with an asyncio port, the run_command methods are awaited
+    - commands on one device (port) are run one after another, different devices run concurrently
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        self._classname = get_kwargs(kwargs, "type", "mppsolar")
+        log.debug(f"__init__ kwargs {kwargs}")
+        self._name = get_kwargs(kwargs, "name")
+        self._port_name = get_kwargs(kwargs, "port")
+        self._port = get_async_port(**kwargs)
+        self._protocol = get_protocol(get_kwargs(kwargs, "protocol"))
+        log.debug(f"__init__ name {self._name}, port {self._port}, protocol {self._protocol}")
+
+    async def run_command(self, command, lean=False, as_reading=False) -> dict:
+        """
+        generic method for running a 'raw' command, see AbstractDevice.run_command
+        """
+        log.info("Running command %s", command)
+
+        error = self._check_ready(command)
+        if error is not None:
+            return error
+
+        if command == "list_commands":
+            return self._protocol.list_commands()
+        if command == "get_status":
+            return await self.get_status()
+        if command == "get_settings":
+            return await self.get_settings()
+        if command == "get_device_id":
+            return await self.get_device_id()
+
+        request = self._get_request(command)
+        if isinstance(request, dict):
+            return request
+
+        raw_response = await self._port.send_and_receive(
+            command=request.command,
+            full_command=request.full_command,
+            protocol=self._protocol,
+            command_defn=request.command_defn,
+            request=request,
+        )
+        return self._decode_response(raw_response, request, lean=lean, as_reading=as_reading)
+
+    async def get_status(self) -> dict:
+        data = {}
+        for command in self._protocol.STATUS_COMMANDS:
+            data.update(await self.run_command(command))
+        return data
+
+    async def get_settings(self) -> dict:
+        data = {}
+        for command in self._protocol.SETTINGS_COMMANDS:
+            data.update(await self.run_command(command))
+        return data
+
+    async def get_device_id(self) -> dict:
+        results = [await self.run_command(command) for command in self._get_id_commands()]
+        return self._build_device_id(results)
+
+    async def disconnect(self) -> None:
+        if self._port is not None:
+            await self._port.disconnect()
@@ -33,6 +33,7 @@ class AbstractDevice(ABC):
         log.debug(f"__init__ args {args}")
         log.debug(f"__init__ kwargs {kwargs}")
         self._name = get_kwargs(kwargs, "name")
+        self._port_name = get_kwargs(kwargs, "port")
         self._port = get_port(**kwargs)
         self._protocol = get_protocol(get_kwargs(kwargs, "protocol"))
         log.debug(f"__init__ name {self._name}, port {self._port}, protocol {self._protocol}")
@@ -43,12 +44,45 @@ class AbstractDevice(ABC):
         """
         return f"{self._classname} device - name: {self._name}, port: {self._port}, protocol: {self._protocol}"
 
-    def run_command(self, command) -> dict:
+    def run_command(self, command, lean=False, as_reading=False) -> dict:
         """
         generic method for running a 'raw' command
+        - lean: decode without the raw_response
+        - as_reading: return the decoded response as a Reading
         """
-        log.info(f"Running command {command}")
+        log.info("Running command %s", command)
 
+        error = self._check_ready(command)
+        if error is not None:
+            return error
+
+        if command == "list_commands":
+            return self._protocol.list_commands()
+        if command == "get_status":
+            return self.get_status()
+        if command == "get_settings":
+            return self.get_settings()
+        if command == "get_device_id":
+            return self.get_device_id()
+
+        request = self._get_request(command)
+        if isinstance(request, dict):
+            return request
+
+        # Band-aid solution, need to reduce what is sent
+        raw_response = self._port.send_and_receive(
+            command=request.command,
+            full_command=request.full_command,
+            protocol=self._protocol,
+            command_defn=request.command_defn,
+            request=request,
+        )
+        return self._decode_response(raw_response, request, lean=lean, as_reading=as_reading)
+
+    def _check_ready(self, command) -> dict:
+        """
+        Check the device has a protocol and port, returns the error (or None if ready)
+        """
         if self._protocol is None:
             log.error("Attempted to run command with no protocol defined")
             return {"ERROR": ["Attempted to run command with no protocol defined", ""]}
@@ -60,22 +94,19 @@ class AbstractDevice(ABC):
                     "",
                 ]
             }
+        return None
 
-        if command == "list_commands":
-            return self._protocol.list_commands()
-        if command == "get_status":
-            return self.get_status()
-        if command == "get_settings":
-            return self.get_settings()
-        if command == "get_device_id":
-            return self.get_device_id()
-
+    def _get_request(self, command):
+        """
+        Build the request (including the full command) for command, returns an error dict if there is no full command
+        """
         if not command:
             command = self._protocol.DEFAULT_COMMAND
 
-        # Send command and receive data
-        full_command = self._protocol.get_full_command(command)
-        log.info(f"full command {full_command} for command {command}")
+        # the per call state is kept in the request so the protocol can be shared
+        request = self._protocol.get_request(command)
+        full_command = self._protocol.get_full_command(command, request=request)
+        log.info("full command %s for command %s", full_command, command)
         if full_command is None:
             log.error(f"full_command not found for {command} in protocol {self._protocol._protocol_id}")
             return {
@@ -84,23 +115,21 @@ class AbstractDevice(ABC):
                     "",
                 ]
             }
+        return request
 
-        # Band-aid solution, need to reduce what is sent
-        raw_response = self._port.send_and_receive(
-            command=command,
-            full_command=full_command,
-            protocol=self._protocol,
-            command_defn=self._protocol.get_command_defn(command),
-        )
-        log.debug(f"Send and Receive Response {raw_response}")
+    def _decode_response(self, raw_response, request, lean=False, as_reading=False) -> dict:
+        """
+        Decode the raw_response to request
+        """
+        log.debug("Send and Receive Response %s", raw_response)
 
         # Handle errors
         # Maybe there should a decode for ERRORs and WARNINGS...
         # Some inverters return the command if the command is unknown:
-        if raw_response == full_command:
+        if raw_response == request.full_command:
             return {
                 "ERROR": [
-                    f"Inverter returned the command string for {command} - the inverter didnt recognise this command",
+                    f"Inverter returned the command string for {request.command} - the inverter didnt recognise this command",
                     "",
                 ]
             }
@@ -109,8 +138,8 @@ class AbstractDevice(ABC):
         #     return raw_response
 
         # Decode response
-        decoded_response = self._protocol.decode(raw_response, command)
-        log.info(f"Decoded response {decoded_response}")
+        decoded_response = self._protocol.decode(raw_response, request.command, lean=lean, as_reading=as_reading, request=request)
+        log.info("Decoded response %s", decoded_response)
 
         return decoded_response
 
@@ -129,15 +158,25 @@ class AbstractDevice(ABC):
         return data
 
     def get_device_id(self) -> dict:
+        results = [self.run_command(command) for command in self._get_id_commands()]
+        return self._build_device_id(results)
+
+    def _get_id_commands(self) -> list:
+        """
+        The commands run to build the device id
+        """
+        if not self._protocol.ID_COMMANDS:
+            return []
+        return [line[0] if isinstance(line, tuple) else line for line in self._protocol.ID_COMMANDS]
+
+    def _build_device_id(self, results) -> dict:
+        """
+        Build the device id from the results of the ID_COMMANDS
+        """
         _id = ""
         if self._protocol.ID_COMMANDS:
             # print(self._protocol.ID_COMMANDS)
-            for line in self._protocol.ID_COMMANDS:
-                if isinstance(line, tuple):
-                    command = line[0]
-                else:
-                    command = line
-                result = self.run_command(command)
+            for line, result in zip(self._protocol.ID_COMMANDS, results):
                 if isinstance(line, tuple):
                     key = line[1]
                 else:
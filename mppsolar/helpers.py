@@ -31,6 +31,37 @@ def key_wanted(key, filter=None, excl_filter=None):
         return False
 
 
+# (source_key, output_key) pairs by key set and output settings, see get_key_map
+_KEY_MAPS = {}
+# the cache is cleared if it grows beyond this, eg a device returning changing keys
+KEY_MAP_CACHE_SIZE = 256
+
+
+def get_key_map(keys, remove_spaces=True, keep_case=False, filter=None, excl_filter=None):
+    """
+    get the (source_key, output_key) pairs for the keys an output wants
+    - output_key is the key with spaces replaced by _ (if remove_spaces) and lowercased (unless keep_case)
+    - only the keys passing filter and excl_filter (compiled regexes) are included
+    - cached, as the keys of a command's results (and the output settings) do not change between polls
+    """
+    keys = tuple(keys)
+    cache_key = (keys, remove_spaces, bool(keep_case), filter, excl_filter)
+    key_map = _KEY_MAPS.get(cache_key)
+    if key_map is None:
+        key_map = []
+        for key in keys:
+            output_key = key.replace(" ", "_") if remove_spaces else key
+            if not keep_case:
+                output_key = output_key.lower()
+            if key_wanted(output_key, filter, excl_filter):
+                key_map.append((key, output_key))
+        key_map = tuple(key_map)
+        if len(_KEY_MAPS) >= KEY_MAP_CACHE_SIZE:
+            _KEY_MAPS.clear()
+        _KEY_MAPS[cache_key] = key_map
+    return key_map
+
+
 def get_value(_list, _index):
     """
     get the value from _list or return None if _index is out of bounds
@@ -169,3 +169,48 @@ def get_port(*args, **kwargs):
     else:
         _port = None
     return _port
+
+
+def get_async_port(*args, **kwargs):
+    """
+    asyncio version of get_port
+    - serial, remote socket and mqtt ports have asyncio implementations
+    - other ports are run in a worker thread
+    """
+    port = get_kwargs(kwargs, "port")
+    baud = get_kwargs(kwargs, "baud", 2400)
+    porttype = get_kwargs(kwargs, "porttype", None)
+
+    if porttype:
+        port_type = get_port_type(porttype)
+    else:
+        port_type = get_port_type(port)
+
+    if port_type == PortType.SERIAL:
+        log.info("Using asyncserialio for communications")
+        from mppsolar.inout.asyncserialio import AsyncSerialIO
+
+        return AsyncSerialIO(device_path=port, serial_baud=baud)
+
+    if port_type == PortType.REMOTESOCKET and ":" in port:
+        remote_ip, remote_port = port.split(":")
+        log.info("Using asyncsocketio for communications")
+        from mppsolar.inout.asyncsocketio import AsyncSocketIO
+
+        return AsyncSocketIO(remote_ip=remote_ip, remote_port=remote_port)
+
+    if port_type == PortType.MQTT:
+        mqtt_broker = get_kwargs(kwargs, "mqtt_broker", "localhost")
+        name = get_kwargs(kwargs, "name", "unnamed")
+        log.info(f"Using asyncmqttio for communications broker {mqtt_broker}")
+        from mppsolar.inout.asyncmqttio import AsyncMqttIO
+
+        return AsyncMqttIO(client_id=name, mqtt_broker=mqtt_broker)
+
+    _port = get_port(*args, **kwargs)
+    if _port is None:
+        return None
+    log.info(f"Running {_port} in a worker thread")
+    from mppsolar.inout.asyncbaseio import ThreadedIO
+
+    return ThreadedIO(_port)
@@ -0,0 +1,60 @@
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from functools import partial
+
+log = logging.getLogger("AsyncBaseIO")
+
+
+async def run_in_thread(function, *args, **kwargs):
+    """
+    Run a blocking function in the default executor (asyncio.to_thread needs python 3.9)
+    """
+    return await asyncio.get_running_loop().run_in_executor(None, partial(function, *args, **kwargs))
+
+
+class AsyncBaseIO(ABC):
+    """
+    AsyncBaseIO - base for the asyncio IO classes
+    - send_and_receive takes the same arguments as BaseIO.send_and_receive and is awaited
+    - one command is run at a time on a port, the lock is held for each send_and_receive
+    """
+
+    _lock = None
+
+    @property
+    def lock(self) -> asyncio.Lock:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    @abstractmethod
+    async def send_and_receive(self, *args, **kwargs) -> dict:
+        raise NotImplementedError
+
+    async def connect(self) -> None:
+        log.debug("connect not implemented")
+        return
+
+    async def disconnect(self) -> None:
+        log.debug("disconnect not implemented")
+        return
+
+
+class ThreadedIO(AsyncBaseIO):
+    """
+    ThreadedIO - runs a blocking BaseIO in a worker thread
+    - used for the ports that do not have an asyncio implementation, eg hidraw and BLE
+    """
+
+    def __init__(self, io) -> None:
+        self._io = io
+
+    def __str__(self):
+        return f"ThreadedIO: {self._io}"
+
+    async def send_and_receive(self, *args, **kwargs) -> dict:
+        return await run_in_thread(self._io.send_and_receive, *args, **kwargs)
+
+    async def disconnect(self) -> None:
+        await run_in_thread(self._io.disconnect)
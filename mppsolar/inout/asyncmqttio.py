@@ -0,0 +1,93 @@
+import asyncio
+import binascii
+import json as js
+import logging
+
+import paho.mqtt.client as mqttc
+
+from .asyncbaseio import AsyncBaseIO, run_in_thread
+from ..helpers import get_kwargs
+
+log = logging.getLogger("AsyncMqttIO")
+
+# seconds to wait for the result message
+RESULT_TIMEOUT = 5
+
+
+class AsyncMqttIO(AsyncBaseIO):
+    """
+    AsyncMqttIO - mqtt IO for asyncio, as MqttIO
+    - publishes the command to <client_id>/command and waits for the result on <client_id>/result
+    - returns as soon as the result arrives rather than after a fixed wait
+    - the mqtt client runs its own network thread and is kept connected
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        self.mqtt_broker = get_kwargs(kwargs, "mqtt_broker", "localhost")
+        self.mqtt_port = self.mqtt_broker.port
+        self.mqtt_user = self.mqtt_broker.username
+        self.mqtt_pass = self.mqtt_broker.password
+        self.client_id = get_kwargs(kwargs, "client_id")
+        self.command_topic = f"{self.client_id}/command"
+        self.result_topic = f"{self.client_id}/result"
+        self._client = None
+        self._result = None
+
+    def __str__(self):
+        return f"AsyncMqttIO: {self.client_id} via {self.mqtt_broker}"
+
+    def _on_message(self, client, userdata, message):
+        log.debug(f"AsyncMqttIO got msg, topic: {message.topic}, payload: {message.payload}")
+        result = self._result
+        if result is not None:
+            # called from the mqtt network thread
+            result.get_loop().call_soon_threadsafe(lambda: result.done() or result.set_result(message))
+
+    async def connect(self) -> None:
+        if self._client is not None:
+            return
+        client = mqttc.Client()
+        if self.mqtt_user is not None and self.mqtt_pass is not None:
+            log.info(f"Using mqtt authentication, username: {self.mqtt_user}, password: [supplied]")
+            client.username_pw_set(self.mqtt_user, password=self.mqtt_pass)
+        client.on_message = self._on_message
+        await run_in_thread(client.connect, self.mqtt_broker.name, port=self.mqtt_port)
+        client.subscribe(self.result_topic)
+        client.loop_start()
+        self._client = client
+
+    async def disconnect(self) -> None:
+        if self._client is not None:
+            self._client.loop_stop()
+            self._client.disconnect()
+            self._client = None
+
+    async def send_and_receive(self, *args, **kwargs) -> dict:
+        full_command = get_kwargs(kwargs, "full_command")
+        command = get_kwargs(kwargs, "command")
+        async with self.lock:
+            try:
+                await self.connect()
+            except Exception as e:
+                log.warning(f"Mqtt connect error: {e}")
+                return {"ERROR": [f"Mqtt connect error: {e}", ""]}
+            payload = js.dumps({"command": command, "command_hex": binascii.hexlify(full_command).decode()})
+            self._result = asyncio.get_running_loop().create_future()
+            log.debug(f"Publishing {payload} to topic: {self.command_topic}")
+            self._client.publish(self.command_topic, payload=payload)
+            try:
+                message = await asyncio.wait_for(self._result, RESULT_TIMEOUT)
+            except asyncio.TimeoutError:
+                return {
+                    "ERROR": [
+                        f"Mqtt result message not received on topic {self.result_topic} after {RESULT_TIMEOUT}sec",
+                        "",
+                    ]
+                }
+            finally:
+                self._result = None
+        # payload: b'{"command_hex": "515049beac0d", "result": "", "command": "QPI"}'
+        payload_dict = js.loads(message.payload)
+        result = binascii.unhexlify(payload_dict["result"])
+        log.debug(f"mqtt response on {message.topic} for command {payload_dict['command']} was: {result}")
+        return result
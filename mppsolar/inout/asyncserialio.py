@@ -0,0 +1,104 @@
+import asyncio
+import logging
+
+import serial
+
+from .asyncbaseio import AsyncBaseIO, ThreadedIO, run_in_thread
+from .framereader import RESPONSE_TIMEOUT, INTER_BYTE_TIMEOUT, async_read_until_frame, get_framer
+from .serialio import SerialIO
+from ..helpers import get_kwargs
+
+log = logging.getLogger("AsyncSerialIO")
+
+
+def has_fileno(port) -> bool:
+    """
+    Check if the event loop can wait on port, ie it is a local serial device with a file descriptor
+    """
+    if not isinstance(port, serial.Serial):
+        # the url handlers (socket://, rfc2217://, loop:// ...) buffer or negotiate in python
+        return False
+    try:
+        port.fileno()
+    except (AttributeError, OSError, ValueError):
+        return False
+    return True
+
+
+class AsyncSerialIO(AsyncBaseIO):
+    """
+    AsyncSerialIO - serial port IO for asyncio
+    - the port is opened non blocking (in a worker thread) on first use and kept open
+    - reads wait on the event loop for the port to be readable, so other ports are polled meanwhile
+    - ports without a file descriptor to wait on (eg rfc2217:// and other url ports) are run
+      as a blocking SerialIO in a worker thread instead
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        self._serial_port = get_kwargs(kwargs, "device_path")
+        self._serial_baud = get_kwargs(kwargs, "serial_baud")
+        self._serial = None
+        # the blocking fallback, for ports that cannot be waited on by the event loop
+        self._threaded = None
+
+    def __str__(self):
+        return f"AsyncSerialIO: {self._serial_port} @ {self._serial_baud}"
+
+    async def connect(self) -> None:
+        if self._serial is not None or self._threaded is not None:
+            return
+        log.debug("Opening serial port %s @ %s", self._serial_port, self._serial_baud)
+        port = await run_in_thread(serial.serial_for_url, self._serial_port, self._serial_baud, timeout=0, write_timeout=1)
+        if has_fileno(port):
+            self._serial = port
+            return
+        port.close()
+        log.info(f"Serial port {self._serial_port} cannot be waited on by the event loop, running it in a worker thread")
+        self._threaded = ThreadedIO(SerialIO(device_path=self._serial_port, serial_baud=self._serial_baud))
+
+    async def disconnect(self) -> None:
+        if self._threaded is not None:
+            await self._threaded.disconnect()
+        if self._serial is not None:
+            self._serial.close()
+            self._serial = None
+
+    async def _read(self, wait) -> bytes:
+        """
+        Wait up to wait seconds for data from the port, returns b'' if there is none
+        """
+        data = self._serial.read(self._serial.in_waiting or 1)
+        if data:
+            return data
+        loop = asyncio.get_running_loop()
+        readable = loop.create_future()
+        fd = self._serial.fileno()
+        loop.add_reader(fd, lambda: readable.done() or readable.set_result(None))
+        try:
+            await asyncio.wait_for(readable, wait)
+        except asyncio.TimeoutError:
+            return b""
+        finally:
+            loop.remove_reader(fd)
+        return self._serial.read(self._serial.in_waiting or 1)
+
+    async def send_and_receive(self, *args, **kwargs) -> dict:
+        full_command = get_kwargs(kwargs, "full_command")
+        framer = get_framer(get_kwargs(kwargs, "protocol"), get_kwargs(kwargs, "request"))
+        log.debug(f"port {self._serial_port}, baudrate {self._serial_baud}")
+        async with self.lock:
+            try:
+                await self.connect()
+                if self._threaded is not None:
+                    return await self._threaded.send_and_receive(*args, **kwargs)
+                self._serial.reset_input_buffer()
+                await run_in_thread(self._serial.write, full_command)
+                response_line = await async_read_until_frame(self._read, framer, RESPONSE_TIMEOUT, INTER_BYTE_TIMEOUT)
+                log.debug("serial response was: %s", response_line)
+                return response_line
+            except Exception as e:
+                log.warning(f"Serial read error: {e}")
+                # start again with a fresh port next time
+                await self.disconnect()
+        log.info("Command execution failed")
+        return {"ERROR": ["Serial command execution failed", ""]}
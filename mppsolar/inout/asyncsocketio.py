@@ -0,0 +1,49 @@
+import asyncio
+import logging
+
+from .asyncbaseio import AsyncBaseIO
+from .framereader import RESPONSE_TIMEOUT, INTER_BYTE_TIMEOUT, async_read_until_frame, get_framer
+from ..helpers import get_kwargs
+
+log = logging.getLogger("AsyncSocketIO")
+
+
+class AsyncSocketIO(AsyncBaseIO):
+    """
+    AsyncSocketIO - remote socket (TCP) IO for asyncio, a connection per command as remoteSocketIO
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        self._remote_ip = get_kwargs(kwargs, "remote_ip")
+        self._remote_port = get_kwargs(kwargs, "remote_port")
+
+    def __str__(self):
+        return f"AsyncSocketIO: {self._remote_ip}:{self._remote_port}"
+
+    async def send_and_receive(self, *args, **kwargs) -> dict:
+        full_command = get_kwargs(kwargs, "full_command")
+        framer = get_framer(get_kwargs(kwargs, "protocol"), get_kwargs(kwargs, "request"))
+        log.debug(f"host ip: {self._remote_ip}, host port: {self._remote_port}")
+
+        async def read(wait):
+            try:
+                return await asyncio.wait_for(reader.read(4096), wait)
+            except asyncio.TimeoutError:
+                return b""
+
+        async with self.lock:
+            writer = None
+            try:
+                reader, writer = await asyncio.wait_for(asyncio.open_connection(self._remote_ip, self._remote_port), RESPONSE_TIMEOUT)
+                writer.write(full_command)
+                await writer.drain()
+                response_line = await async_read_until_frame(read, framer, RESPONSE_TIMEOUT, INTER_BYTE_TIMEOUT)
+                log.debug("socket response was: %s", response_line)
+                return response_line
+            except Exception as e:
+                log.warning(f"socket read error: {e}")
+            finally:
+                if writer is not None:
+                    writer.close()
+        log.info("Command execution failed")
+        return {"ERROR": ["Socket command execution failed", ""]}
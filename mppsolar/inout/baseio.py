@@ -18,18 +18,21 @@ class BaseIO(ABC):
         log.debug("disconnect not implemented")
         return
 
-    def process_command(self, command, protocol):
+    def process_command(self, command, protocol, lean=False):
         # Band-aid solution, need to reduce what is sent
-        log.debug(f"Command {command}")
-        full_command = protocol.get_full_command(command)
+        log.debug("Command %s", command)
+        # the per call state is kept in the request so the protocol can be shared
+        request = protocol.get_request(command)
+        full_command = protocol.get_full_command(command, request=request)
 
         raw_response = self.send_and_receive(
             command=command,
             full_command=full_command,
             protocol=protocol,
-            command_defn=protocol.get_command_defn(command),
+            command_defn=request.command_defn,
+            request=request,
         )
-        log.debug(f"Send and Receive Response {raw_response}")
+        log.debug("Send and Receive Response %s", raw_response)
 
         # Handle errors
         # Maybe there should a decode for ERRORs and WARNINGS...
@@ -47,7 +50,7 @@ class BaseIO(ABC):
             return raw_response
 
         # Decode response
-        decoded_response = protocol.decode(raw_response, command)
-        log.info(f"Decoded response {decoded_response}")
+        decoded_response = protocol.decode(raw_response, command, lean=lean, request=request)
+        log.info("Decoded response %s", decoded_response)
 
         return decoded_response
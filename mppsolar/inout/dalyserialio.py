@@ -1,8 +1,8 @@
 import logging
-import serial
-import time
 
 from .baseio import BaseIO
+from .framereader import get_framer, read_frame
+from .serialpool import SERIAL_POOL
 from ..helpers import get_kwargs
 
 log = logging.getLogger("DalySerialIO")
@@ -13,28 +13,23 @@ class DalySerialIO(BaseIO):
         self._serial_port = get_kwargs(kwargs, "device_path")
         self._serial_baud = get_kwargs(kwargs, "serial_baud")
 
+    def disconnect(self) -> None:
+        SERIAL_POOL.close(self._serial_port, self._serial_baud)
+
     def send_and_receive(self, *args, **kwargs) -> dict:
         full_command = get_kwargs(kwargs, "full_command")
+        framer = get_framer(get_kwargs(kwargs, "protocol"), get_kwargs(kwargs, "request"))
         response_line = b""
         log.debug(f"port {self._serial_port}, baudrate {self._serial_baud}")
         try:
-            with serial.serial_for_url(self._serial_port, self._serial_baud) as s:
+            with SERIAL_POOL.connection(self._serial_port, self._serial_baud) as s:
                 log.debug("Executing command via dalyserialio...")
-                s.timeout = 0.5
                 s.write_timeout = 1
                 s.reset_input_buffer()
                 s.reset_output_buffer()
                 s.write(full_command)
-                # read until no more data
-                while True:
-                    time.sleep(0.5)  # give serial port time to receive the data
-                    to_read = s.in_waiting
-                    log.debug(f"bytes waiting {to_read}")
-                    if to_read == 0:
-                        break
-                    # got some data to read
-                    response_line += s.read(to_read)
-
+                # read until the expected frames have arrived (or the BMS stops sending)
+                response_line = read_frame(s, framer)
                 log.debug("serial response was: %s", response_line)
                 return response_line
         except Exception as e:
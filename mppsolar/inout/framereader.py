@@ -0,0 +1,108 @@
+import logging
+import socket
+import time
+
+from ..protocols.framing import TerminatorFramer
+
+log = logging.getLogger("FrameReader")
+
+# seconds to wait for the first byte of a response
+RESPONSE_TIMEOUT = 1
+# seconds without data after which a response is taken to have ended
+INTER_BYTE_TIMEOUT = 0.1
+
+DEFAULT_FRAMER = TerminatorFramer(b"\r")
+
+
+def get_framer(protocol=None, request=None):
+    """
+    Get the response framer for a request, the PI CR terminator if the protocol does not supply one
+    """
+    if protocol is None:
+        return DEFAULT_FRAMER
+    return protocol.get_response_framer(request)
+
+
+def read_until_frame(read, framer, timeout, inter_byte_timeout) -> bytes:
+    """
+    Read until framer recognises a complete response
+    - read(wait) returns the bytes available within wait seconds, b'' if none arrived
+    - gives up once no data arrives for inter_byte_timeout seconds (timeout for the first byte)
+      or timeout seconds have passed overall, returning what has been read
+    - inter_byte_timeout None waits for the rest of the response until the overall timeout
+    """
+    buffer = bytearray()
+    deadline = time.monotonic() + timeout
+    wait = timeout
+    while True:
+        chunk = read(wait)
+        if not chunk:
+            log.debug("no data for %ss, %s bytes read", wait, len(buffer))
+            return bytes(buffer)
+        buffer += chunk
+        end = framer.frame_end(buffer)
+        if end is not None:
+            if end < len(buffer):
+                log.debug("discarding %s bytes after the response", len(buffer) - end)
+            return bytes(buffer[:end])
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            log.debug("response timeout, %s bytes read", len(buffer))
+            return bytes(buffer)
+        wait = min(inter_byte_timeout, remaining) if inter_byte_timeout is not None else remaining
+
+
+def read_frame(port, framer=DEFAULT_FRAMER, timeout=RESPONSE_TIMEOUT, inter_byte_timeout=INTER_BYTE_TIMEOUT) -> bytes:
+    """
+    Read a complete response from a pyserial port
+    """
+
+    def read(wait):
+        port.timeout = wait
+        # block for one byte, then take whatever else has already arrived
+        data = port.read(1)
+        if data:
+            waiting = port.in_waiting
+            if waiting:
+                data += port.read(waiting)
+        return data
+
+    return read_until_frame(read, framer, timeout, inter_byte_timeout)
+
+
+def recv_frame(sock, framer=DEFAULT_FRAMER, timeout=RESPONSE_TIMEOUT, inter_byte_timeout=INTER_BYTE_TIMEOUT, bufsize=4096) -> bytes:
+    """
+    Read a complete response from a connected socket
+    """
+
+    def read(wait):
+        sock.settimeout(wait)
+        try:
+            return sock.recv(bufsize)
+        except socket.timeout:
+            return b""
+
+    return read_until_frame(read, framer, timeout, inter_byte_timeout)
+
+
+async def async_read_until_frame(read, framer, timeout, inter_byte_timeout) -> bytes:
+    """
+    As read_until_frame, with read an async function
+    """
+    buffer = bytearray()
+    deadline = time.monotonic() + timeout
+    wait = timeout
+    while True:
+        chunk = await read(wait)
+        if not chunk:
+            log.debug("no data for %ss, %s bytes read", wait, len(buffer))
+            return bytes(buffer)
+        buffer += chunk
+        end = framer.frame_end(buffer)
+        if end is not None:
+            return bytes(buffer[:end])
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            log.debug("response timeout, %s bytes read", len(buffer))
+            return bytes(buffer)
+        wait = min(inter_byte_timeout, remaining) if inter_byte_timeout is not None else remaining
@@ -0,0 +1,155 @@
+import logging
+import os
+import select
+import time
+
+from .framereader import DEFAULT_FRAMER, read_until_frame
+
+log = logging.getLogger("HIDRawTransport")
+
+# minimum seconds between HID reports sent to the device
+REPORT_GAP = 0.05
+# seconds to wait for a complete response, as long as the old fixed read loop allowed (100 reads 0.15s apart)
+# as some inverters are slow to answer some commands, reading stops as soon as the response is complete
+RESPONSE_TIMEOUT = 15
+# maximum bytes read from the device at a time
+READ_SIZE = 256
+
+
+def split_reports(data, report_size=8):
+    """
+    Split a full command into the reports sent to the device
+    - report_size None sends the command as a single report
+    - 9 and 10 byte commands are sent as 5 bytes and the rest, as some inverters expect
+    """
+    if report_size is None or len(data) <= report_size:
+        return [data]
+    if len(data) < 11:
+        return [data[:5], data[5:]]
+    return [data[i:i + report_size] for i in range(0, len(data), report_size)]
+
+
+class HIDRawTransport:
+    """
+    HIDRawTransport - a hidraw device held open, using poll() for read and write readiness
+    - report_gap is the minimum time between reports written to the device (including the first
+      report of a command and the last report of the previous command)
+    - fd can be supplied instead of device_path, eg a pty or socketpair for testing
+    """
+
+    def __init__(self, device_path=None, report_gap=REPORT_GAP, report_size=8, timeout=RESPONSE_TIMEOUT, fd=None) -> None:
+        self.device_path = device_path
+        self.report_gap = report_gap
+        self.report_size = report_size
+        self.timeout = timeout
+        self._fd = None
+        self._poller = None
+        self._last_report = 0.0
+        if fd is not None:
+            self._register(fd)
+
+    def __str__(self):
+        return f"HIDRawTransport: {self.device_path} fd {self._fd}, report gap {self.report_gap}s"
+
+    @property
+    def is_open(self) -> bool:
+        return self._fd is not None
+
+    def _register(self, fd):
+        self._fd = fd
+        self._poller = select.poll()
+        self._poller.register(fd, select.POLLIN | select.POLLOUT | select.POLLERR | select.POLLHUP)
+
+    def open(self):
+        if self._fd is None:
+            log.debug("Opening %s", self.device_path)
+            self._register(os.open(self.device_path, os.O_RDWR | os.O_NONBLOCK))
+        return self._fd
+
+    def close(self):
+        if self._fd is not None:
+            log.debug("Closing %s", self.device_path)
+            try:
+                os.close(self._fd)
+            except OSError as e:
+                log.info("Error closing %s: %s", self.device_path, e)
+            self._fd = None
+            self._poller = None
+
+    def _wait_for(self, event, timeout) -> bool:
+        """
+        Wait up to timeout seconds for event (POLLIN or POLLOUT) on the device
+        - raises OSError if the device has gone away
+        """
+        self._poller.modify(self._fd, event | select.POLLERR | select.POLLHUP)
+        for _, revents in self._poller.poll(max(timeout, 0) * 1000):
+            if revents & event:
+                return True
+            if revents & (select.POLLERR | select.POLLHUP | select.POLLNVAL):
+                raise OSError(f"{self.device_path} poll error {revents:#x}")
+        return False
+
+    def write(self, data):
+        """
+        Write data to the device as reports, at least report_gap apart
+        """
+        for report in split_reports(data, self.report_size):
+            gap = self._last_report + self.report_gap - time.monotonic()
+            if gap > 0:
+                time.sleep(gap)
+            if not self._wait_for(select.POLLOUT, self.timeout):
+                raise TimeoutError(f"{self.device_path} not ready for write")
+            os.write(self._fd, report)
+            self._last_report = time.monotonic()
+
+    def drain(self) -> int:
+        """
+        Discard any input already waiting, eg the late end of a response that timed out,
+        so it is not read as the start of the next response, returns the number of bytes discarded
+        """
+        discarded = 0
+        while self._wait_for(select.POLLIN, 0):
+            try:
+                data = os.read(self._fd, READ_SIZE)
+            except BlockingIOError:
+                break
+            if not data:
+                raise OSError(f"{self.device_path} closed")
+            discarded += len(data)
+        if discarded:
+            log.info("Discarded %s bytes of stale input from %s", discarded, self.device_path)
+        return discarded
+
+    def read_frame(self, framer=DEFAULT_FRAMER) -> bytes:
+        """
+        Read until framer recognises a complete response or the timeout passes
+        """
+
+        def read(wait):
+            deadline = time.monotonic() + wait
+            while self._wait_for(select.POLLIN, deadline - time.monotonic()):
+                try:
+                    data = os.read(self._fd, READ_SIZE)
+                except BlockingIOError:
+                    continue
+                if not data:
+                    raise OSError(f"{self.device_path} closed")
+                return data
+            return b""
+
+        return read_until_frame(read, framer, self.timeout, None)
+
+    def send_and_receive(self, full_command, framer=DEFAULT_FRAMER) -> bytes:
+        """
+        Send full_command and read the response, the device is closed after any error so the
+        next command reopens it
+        - as the device is kept open, any input left from an earlier command is discarded first
+        """
+        self.open()
+        try:
+            self.drain()
+            self.write(full_command)
+            return self.read_frame(framer)
+        except Exception:
+            self.close()
+            raise
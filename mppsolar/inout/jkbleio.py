@@ -25,10 +25,13 @@ class JkBleIO(BaseIO):
         # Send the full command via the communications port
         command = get_kwargs(kwargs, "command")
         protocol = get_kwargs(kwargs, "protocol")
-        full_command = protocol.get_full_command(command)
+        request = get_kwargs(kwargs, "request")
+        if request is None:
+            request = protocol.get_request(command)
+        full_command = protocol.get_full_command(command, request=request)
         log.info(f"full command {full_command} for command {command}")
 
-        command_defn = protocol.get_command_defn(command)
+        command_defn = request.command_defn
         record_type = command_defn["record_type"]
         log.debug(f"expected record type {record_type} for command {command}")
 
@@ -1,8 +1,8 @@
 import logging
 import socket
-import time
 
 from .baseio import BaseIO
+from .framereader import get_framer, recv_frame
 from ..helpers import get_kwargs
 
 log = logging.getLogger("remoteSocketIO")
@@ -15,6 +15,7 @@ class remoteSocketIO(BaseIO):
 
     def send_and_receive(self, *args, **kwargs) -> dict:
         full_command = get_kwargs(kwargs, "full_command")
+        framer = get_framer(get_kwargs(kwargs, "protocol"), get_kwargs(kwargs, "request"))
         response_line = None
         log.debug(f"host ip: {self._remote_ip}, host port: {self._remote_port}")
 
@@ -22,10 +23,8 @@ class remoteSocketIO(BaseIO):
             with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
                 s.connect((self._remote_ip, self._remote_port))
                 log.debug("Executing command via remoteserialio...")
-                s.send(full_command)
-                time.sleep(0.1)  # give serial port time to receive the data
-                response_line = s.recv(1024)
-                # response_line = s.read_until(b"\r")
+                s.sendall(full_command)
+                response_line = recv_frame(s, framer)
                 log.debug("socket response was: %s", response_line)
                 return response_line
         except Exception as e:
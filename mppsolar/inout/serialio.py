@@ -1,8 +1,8 @@
 import logging
-import serial
-import time
 
 from .baseio import BaseIO
+from .framereader import get_framer, read_frame
+from .serialpool import SERIAL_POOL
 from ..helpers import get_kwargs
 
 log = logging.getLogger("SerialIO")
@@ -13,20 +13,23 @@ class SerialIO(BaseIO):
         self._serial_port = get_kwargs(kwargs, "device_path")
         self._serial_baud = get_kwargs(kwargs, "serial_baud")
 
+    def disconnect(self) -> None:
+        SERIAL_POOL.close(self._serial_port, self._serial_baud)
+
     def send_and_receive(self, *args, **kwargs) -> dict:
         full_command = get_kwargs(kwargs, "full_command")
+        framer = get_framer(get_kwargs(kwargs, "protocol"), get_kwargs(kwargs, "request"))
         response_line = None
         log.debug(f"port {self._serial_port}, baudrate {self._serial_baud}")
         try:
-            with serial.serial_for_url(self._serial_port, self._serial_baud) as s:
+            with SERIAL_POOL.connection(self._serial_port, self._serial_baud) as s:
                 log.debug("Executing command via serialio...")
-                s.timeout = 1
                 s.write_timeout = 1
                 s.flushInput()
                 s.flushOutput()
                 s.write(full_command)
-                time.sleep(0.1)  # give serial port time to receive the data
-                response_line = s.read_until(b"\r")
+                # read until the response is complete, rather than waiting a fixed time
+                response_line = read_frame(s, framer)
                 log.debug("serial response was: %s", response_line)
                 return response_line
         except Exception as e:
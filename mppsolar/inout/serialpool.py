@@ -0,0 +1,156 @@
+import atexit
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+import serial
+
+log = logging.getLogger("SerialPool")
+
+# seconds a port can be unused before it is closed
+IDLE_TIMEOUT = 300
+
+
+class PooledSerial:
+    """
+    PooledSerial - a serial port held open by the SerialPool
+    """
+
+    __slots__ = ("device_path", "baud", "lock", "serial", "last_used", "opens")
+
+    def __init__(self, device_path, baud) -> None:
+        self.device_path = device_path
+        self.baud = baud
+        # held while the port is in use
+        self.lock = threading.Lock()
+        self.serial = None
+        self.last_used = time.monotonic()
+        self.opens = 0
+
+    def __str__(self):
+        state = "open" if self.serial is not None else "closed"
+        return f"PooledSerial: {self.device_path} @ {self.baud} ({state}, opened {self.opens} times)"
+
+    def open(self):
+        if self.serial is None or not self.serial.is_open:
+            log.debug("Opening serial port %s @ %s", self.device_path, self.baud)
+            self.serial = serial.serial_for_url(self.device_path, self.baud)
+            self.opens += 1
+        return self.serial
+
+    def close(self):
+        if self.serial is not None:
+            log.debug("Closing serial port %s @ %s", self.device_path, self.baud)
+            try:
+                self.serial.close()
+            except Exception as e:
+                log.info("Error closing serial port %s: %s", self.device_path, e)
+            self.serial = None
+
+
+class SerialPool:
+    """
+    SerialPool - keeps serial ports open between commands
+    - ports are keyed by (device path, baud)
+    - a port is used by one caller at a time
+    - a port is closed (and reopened on next use) after any error while it was in use
+    - ports unused for idle_timeout seconds are closed by a background timer thread, which runs
+      while any port is open, so an idle port is closed even if no other port is used
+    """
+
+    def __init__(self, idle_timeout=IDLE_TIMEOUT) -> None:
+        self.idle_timeout = idle_timeout
+        self._ports = {}
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def __str__(self):
+        return f"SerialPool: {len(self._ports)} ports, idle timeout {self.idle_timeout}s"
+
+    def get(self, device_path, baud) -> PooledSerial:
+        key = (device_path, baud)
+        with self._lock:
+            port = self._ports.get(key)
+            if port is None:
+                port = self._ports[key] = PooledSerial(device_path, baud)
+        return port
+
+    @contextmanager
+    def connection(self, device_path, baud):
+        """
+        Context manager giving exclusive use of the open serial port for (device_path, baud)
+        """
+        port = self.get(device_path, baud)
+        with port.lock:
+            try:
+                yield port.open()
+            except Exception:
+                # the port state is unknown, so start again with a fresh port next time
+                port.close()
+                raise
+            finally:
+                port.last_used = time.monotonic()
+        self._start_idle_timer()
+
+    def _start_idle_timer(self):
+        with self._lock:
+            if self._timer is None:
+                self._timer = threading.Thread(target=self._idle_timer, name="serial pool idle timer", daemon=True)
+                self._timer.start()
+
+    def _idle_timer(self):
+        while True:
+            with self._lock:
+                open_ports = [port for port in self._ports.values() if port.serial is not None]
+                if not open_ports:
+                    # started again when a port is next used
+                    self._timer = None
+                    return
+                # wake when the least recently used port is due to be closed (not more often than the timeout)
+                wait = min(port.last_used for port in open_ports) + self.idle_timeout - time.monotonic()
+            time.sleep(max(wait, min(self.idle_timeout, 1)))
+            self.close_idle()
+
+    def close_idle(self):
+        """
+        Close any ports that have not been used within the idle timeout
+        """
+        now = time.monotonic()
+        with self._lock:
+            ports = list(self._ports.values())
+        for port in ports:
+            if port.serial is None or now - port.last_used < self.idle_timeout:
+                continue
+            # skip ports that are in use
+            if port.lock.acquire(blocking=False):
+                try:
+                    # check again, a command may have used the port since it was checked
+                    idle = time.monotonic() - port.last_used
+                    if port.serial is not None and idle >= self.idle_timeout:
+                        log.debug("Serial port %s idle for %.0fs", port.device_path, idle)
+                        port.close()
+                finally:
+                    port.lock.release()
+
+    def close(self, device_path, baud):
+        """
+        Close the port for (device_path, baud)
+        """
+        with self._lock:
+            port = self._ports.get((device_path, baud))
+        if port is not None:
+            with port.lock:
+                port.close()
+
+    def close_all(self):
+        with self._lock:
+            ports = list(self._ports.values())
+        for port in ports:
+            with port.lock:
+                port.close()
+
+
+# shared by all the serial based IO classes
+SERIAL_POOL = SerialPool()
+atexit.register(SERIAL_POOL.close_all)
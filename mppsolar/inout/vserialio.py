@@ -1,13 +1,18 @@
 import logging
-import serial
 
 # import time
 
 from .baseio import BaseIO
+from .framereader import get_framer, read_frame
+from .serialpool import SERIAL_POOL
 from ..helpers import get_kwargs
+from ..protocols.framing import VEDTextFramer
 
 log = logging.getLogger("VSerialIO")
 
+# seconds to wait for VE.Direct text blocks
+VEDTEXT_TIMEOUT = 2.5
+
 
 class VSerialIO(BaseIO):
     def __init__(self, *args, **kwargs) -> None:
@@ -15,6 +20,9 @@ class VSerialIO(BaseIO):
         self._serial_baud = get_kwargs(kwargs, "serial_baud")
         self._records = get_kwargs(kwargs, "records")
 
+    def disconnect(self) -> None:
+        SERIAL_POOL.close(self._serial_port, self._serial_baud)
+
     def send_and_receive(self, *args, **kwargs) -> dict:
         # self._port.send_and_receive(
         #    command=command,
@@ -23,6 +31,7 @@ class VSerialIO(BaseIO):
         #    command_defn=self._protocol.get_command_defn(command),
 
         full_command = get_kwargs(kwargs, "full_command")
+        framer = get_framer(get_kwargs(kwargs, "protocol"), get_kwargs(kwargs, "request"))
         # print(full_command)
         # "VEDTEXT"
         responses = b""
@@ -33,18 +42,15 @@ class VSerialIO(BaseIO):
         if full_command == "VEDTEXT":
             # Just grab _records from the serial port
             try:
-                with serial.serial_for_url(self._serial_port, self._serial_baud) as s:
+                with SERIAL_POOL.connection(self._serial_port, self._serial_baud) as s:
                     # log.debug(f"Executing command via serialio...")
-                    s.timeout = 1
-                    # s.write_timeout = 1
-                    # s.flushInput()
-                    # s.flushOutput()
-                    # s.write(full_command)
-                    # time.sleep(0.1)  # give serial port time to receive the data
-                    for _ in range(self._records):
-                        response_line = s.read_until(b"\n")
-                        log.debug("vserial response was: %s", response_line)
-                        responses += response_line
+                    # the port is kept open, so drop anything sent since the last read
+                    s.reset_input_buffer()
+                    # read until the Checksum records (or _records lines) have arrived
+                    # blocks are sent once a second, so allow for the gap between them
+                    framer = VEDTextFramer(max_lines=self._records)
+                    responses = read_frame(s, framer, timeout=VEDTEXT_TIMEOUT, inter_byte_timeout=VEDTEXT_TIMEOUT)
+                    log.debug("vserial response was: %s", responses)
                     return responses
             except Exception as e:
                 log.warning(f"VSerial read error: {e}")
@@ -58,15 +64,13 @@ class VSerialIO(BaseIO):
         else:
             # Have a command to send...
             try:
-                with serial.serial_for_url(self._serial_port, self._serial_baud) as s:
+                with SERIAL_POOL.connection(self._serial_port, self._serial_baud) as s:
                     log.debug("Executing command via vserialio...")
-                    s.timeout = 1
                     s.write_timeout = 1
                     s.flushInput()
                     s.flushOutput()
                     s.write(full_command)
-                    # time.sleep(0.1)  # give serial port time to receive the data
-                    response_line = s.read_until(b"\n")
+                    response_line = read_frame(s, framer)
                     log.debug("vserial response was: %s", response_line)
                     return response_line
             except Exception as e:
@@ -0,0 +1,195 @@
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+
+log = logging.getLogger("bufferedwriter")
+
+# default number of buffered rows that triggers a write
+BATCH_SIZE = 100
+# default seconds a row can be buffered before it is written
+FLUSH_INTERVAL = 10
+# maximum number of rows buffered while the database is unavailable, the oldest are dropped
+MAX_BUFFERED = 10000
+# seconds before the first retry of a failed write, doubled after each failure up to RETRY_DELAY_MAX
+RETRY_DELAY = 1
+RETRY_DELAY_MAX = 300
+
+
+class BufferedWriter(ABC):
+    """
+    BufferedWriter - the base for the long lived database writers, rows are buffered and written in batches
+    - a background thread writes the rows when batch_size rows are buffered or the oldest row
+      has waited flush_interval seconds
+    - if a write fails the rows are kept (up to max_buffered) and the write is retried with an increasing delay,
+      rows over max_buffered (or not written on close) are passed to _overflow, which drops them
+    - get(url) returns the writer for url, shared by all the outputs using that database
+    - subclasses implement _write (and _reset and _close if they hold connections, _overflow to keep the rows)
+    """
+
+    name = "database"
+    # (class, url): writer
+    _writers = {}
+    _writersLock = threading.Lock()
+
+    @classmethod
+    def get(cls, url, **kwargs) -> "BufferedWriter":
+        with cls._writersLock:
+            writer = cls._writers.get((cls, url))
+            if writer is None:
+                writer = cls(url, **kwargs)
+                cls._writers[(cls, url)] = writer
+            return writer
+
+    def __init__(self, url, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL, max_buffered=MAX_BUFFERED, clock=time.monotonic) -> None:
+        self.url = url
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffered = max_buffered
+        self._clock = clock
+        self._rows = []
+        self._first_row = None
+        self._condition = threading.Condition()
+        # only one write at a time, so the rows are written in order
+        self._writeLock = threading.Lock()
+        self._retry_at = 0.0
+        self._retry_delay = RETRY_DELAY
+        self._stopped = False
+        self._thread = None
+        # metrics
+        self.written = 0
+        self.dropped = 0
+        self.errors = 0
+
+    def __str__(self):
+        return f"{type(self).__name__}: {len(self._rows)} rows buffered, batch {self.batch_size}, interval {self.flush_interval}s"
+
+    @abstractmethod
+    def _write(self, rows) -> tuple:
+        """
+        Write rows to the database, returns the number of rows written and the rows to retry
+        (raising an exception retries them all)
+        """
+        raise NotImplementedError
+
+    def _reset(self):
+        """
+        Called after a failed write, eg to discard connections that may be broken
+        """
+        pass
+
+    def _close(self):
+        """
+        Called when the writer is closed, eg to close the connections
+        """
+        pass
+
+    def _overflow(self, rows):
+        """
+        Called (holding the lock) with the oldest rows when more than max_buffered are buffered,
+        and with the rows not written on close, the rows are dropped
+        """
+        self.dropped += len(rows)
+        log.warning(f"{self.name} dropped {len(rows)} rows")
+
+    def add(self, row):
+        """
+        Buffer a row for writing
+        """
+        with self._condition:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=f"{self.name} writer", daemon=True)
+                self._thread.start()
+            if not self._rows:
+                self._first_row = self._clock()
+            self._rows.append(row)
+            if len(self._rows) > self.max_buffered:
+                overflow = len(self._rows) - self.max_buffered
+                rows = self._rows[:overflow]
+                del self._rows[:overflow]
+                log.warning(f"{self.name} buffer full")
+                self._overflow(rows)
+            if len(self._rows) >= self.batch_size:
+                self._condition.notify_all()
+
+    def _due(self, now) -> bool:
+        if not self._rows or now < self._retry_at:
+            return False
+        return len(self._rows) >= self.batch_size or now - self._first_row >= self.flush_interval
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._stopped:
+                    now = self._clock()
+                    if self._due(now):
+                        break
+                    if not self._rows:
+                        wait = None
+                    else:
+                        wait = max(self._first_row + self.flush_interval, self._retry_at) - now
+                    self._condition.wait(wait)
+                if self._stopped:
+                    return
+            self.flush()
+
+    def flush(self) -> bool:
+        """
+        Write the buffered rows now, returns False if they could not all be written (the rest are kept to retry)
+        """
+        with self._writeLock:
+            with self._condition:
+                rows = self._rows
+                first_row = self._first_row
+                self._rows = []
+            if not rows:
+                return True
+            try:
+                written, retry = self._write(rows)
+            except Exception as e:
+                log.error(f"{self.name} error {e}")
+                written, retry = 0, rows
+            with self._condition:
+                self.written += written
+                if not retry:
+                    self._retry_at = 0.0
+                    self._retry_delay = RETRY_DELAY
+                    log.debug(f"{self.name}: wrote {len(rows)} rows")
+                    return True
+                self.errors += 1
+                log.warning(f"{self.name}: {len(retry)} rows not written, retrying in {self._retry_delay}s")
+                # keep the rows (ahead of any added since) to write later
+                self._rows[:0] = retry
+                self._first_row = first_row
+                self._retry_at = self._clock() + self._retry_delay
+                self._retry_delay = min(self._retry_delay * 2, RETRY_DELAY_MAX)
+            self._reset()
+            return False
+
+    def close(self):
+        """
+        Write the buffered rows and stop the background thread
+        """
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        with self._writersLock:
+            if self._writers.get((type(self), self.url)) is self:
+                del self._writers[(type(self), self.url)]
+        if not self.flush():
+            log.warning(f"{self.name} writer closed with {len(self._rows)} rows not written")
+            with self._condition:
+                rows = self._rows
+                self._rows = []
+                self._overflow(rows)
+        self._close()
+        log.debug(f"{self.name} writer metrics: {self.metrics()}")
+
+    def metrics(self) -> dict:
+        with self._condition:
+            return {
+                "buffered": len(self._rows),
+                "written": self.written,
+                "dropped": self.dropped,
+                "errors": self.errors,
+            }
@@ -0,0 +1,75 @@
+import hashlib
+import logging
+import threading
+
+log = logging.getLogger("hassdiscovery")
+
+# home assistant publishes online to this topic when it starts (its birth message)
+HASS_STATUS_TOPIC = "homeassistant/status"
+
+
+class DiscoveryRegistry:
+    """
+    DiscoveryRegistry - the Home Assistant discovery configs that have been published,
+    so each entity's config is only published when it is new or has changed
+    - a hash of each config payload is kept by topic, a config that then fails to publish must be discarded
+    - everything is published again after the broker (re)connects, as a broker without
+      persistence loses the retained configs, or when home assistant restarts (the birth message)
+    """
+
+    def __init__(self, mqtt_broker=None, status_topic=HASS_STATUS_TOPIC) -> None:
+        self._hashes = {}
+        self._lock = threading.Lock()
+        self._broker = None
+        self._connects = 0
+        if mqtt_broker is not None:
+            self.attach(mqtt_broker, status_topic)
+
+    def __str__(self):
+        return f"DiscoveryRegistry: {len(self._hashes)} configs published"
+
+    def attach(self, mqtt_broker, status_topic=HASS_STATUS_TOPIC):
+        """
+        Follow the connections of mqtt_broker and the home assistant status topic
+        """
+        if mqtt_broker is self._broker:
+            return
+        self._broker = mqtt_broker
+        self._connects = mqtt_broker.connects
+        mqtt_broker.subscribeCallback(status_topic, self.on_status)
+
+    def on_status(self, client, userdata, msg):
+        status = msg.payload.decode("utf-8", errors="replace")
+        log.debug(f"home assistant status: {status}")
+        if status == "online":
+            log.info("Home Assistant (re)started, publishing the discovery configs again")
+            self.forget()
+
+    def forget(self):
+        """
+        Forget the published configs, so they are all published again
+        """
+        with self._lock:
+            self._hashes.clear()
+
+    def changed(self, topic, payload) -> bool:
+        """
+        Check if the config payload for topic needs publishing (it is new or changed), recording it as published
+        """
+        if self._broker is not None and self._broker.connects != self._connects:
+            log.debug("mqtt broker connected, publishing the discovery configs again")
+            self._connects = self._broker.connects
+            self.forget()
+        digest = hashlib.sha1(payload.encode("utf-8")).digest()
+        with self._lock:
+            if self._hashes.get(topic) == digest:
+                return False
+            self._hashes[topic] = digest
+            return True
+
+    def discard(self, topic):
+        """
+        Forget the config for topic (eg it was not published after all), so it is published again
+        """
+        with self._lock:
+            self._hashes.pop(topic, None)
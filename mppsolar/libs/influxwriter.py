@@ -0,0 +1,180 @@
+import gzip
+import logging
+import os
+import socket
+import threading
+import urllib.error
+import urllib.request
+from urllib.parse import urlsplit, urlunsplit
+
+from .bufferedwriter import BufferedWriter
+
+log = logging.getLogger("influxwriter")
+
+# the path written to if the url has none, the influxdb 2 write api
+WRITE_PATH = "/api/v2/write"
+# seconds to wait for the server to accept a write
+TIMEOUT = 10
+# default udp port (as used by influxdb 1 and the telegraf socket listener)
+UDP_PORT = 8089
+# maximum size of a udp datagram, the lines are split across datagrams
+UDP_PAYLOAD = 1400
+# maximum size of the spill file, lines spilled once it is this big are dropped
+SPILL_MAX = 10 * 1024 * 1024
+
+
+class InfluxWriter(BufferedWriter):
+    """
+    InfluxWriter - a long lived writer of line protocol lines to InfluxDB
+    - http(s) urls get one (gzipped) post per batch, the path defaults to /api/v2/write and the query
+      says where to write, eg http://server:8086/api/v2/write?org=home&bucket=solar or http://server:8086/write?db=solar
+    - udp urls (eg udp://server:8089) are sent as datagrams of whole lines
+    - lines the server rejects (a 4xx reply) are logged and not retried, the rest are retried after an error,
+      the lines carry their own timestamps so a retried line overwrites rather than duplicates the point
+    - with a spill file, lines that overflow the buffer or are not written on close are appended to it,
+      and written after the next successful write (so they also survive a restart)
+    """
+
+    name = "Influx"
+
+    def __init__(self, url, token=None, spill=None, compress=True, timeout=TIMEOUT, opener=urllib.request.urlopen, **kwargs) -> None:
+        super().__init__(url, **kwargs)
+        self.token = token
+        self.spill = spill
+        self.compress = compress
+        self.timeout = timeout
+        self._opener = opener
+        self._spillLock = threading.Lock()
+        self._socket = None
+        parts = urlsplit(url)
+        self._udp = parts.scheme == "udp"
+        if self._udp:
+            self._address = (parts.hostname, parts.port or UDP_PORT)
+        elif parts.path in ("", "/"):
+            self._write_url = urlunsplit((parts.scheme, parts.netloc, WRITE_PATH, parts.query, ""))
+        else:
+            self._write_url = url
+        # metrics
+        self.spilled = 0
+
+    def add(self, line):
+        """
+        Buffer a line protocol line for writing
+        """
+        super().add(line)
+
+    def _write(self, rows) -> tuple:
+        written, retry = self._send(rows)
+        if not retry and self.spill is not None and os.path.exists(self.spill):
+            # the server is back, write the lines kept while it was not
+            written += self._replay()
+        return written, retry
+
+    def _send(self, lines) -> tuple:
+        if self._udp:
+            return self._send_udp(lines)
+        body = "\n".join(lines).encode()
+        headers = {"Content-Type": "text/plain; charset=utf-8"}
+        if self.token:
+            headers["Authorization"] = f"Token {self.token}"
+        if self.compress:
+            body = gzip.compress(body)
+            headers["Content-Encoding"] = "gzip"
+        request = urllib.request.Request(self._write_url, data=body, headers=headers, method="POST")
+        try:
+            with self._opener(request, timeout=self.timeout) as response:
+                response.read()
+        except urllib.error.HTTPError as e:
+            if e.code == 429 or e.code >= 500:
+                # the server is busy or unavailable, retry them all
+                raise
+            # the lines are bad (or the write is not allowed), retrying will not help
+            with self._condition:
+                self.dropped += len(lines)
+            log.error(f"Influx rejected {len(lines)} lines: {e.code} {e.read()[:200]}")
+            return 0, []
+        return len(lines), []
+
+    def _send_udp(self, lines) -> tuple:
+        if self._socket is None:
+            self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        datagram = b""
+        for line in lines:
+            line = line.encode() + b"\n"
+            if datagram and len(datagram) + len(line) > UDP_PAYLOAD:
+                self._socket.sendto(datagram, self._address)
+                datagram = b""
+            datagram += line
+        self._socket.sendto(datagram, self._address)
+        return len(lines), []
+
+    def _replay(self) -> int:
+        """
+        Write the spilled lines, returns the number written, any not written are kept in the spill file
+        """
+        with self._spillLock:
+            try:
+                with open(self.spill, "rb") as f:
+                    spilled = f.read()
+            except OSError as e:
+                log.error(f"Influx could not read spill file {self.spill}: {e}")
+                return 0
+        lines = spilled.decode().splitlines()
+        log.info(f"Influx writing {len(lines)} spilled lines")
+        written = 0
+        start = 0
+        try:
+            while start < len(lines):
+                sent, _ = self._send(lines[start:start + self.batch_size])
+                written += sent
+                start += self.batch_size
+        except Exception as e:
+            log.warning(f"Influx error {e} writing spilled lines, {len(lines) - start} kept")
+        with self._spillLock:
+            # keep the lines not written and any spilled since the file was read
+            try:
+                with open(self.spill, "rb") as f:
+                    f.seek(len(spilled))
+                    kept = "".join(f"{line}\n" for line in lines[start:]).encode() + f.read()
+                if kept:
+                    with open(f"{self.spill}.tmp", "wb") as f:
+                        f.write(kept)
+                    os.replace(f"{self.spill}.tmp", self.spill)
+                else:
+                    os.remove(self.spill)
+            except OSError as e:
+                log.error(f"Influx could not update spill file {self.spill}: {e}")
+        return written
+
+    def _overflow(self, rows):
+        if self.spill is None:
+            super()._overflow(rows)
+            return
+        with self._spillLock:
+            try:
+                size = os.path.getsize(self.spill) if os.path.exists(self.spill) else 0
+                if size >= SPILL_MAX:
+                    log.warning(f"Influx spill file {self.spill} is full")
+                    super()._overflow(rows)
+                    return
+                with open(self.spill, "a") as f:
+                    f.write("".join(f"{line}\n" for line in rows))
+            except OSError as e:
+                log.error(f"Influx could not write spill file {self.spill}: {e}")
+                super()._overflow(rows)
+                return
+        self.spilled += len(rows)
+        log.info(f"Influx spilled {len(rows)} lines to {self.spill}")
+
+    def _reset(self):
+        self._close()
+
+    def _close(self):
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+    def metrics(self) -> dict:
+        metrics = super().metrics()
+        metrics["spilled"] = self.spilled
+        return metrics
@@ -0,0 +1,70 @@
+import logging
+
+import pymongo
+from pymongo.errors import BulkWriteError
+
+from .bufferedwriter import BufferedWriter
+
+log = logging.getLogger("mongowriter")
+
+
+class MongoWriter(BufferedWriter):
+    """
+    MongoWriter - a long lived writer of documents to a MongoDB database
+    - one MongoClient per url is kept for the whole process (it is a connection pool and does
+      the server discovery, so is expensive to create for each result)
+    - the buffered documents are written with one insert_many per collection (command),
+      unordered so a bad document does not stop the rest
+    - documents rejected by the server are logged and not retried, the rest are retried after a connection error
+    """
+
+    name = "Mongo"
+    # url: MongoClient
+    _clients = {}
+
+    def __init__(self, url, client_factory=pymongo.MongoClient, **kwargs) -> None:
+        super().__init__(url, **kwargs)
+        self._client_factory = client_factory
+
+    @property
+    def client(self):
+        with self._writersLock:
+            client = self._clients.get(self.url)
+            if client is None:
+                log.debug(f"Connecting to {self.url}")
+                client = self._client_factory(self.url)
+                self._clients[self.url] = client
+            return client
+
+    def add(self, database, collection, document):
+        """
+        Buffer a document for writing
+        """
+        super().add((database, collection, document))
+
+    def _write(self, rows) -> tuple:
+        # group the documents by collection, keeping them in order
+        collections = {}
+        for database, collection, document in rows:
+            collections.setdefault((database, collection), []).append(document)
+        written = 0
+        retry = []
+        client = self.client
+        for (database, collection), documents in collections.items():
+            if retry:
+                # the server is unavailable, keep the rest for the retry
+                retry.extend((database, collection, document) for document in documents)
+                continue
+            try:
+                client[database][collection].insert_many(documents, ordered=False)
+                written += len(documents)
+            except BulkWriteError as bwe:
+                errors = bwe.details.get("writeErrors", [])
+                written += bwe.details.get("nInserted", 0)
+                with self._condition:
+                    self.dropped += len(errors)
+                log.error(f"Mongo rejected {len(errors)} of {len(documents)} documents for {collection}: {errors[:1]}")
+            except pymongo.errors.PyMongoError as e:
+                log.error(f"Mongo error {e}")
+                retry.extend((database, collection, document) for document in documents)
+        return written, retry
@@ -3,6 +3,8 @@ from time import sleep
 
 import paho.mqtt.client as mqtt_client
 
+from .mqttpublisher import PUBLISH_WINDOW, MqttPublisher
+
 # Set-up logger
 log = logging.getLogger("mqttbroker")
 
@@ -31,6 +33,14 @@ class MqttBroker:
         self.port = config.get("port", 1883)
         self.username = config.get("user")
         self.password = config.get("pass")
+        # QoS for published messages, and the number of messages that can be in flight at once
+        self.qos = config.get("qos", 0)
+        self.window = config.get("window", PUBLISH_WINDOW)
+        self.publisher = None
+        # number of successful connections, so users of the broker can tell it has reconnected
+        self.connects = 0
+        # topic: callback, for topics subscribed to with their own callback
+        self._topicCallbacks = {}
         self._isConnected = False
         if self.name is None:
             self.enabled = False
@@ -58,6 +68,10 @@ class MqttBroker:
         log.debug(f"MqttBroker connection returned result: {rc} {connection_result[rc]}")
         if rc == 0:
             self._isConnected = True
+            self.connects += 1
+            # renew the subscriptions, a new session starts without them
+            for topic in self._topicCallbacks:
+                self.mqttc.subscribe(topic, qos=0)
             return
         self._isConnected = False
 
@@ -74,6 +88,8 @@ class MqttBroker:
             return
         self.mqttc.on_connect = self.on_connect
         self.mqttc.on_disconnect = self.on_disconnect
+        if self.publisher is None:
+            self.publisher = MqttPublisher(self.mqttc, window=self.window)
         # if name is screen just return without connecting
         if self.name == "screen":
             # allows checking of message formats
@@ -100,6 +116,7 @@ class MqttBroker:
 
     def stop(self):
         log.debug("Stopping mqttbroker connection")
+        self.flush()
         if self.name:
             self.mqttc.loop_stop()
             if self._isConnected:
@@ -132,15 +149,20 @@ class MqttBroker:
         else:
             log.warn(f"Did not subscribe to topic {topic} as not connected to broker")
 
-    def publishMultiple(self, data):
-        for msg in data:
-            self.publish(msg["topic"], msg["payload"])
-
-    def publish(self, topic, payload):
-        log.debug(f"Publishing '{payload}' to '{topic}'")
-        if self.name == "screen":
-            print(f"mqtt debug output only as broker name is 'screen' - topic: '{topic}', payload: '{payload}'")
+    def subscribeCallback(self, topic, callback):
+        """
+        Subscribe to topic with its own callback (on_message is left for the other topics)
+        - the subscription is made each time the broker connects
+        """
+        if not self.enabled or self.name == "screen":
             return
+        self._topicCallbacks[topic] = callback
+        self.mqttc.message_callback_add(topic, callback)
+        if self._isConnected:
+            log.debug(f"Subscribing to topic {topic}")
+            self.mqttc.subscribe(topic, qos=0)
+
+    def checkConnected(self) -> bool:
         # check if connected, connect if not
         if not self._isConnected:
             log.debug("Not connected, connecting")
@@ -148,12 +170,45 @@ class MqttBroker:
             sleep(1)
             if not self._isConnected:
                 log.warn("mqtt broker did not connect")
-                return
-        try:
-            infot = self.mqttc.publish(topic, payload)
-            infot.wait_for_publish()
-        except Exception as e:
-            log.warning(str(e))
+                return False
+        return True
+
+    def publishMultiple(self, data, retain=False):
+        """
+        Publish a list of messages (dicts of topic and payload) as one pipelined batch
+        - returns the number of messages that were not published
+        """
+        if self.name == "screen":
+            for msg in data:
+                self.publish(msg["topic"], msg["payload"])
+            return 0
+        log.debug(f"Publishing {len(data)} messages")
+        if not self.checkConnected():
+            return len(data)
+        dropped = self.publisher.publish_batch(data, qos=self.qos, retain=retain)
+        if dropped:
+            log.warning(f"{dropped} of {len(data)} mqtt messages were not published")
+        return dropped
+
+    def publish(self, topic, payload, retain=False):
+        log.debug(f"Publishing '{payload}' to '{topic}'")
+        if self.name == "screen":
+            print(f"mqtt debug output only as broker name is 'screen' - topic: '{topic}', payload: '{payload}'")
+            return
+        if not self.checkConnected():
+            return
+        if self.publisher.publish_batch([{"topic": topic, "payload": payload}], qos=self.qos, retain=retain, wait=True):
+            log.warning(f"mqtt message to {topic} was not published")
+
+    def flush(self, timeout=None):
+        """
+        Wait for the messages in flight to be published
+        """
+        if self.publisher is None:
+            return
+        if not self.publisher.flush(timeout):
+            log.warning("mqtt messages still in flight after flush")
+        log.debug(f"mqtt publish metrics: {self.publisher.metrics()}")
 
 
 
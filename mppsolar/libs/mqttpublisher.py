@@ -0,0 +1,160 @@
+import logging
+import threading
+import time
+
+import paho.mqtt.client as mqtt_client
+
+log = logging.getLogger("mqttpublisher")
+
+# default number of messages published but not yet acknowledged (QoS 1/2) or written (QoS 0)
+PUBLISH_WINDOW = 20
+# default seconds to wait for the in flight window or a batch to complete
+PUBLISH_TIMEOUT = 10
+
+
+class MqttPublisher:
+    """
+    MqttPublisher - pipelined publishing of batches of messages on a paho client
+    - the messages of a batch are all queued on the paho network loop, rather than waiting
+      for each message in turn, so a batch costs one round trip not one per message
+    - at most window messages are in flight, publishing waits (up to timeout) for space
+    - publish_batch waits once for the whole batch (by default only for QoS 1/2)
+    - messages that could not be queued or did not complete within the timeout are dropped
+    - metrics() reports the messages published, dropped and in flight, and the latency (publish to complete)
+    """
+
+    def __init__(self, client, window=PUBLISH_WINDOW, timeout=PUBLISH_TIMEOUT, clock=time.monotonic) -> None:
+        if window < 1:
+            raise ValueError(f"mqtt publish window must be at least 1, got {window}")
+        self.client = client
+        self.window = window
+        self.timeout = timeout
+        self._clock = clock
+        self._condition = threading.Condition()
+        # mid: time published, for messages in flight
+        self._inflight = {}
+        # mid: time completed, for messages completed before publish returned their mid
+        self._completed = {}
+        # mid: time expired, for messages dropped from _inflight whose completion may still arrive
+        self._expired = {}
+        # metrics
+        self.published = 0
+        self.dropped = 0
+        self.latency_last = 0.0
+        self.latency_max = 0.0
+        self.latency_total = 0.0
+        client.on_publish = self.on_publish
+        # let paho have the whole window in flight for QoS 1/2
+        client.max_inflight_messages_set(window)
+
+    def __str__(self):
+        return f"MqttPublisher: window {self.window}, {len(self._inflight)} in flight"
+
+    def _record(self, latency):
+        self.published += 1
+        self.latency_last = latency
+        self.latency_max = max(self.latency_max, latency)
+        self.latency_total += latency
+
+    def _prune(self, entries, now):
+        # paho reuses mids once its counter wraps, so old entries must not be matched to a new message
+        for mid in [mid for mid, when in entries.items() if now - when >= self.timeout]:
+            del entries[mid]
+
+    def _expire(self, now):
+        # messages that never complete (eg lost with the connection) would hold the window forever
+        expired = [mid for mid, sent in self._inflight.items() if now - sent >= self.timeout]
+        self._prune(self._expired, now)
+        for mid in expired:
+            del self._inflight[mid]
+            self._expired[mid] = now
+        if expired:
+            self.dropped += len(expired)
+            log.warning(f"Dropped {len(expired)} mqtt messages not published within {self.timeout}s")
+
+    def on_publish(self, client, userdata, mid):
+        now = self._clock()
+        with self._condition:
+            sent = self._inflight.pop(mid, None)
+            if sent is None:
+                if self._expired.pop(mid, None) is not None:
+                    # already counted as dropped
+                    log.debug(f"mqtt message {mid} completed after it was dropped")
+                    return
+                # the network loop was quicker than publish_batch
+                self._prune(self._completed, now)
+                self._completed[mid] = now
+                return
+            self._record(now - sent)
+            self._condition.notify_all()
+
+    def _publish(self, msg, qos, retain):
+        # returns (queued, mid), mid is None if the message has already completed
+        with self._condition:
+            if not self._condition.wait_for(lambda: len(self._inflight) < self.window, self.timeout):
+                self._expire(self._clock())
+                if len(self._inflight) >= self.window:
+                    self.dropped += 1
+                    log.warning(f"mqtt publish window full, dropped message to {msg['topic']}")
+                    return False, None
+        sent = self._clock()
+        try:
+            # not under the condition, paho holds its own lock when calling on_publish
+            info = self.client.publish(msg["topic"], msg["payload"], qos=msg.get("qos", qos), retain=msg.get("retain", retain))
+        except Exception as e:
+            info = None
+            log.warning(f"mqtt publish to {msg['topic']} failed: {e}")
+        with self._condition:
+            if info is None or info.rc != mqtt_client.MQTT_ERR_SUCCESS:
+                self.dropped += 1
+                log.debug(f"mqtt message to {msg['topic']} not queued: {None if info is None else mqtt_client.error_string(info.rc)}")
+                return False, None
+            # the mid now belongs to this message
+            self._expired.pop(info.mid, None)
+            completed = self._completed.pop(info.mid, None)
+            if completed is not None:
+                self._record(completed - sent)
+                return True, None
+            self._inflight[info.mid] = sent
+            return True, info.mid
+
+    def publish_batch(self, msgs, qos=0, retain=False, wait=None) -> int:
+        """
+        Publish msgs (dicts of topic, payload and optionally qos and retain) as one batch
+        - wait for the batch to complete, by default only if qos is 1 or 2
+        - returns the number of messages that could not be queued (or, if waited for, did not complete)
+        """
+        dropped = 0
+        mids = set()
+        for msg in msgs:
+            queued, mid = self._publish(msg, qos, retain)
+            if not queued:
+                dropped += 1
+            elif mid is not None:
+                mids.add(mid)
+        if wait is None:
+            wait = qos > 0
+        if wait and mids:
+            with self._condition:
+                if not self._condition.wait_for(lambda: mids.isdisjoint(self._inflight), self.timeout):
+                    dropped += len(mids.intersection(self._inflight))
+                    self._expire(self._clock())
+        return dropped
+
+    def flush(self, timeout=None) -> bool:
+        """
+        Wait until no messages are in flight, returns False if the timeout passed first
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._inflight, self.timeout if timeout is None else timeout)
+
+    def metrics(self) -> dict:
+        with self._condition:
+            return {
+                "in_flight": len(self._inflight),
+                "published": self.published,
+                "dropped": self.dropped,
+                "latency_last": self.latency_last,
+                "latency_max": self.latency_max,
+                "latency_avg": self.latency_total / self.published if self.published else 0.0,
+            }
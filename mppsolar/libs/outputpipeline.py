@@ -0,0 +1,92 @@
+import logging
+import re
+from functools import partial
+
+from ..outputs import get_output
+from ..result import ResultView
+
+log = logging.getLogger("outputpipeline")
+
+
+class OutputRoute:
+    """
+    OutputRoute - the outputs for a command, with the output settings resolved when the config is loaded
+    """
+
+    __slots__ = ("outputs", "kwargs")
+
+    def __init__(self, outputs, kwargs) -> None:
+        self.outputs = outputs
+        self.kwargs = kwargs
+
+    def __repr__(self):
+        return f"OutputRoute({[type(op).__name__ for op in self.outputs]}, tag: {self.kwargs.get('tag')})"
+
+
+class OutputPipeline:
+    """
+    OutputPipeline - the output stage, built once when the config is loaded
+    - each output module is imported and instantiated once and shared by all the commands using it
+    - filters are compiled once per command (the outputs accept an already compiled filter)
+    - settings common to all commands (eg the mqtt broker) are supplied once
+    - send() is all the polling loop does with the results, inline or via the output queue
+    """
+
+    def __init__(self, output_queue=None, **common) -> None:
+        self.output_queue = output_queue
+        self.common = common
+        self._outputs = {}
+
+    def __str__(self):
+        return f"OutputPipeline: outputs: {list(self._outputs)}, queue: {self.output_queue}"
+
+    def get_outputs(self, output_list) -> list:
+        """
+        The output instances for a comma separated list of output names
+        """
+        ops = []
+        for name in output_list.split(","):
+            if name not in self._outputs:
+                self._outputs[name] = get_output(name)
+            if self._outputs[name] is not None:
+                ops.append(self._outputs[name])
+        return ops
+
+    def add(self, output_list, filter=None, excl_filter=None, **settings) -> OutputRoute:
+        """
+        Build the route for a command sending its results to output_list
+        - settings are the per command output kwargs, eg tag, name and postgres_url
+        """
+        kwargs = dict(self.common)
+        kwargs.update(settings)
+        kwargs["filter"] = re.compile(filter) if filter is not None else None
+        kwargs["excl_filter"] = re.compile(excl_filter) if excl_filter is not None else None
+        route = OutputRoute(self.get_outputs(output_list), kwargs)
+        log.debug(f"Added {route}")
+        return route
+
+    def send(self, route, results, key=None):
+        """
+        Send the results to the outputs of route, key identifies the command for the output queue
+        - every output gets the same read only view of the results, nothing is copied
+        """
+        results = ResultView.of(results)
+        for op in route.outputs:
+            if self.output_queue is None:
+                op.output(data=results, **route.kwargs)
+            else:
+                self.output_queue.put(type(op).__name__, key, partial(op.output, data=results, **route.kwargs))
+
+    def close(self):
+        """
+        Send any queued results, close the outputs and wait for the mqtt messages in flight
+        """
+        if self.output_queue is not None:
+            self.output_queue.close()
+            log.debug(f"Output queue metrics: {self.output_queue.metrics()}")
+        for op in self._outputs.values():
+            if op is not None:
+                op.close()
+        mqtt_broker = self.common.get("mqtt_broker")
+        if mqtt_broker is not None:
+            mqtt_broker.flush()
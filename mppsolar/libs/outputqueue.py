@@ -0,0 +1,203 @@
+import logging
+import threading
+import time
+from collections import deque
+
+log = logging.getLogger("outputqueue")
+
+# overflow policies, what to do with a new result when a lane is full
+DROP_OLDEST = "drop-oldest"
+BLOCK = "block"
+COALESCE = "coalesce"
+POLICIES = (DROP_OLDEST, BLOCK, COALESCE)
+
+# default number of results queued per output
+QUEUE_SIZE = 100
+
+
+class OutputJob:
+    """
+    OutputJob - a call to an output, queued with the key it can be coalesced by
+    """
+
+    __slots__ = ("key", "func", "queued")
+
+    def __init__(self, key, func, queued) -> None:
+        self.key = key
+        self.func = func
+        self.queued = queued
+
+
+class OutputLane(threading.Thread):
+    """
+    OutputLane - a bounded queue of jobs for one output and the thread that runs them in order
+    - a slow output (eg a database insert) only backs up its own lane
+    """
+
+    def __init__(self, name, maxsize, policy, clock=time.monotonic) -> None:
+        super().__init__(name=f"output {name}", daemon=True)
+        self.lane = name
+        self.maxsize = maxsize
+        self.policy = policy
+        self._clock = clock
+        self._jobs = deque()
+        self._condition = threading.Condition()
+        self._running = False
+        self._stopped = False
+        # metrics
+        self.max_depth = 0
+        self.queued = 0
+        self.done = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.latency_last = 0.0
+        self.latency_max = 0.0
+        self.latency_total = 0.0
+        self.run_total = 0.0
+
+    def __str__(self):
+        return f"OutputLane: {self.lane}, {len(self._jobs)}/{self.maxsize} queued, policy: {self.policy}"
+
+    def put(self, key, func):
+        job = OutputJob(key, func, self._clock())
+        with self._condition:
+            self.queued += 1
+            if self.policy == COALESCE and key is not None:
+                for index, queued_job in enumerate(self._jobs):
+                    if queued_job.key == key:
+                        # replace the older result in place, keeping its position (and age)
+                        job.queued = queued_job.queued
+                        self._jobs[index] = job
+                        self.coalesced += 1
+                        return
+            if self.policy == BLOCK:
+                while len(self._jobs) >= self.maxsize and not self._stopped:
+                    self._condition.wait()
+            elif len(self._jobs) >= self.maxsize:
+                dropped = self._jobs.popleft()
+                self.dropped += 1
+                log.warning(f"Output {self.lane} queue full, dropped the result for {dropped.key}")
+            self._jobs.append(job)
+            self.max_depth = max(self.max_depth, len(self._jobs))
+            self._condition.notify_all()
+
+    def run(self):
+        while True:
+            with self._condition:
+                while not self._jobs and not self._stopped:
+                    self._condition.wait()
+                if not self._jobs:
+                    return
+                job = self._jobs.popleft()
+                self._running = True
+                # wake a blocked put
+                self._condition.notify_all()
+            started = self._clock()
+            try:
+                job.func()
+            except Exception as e:
+                self.errors += 1
+                log.error(f"Output {self.lane} failed for {job.key}: {e}")
+            finished = self._clock()
+            with self._condition:
+                self._running = False
+                self.done += 1
+                self.latency_last = finished - job.queued
+                self.latency_max = max(self.latency_max, self.latency_last)
+                self.latency_total += self.latency_last
+                self.run_total += finished - started
+                self._condition.notify_all()
+
+    def flush(self, timeout=None) -> bool:
+        """
+        Wait until the queued jobs have run, returns False if the timeout passed first
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._jobs and not self._running, timeout)
+
+    def stop(self):
+        """
+        Stop the lane once the queued jobs have run
+        """
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+
+    def metrics(self) -> dict:
+        with self._condition:
+            return {
+                "depth": len(self._jobs),
+                "max_depth": self.max_depth,
+                "queued": self.queued,
+                "done": self.done,
+                "dropped": self.dropped,
+                "coalesced": self.coalesced,
+                "errors": self.errors,
+                "latency_last": self.latency_last,
+                "latency_max": self.latency_max,
+                "latency_avg": self.latency_total / self.done if self.done else 0.0,
+                "run_avg": self.run_total / self.done if self.done else 0.0,
+            }
+
+
+class OutputQueue:
+    """
+    OutputQueue - runs outputs in background threads, so slow outputs do not delay the device polling
+    - each output (lane) has its own bounded queue and thread, results for an output are sent in order
+    - when a lane is full the policy decides what happens to a new result:
+      drop-oldest discards the oldest queued result, block waits for space,
+      coalesce replaces a queued result with the same key (eg the same command) or else drops the oldest
+    - metrics() reports the queue depth, drops and latency (queued to sent) of each output
+    """
+
+    def __init__(self, maxsize=QUEUE_SIZE, policy=DROP_OLDEST, clock=time.monotonic) -> None:
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown output queue policy '{policy}', expected one of {', '.join(POLICIES)}")
+        if maxsize < 1:
+            raise ValueError(f"output queue size must be at least 1, got {maxsize}")
+        self.maxsize = maxsize
+        self.policy = policy
+        self._clock = clock
+        self._lanes = {}
+        self._lock = threading.Lock()
+
+    def __str__(self):
+        return f"OutputQueue: size {self.maxsize}, policy: {self.policy}, outputs: {list(self._lanes)}"
+
+    def _lane(self, name) -> OutputLane:
+        with self._lock:
+            lane = self._lanes.get(name)
+            if lane is None:
+                lane = OutputLane(name, self.maxsize, self.policy, self._clock)
+                lane.start()
+                self._lanes[name] = lane
+            return lane
+
+    def put(self, lane, key, func):
+        """
+        Queue func() to run on lane (the output name), key identifies the result for coalescing
+        """
+        self._lane(lane).put(key, func)
+
+    def flush(self, timeout=None) -> bool:
+        """
+        Wait until all the queued outputs have run, returns False if the timeout passed first
+        """
+        deadline = None if timeout is None else self._clock() + timeout
+        for lane in list(self._lanes.values()):
+            if not lane.flush(None if deadline is None else max(deadline - self._clock(), 0)):
+                return False
+        return True
+
+    def close(self, timeout=None):
+        """
+        Run the queued outputs and stop the lanes
+        """
+        if not self.flush(timeout):
+            log.warning(f"Output queue not empty after {timeout}s: {self.metrics()}")
+        for lane in self._lanes.values():
+            lane.stop()
+
+    def metrics(self) -> dict:
+        return {name: lane.metrics() for name, lane in self._lanes.items()}
@@ -0,0 +1,179 @@
+import logging
+import queue
+import threading
+import time
+
+from ..asyncloop import group_by_port, group_by_section
+from .scheduler import FixedRateScheduler
+
+log = logging.getLogger("portworkers")
+
+# default seconds a command can take before it is reported as failed
+COMMAND_DEADLINE = 60
+# maximum seconds between watchdog notifications while waiting for results
+WATCHDOG_INTERVAL = 1
+
+
+class PortWorker(threading.Thread):
+    """
+    PortWorker - runs the sections (commands grouped by device name) of a single port in its own loop
+    - the commands of a section are run one after another
+    - with schedules each section is run on its own fixed rate grid (see FixedRateScheduler),
+      without them each section is run once
+    - the results are put on the results queue as (worker, item, results), (worker, None, None) when a run once is done
+    - once a command has missed its deadline (see PortWorkerPool) its late result is discarded and
+      the rest of that section's commands are skipped for the run
+    """
+
+    def __init__(self, port, sections, results, deadlines, schedules=None) -> None:
+        super().__init__(name=f"port {port}", daemon=True)
+        self.port = port
+        # name: [item, ...]
+        self.sections = sections
+        # name: (interval, offset), None to run each section once
+        self.schedules = schedules
+        self._results = results
+        self._deadlines = deadlines
+        self._stopping = threading.Event()
+        # the running command, held under lock as the pool checks its deadline
+        self.lock = threading.Lock()
+        self.current = None
+        self.started = None
+        self.deadline = None
+        self.cancelled = False
+
+    def __repr__(self):
+        return f"PortWorker({self.port}, sections: {list(self.sections)})"
+
+    def time_left(self, now):
+        """
+        Seconds until the running command misses its deadline, None if no command is running (or it has missed it)
+        """
+        if self.current is None or self.cancelled:
+            return None
+        return self.started + self.deadline - now
+
+    def run(self):
+        if self.schedules is None:
+            for items in self.sections.values():
+                self._run_section(items)
+            self._results.put((self, None, None))
+            return
+        scheduler = FixedRateScheduler()
+        for name in self.sections:
+            interval, offset = self.schedules[name]
+            scheduler.add(name, interval, offset)
+        log.info(f"Port {self.port} running {scheduler}")
+        while not self._stopping.is_set():
+            due = scheduler.due()
+            if not due:
+                self._stopping.wait(scheduler.delay())
+                continue
+            for name in due:
+                self._run_section(self.sections[name])
+                missed = scheduler.complete(name)
+                if missed:
+                    print(f"Section {name} overran, skipped {missed} run(s)")
+
+    def _run_section(self, items):
+        for item in items:
+            device, command = item[0], item[1]
+            with self.lock:
+                self.current = item
+                self.started = time.monotonic()
+                self.deadline = self._deadlines(item)
+                self.cancelled = False
+            try:
+                # the outputs only read the results, so they are decoded as a Reading
+                results = device.run_command(command=command, as_reading=True)
+            except Exception as e:
+                log.error(f"Error running command {command} on {device}: {e}")
+                results = {"ERROR": [f"Error running command {command}: {e}", ""]}
+            with self.lock:
+                self.current = None
+                if self.cancelled:
+                    log.warning(f"Discarding late results of {command} on port {self.port}, took {time.monotonic() - self.started:.1f}s")
+                    return
+            self._results.put((self, item, results))
+
+    def stop(self):
+        self._stopping.set()
+
+
+class PortWorkerPool:
+    """
+    PortWorkerPool - runs the configured commands with a worker thread per port
+    - commands are (device, command, ...) tuples, grouped by the port of the device and then the device name (section)
+    - each port runs in its own loop and waits for its own schedule, so a slow or hung port
+      does not delay the others (there is no cycle shared by the ports)
+    - schedules is {section name: (interval, offset)}, sections not in it use pause, pause None runs every section once
+    - a command that misses its deadline is reported as an ERROR and the rest of its section's commands are skipped
+    - run() passes the results to handle_results(item, results) in the thread calling it, and checks the deadlines
+    """
+
+    def __init__(self, commands, deadline=COMMAND_DEADLINE, deadlines=None, schedules=None, pause=None) -> None:
+        self.deadline = deadline
+        # per device name overrides of the deadline
+        self.deadlines = deadlines if deadlines is not None else {}
+        self.once = pause is None
+        self._results = queue.Queue()
+        self._stopping = threading.Event()
+        self.workers = {}
+        for port, items in group_by_port(commands).items():
+            sections = group_by_section(items)
+            port_schedules = None
+            if not self.once:
+                port_schedules = {name: (schedules or {}).get(name, (pause, 0)) for name in sections}
+            self.workers[port] = PortWorker(port, sections, self._results, self._deadline, port_schedules)
+
+    def __str__(self):
+        return f"PortWorkerPool: {len(self.workers)} ports, deadline {self.deadline}s, {'once' if self.once else 'scheduled'}"
+
+    def _deadline(self, item):
+        return self.deadlines.get(item[0]._name, self.deadline)
+
+    def run(self, handle_results, notify=None):
+        """
+        Start the workers and handle their results, until they have all run once (if not scheduled) or stop() is called
+        - notify (if supplied) is called at least every WATCHDOG_INTERVAL seconds, eg for the systemd watchdog
+        """
+        for worker in self.workers.values():
+            worker.start()
+        log.info(f"Started {len(self.workers)} port workers")
+        pending = set(self.workers.values()) if self.once else None
+        while not self._stopping.is_set() and (pending is None or pending):
+            now = time.monotonic()
+            waits = [wait for wait in (worker.time_left(now) for worker in self.workers.values()) if wait is not None]
+            wait = min(max(min(waits, default=WATCHDOG_INTERVAL), 0), WATCHDOG_INTERVAL)
+            try:
+                worker, item, results = self._results.get(timeout=wait)
+                if item is None:
+                    pending.discard(worker)
+                else:
+                    handle_results(item, results)
+            except queue.Empty:
+                pass
+            self._check_deadlines(handle_results, pending)
+            if notify is not None:
+                notify()
+
+    def _check_deadlines(self, handle_results, pending):
+        now = time.monotonic()
+        for worker in self.workers.values():
+            with worker.lock:
+                time_left = worker.time_left(now)
+                if time_left is None or time_left > 0:
+                    continue
+                worker.cancelled = True
+                item = worker.current
+                deadline = worker.deadline
+            log.warning(f"Command {item[1]} on {item[0]._name} missed its {deadline}s deadline")
+            handle_results(item, {"ERROR": [f"Command {item[1]} did not complete within {deadline}s", ""]})
+            if pending is not None:
+                # a run once does not wait for the hung port
+                pending.discard(worker)
+
+    def stop(self):
+        self._stopping.set()
+        for worker in self.workers.values():
+            worker.stop()
@@ -0,0 +1,64 @@
+import logging
+from functools import partial
+
+from psycopg2.extras import Json, execute_values
+from psycopg2.pool import ThreadedConnectionPool
+
+from .bufferedwriter import BufferedWriter
+
+log = logging.getLogger("postgreswriter")
+
+# default maximum number of pooled connections
+POOL_SIZE = 2
+
+INSERT_SQL = "insert into mppsolar (command, data, updated) values %s"
+
+
+class PostgresWriter(BufferedWriter):
+    """
+    PostgresWriter - a long lived writer of rows to the mppsolar table
+    - connections come from a pool that is kept open, rather than connecting for each result
+    - the buffered rows are written with a single multi row insert
+    - after a failed write the pool is discarded, so the retry reconnects
+    """
+
+    name = "Postgres"
+
+    def __init__(self, url, pool_size=POOL_SIZE, pool_factory=None, **kwargs) -> None:
+        super().__init__(url, **kwargs)
+        self._pool_factory = pool_factory if pool_factory is not None else partial(ThreadedConnectionPool, 1, pool_size, url)
+        self._pool = None
+
+    def add(self, command, data, updated):
+        """
+        Buffer a row for writing
+        """
+        super().add((command, Json(data), updated))
+
+    def _write(self, rows) -> tuple:
+        if self._pool is None:
+            log.debug(f"Connecting to {self.url}")
+            self._pool = self._pool_factory()
+        conn = self._pool.getconn()
+        try:
+            with conn.cursor() as cursor:
+                execute_values(cursor, INSERT_SQL, rows, page_size=self.batch_size)
+            conn.commit()
+        except Exception:
+            self._pool.putconn(conn, close=True)
+            raise
+        self._pool.putconn(conn)
+        return len(rows), []
+
+    def _reset(self):
+        # the connections may be broken, start again with new connections
+        self._close()
+
+    def _close(self):
+        if self._pool is None:
+            return
+        try:
+            self._pool.closeall()
+        except Exception as e:
+            log.debug(f"Error closing postgres connections: {e}")
+        self._pool = None
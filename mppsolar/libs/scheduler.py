@@ -0,0 +1,101 @@
+import logging
+import time
+
+log = logging.getLogger("scheduler")
+
+
+class ScheduledSection:
+    """
+    ScheduledSection - a section run every interval seconds on a fixed grid
+    """
+
+    __slots__ = ("name", "interval", "offset", "next_run", "runs", "overruns")
+
+    def __init__(self, name, interval, offset, next_run) -> None:
+        self.name = name
+        self.interval = interval
+        self.offset = offset
+        self.next_run = next_run
+        self.runs = 0
+        self.overruns = 0
+
+    def __repr__(self):
+        return f"ScheduledSection({self.name}, every {self.interval}s, offset {self.offset}s, {self.runs} runs, {self.overruns} overruns)"
+
+
+class FixedRateScheduler:
+    """
+    FixedRateScheduler - runs sections on a fixed rate grid using the monotonic clock
+    - a section is due at offset + n * interval, so the time the commands take does not add to the period
+    - the grid is aligned to the wall clock, eg an interval of 60 runs on the minute (plus offset),
+      so samples from different runs and devices line up
+    - a section that is still running when its next slot(s) pass has overrun, the missed slots
+      are skipped (not run late) and counted in overruns
+    """
+
+    def __init__(self, clock=time.monotonic, wall_clock=time.time, sleep=time.sleep) -> None:
+        self._clock = clock
+        self._wall_clock = wall_clock
+        self._sleep = sleep
+        self.sections = {}
+
+    def __str__(self):
+        return f"FixedRateScheduler: {list(self.sections.values())}"
+
+    def add(self, name, interval, offset=0.0) -> ScheduledSection:
+        """
+        Add a section to run every interval seconds, offset seconds after the grid point
+        """
+        if interval <= 0:
+            raise ValueError(f"interval for {name} must be positive, got {interval}")
+        now = self._clock()
+        # monotonic time of the last wall clock multiple of interval
+        grid_start = now - (self._wall_clock() % interval)
+        next_run = grid_start + (offset % interval)
+        if next_run < now:
+            next_run += interval
+        section = ScheduledSection(name, interval, offset, next_run)
+        self.sections[name] = section
+        log.debug(f"Added {section}, first run in {next_run - now:.2f}s")
+        return section
+
+    def due(self) -> list:
+        """
+        The names of the sections that are due, in the order they were added
+        """
+        now = self._clock()
+        return [section.name for section in self.sections.values() if section.next_run <= now]
+
+    def delay(self) -> float:
+        """
+        Seconds until the next section is due (0 if one is due now)
+        """
+        next_run = min(section.next_run for section in self.sections.values())
+        return max(next_run - self._clock(), 0)
+
+    def wait(self) -> list:
+        """
+        Sleep until at least one section is due, returns the names of the due sections
+        """
+        while True:
+            due = self.due()
+            if due:
+                return due
+            self._sleep(self.delay())
+
+    def complete(self, name) -> int:
+        """
+        Record that section name has run, moving it to its next grid slot
+        - returns the number of slots missed because the run overran
+        """
+        section = self.sections[name]
+        section.runs += 1
+        section.next_run += section.interval
+        now = self._clock()
+        missed = 0
+        if section.next_run <= now:
+            missed = int((now - section.next_run) // section.interval) + 1
+            section.next_run += missed * section.interval
+            section.overruns += missed
+            log.warning(f"Section {name} overran its {section.interval}s interval, skipped {missed} run(s) ({section.overruns} in total)")
+        return missed
@@ -1,12 +1,25 @@
 import logging
 import importlib
+import json as js
 import pkgutil
 import re
+from datetime import datetime, timedelta, timezone
 
-from ..helpers import key_wanted, get_kwargs
+from ..helpers import get_key_map, get_kwargs
+from ..result import ResultView
 
 log = logging.getLogger("helpers")
 
+# the metadata included in the json style outputs (the raw_response is left out)
+JSON_METADATA = ("_command", "_command_description")
+# json separators without the spaces, for the compact outputs
+COMPACT_SEPARATORS = (",", ":")
+# influx line protocol escapes for the measurement, and for the tag keys, tag values and field keys
+LINE_MEASUREMENT_ESCAPES = str.maketrans({",": "\\,", " ": "\\ "})
+LINE_KEY_ESCAPES = str.maketrans({",": "\\,", "=": "\\=", " ": "\\ "})
+LINE_STRING_ESCAPES = str.maketrans({"\\": "\\\\", '"': '\\"', "\n": " "})
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
 
 def list_outputs():
     # print("outputs list outputs")
@@ -98,51 +111,148 @@ def output_results(results, command, mqtt_broker, fullconfig={}):
         )
 
 
-def to_json(data, keep_case, excl_filter, filter):
+def _metadata_to_json(data, keep_case, excl_filter, filter, metadata):
+    # the requested metadata (eg _command) goes first, as it did when it was part of the results dict
     output = {}
-    # Loop through responses
-    for key in data:
+    for key, output_key in get_key_map([key for key in metadata if key in data.metadata], True, keep_case, filter, excl_filter):
+        output[output_key] = data.metadata[key]
+    return output
+
+
+def to_json(data, keep_case, excl_filter, filter, metadata=()):
+    data = ResultView.of(data)
+    output = _metadata_to_json(data, keep_case, excl_filter, filter, metadata)
+    # Loop through the wanted responses
+    for key, output_key in get_key_map(data, True, keep_case, filter, excl_filter):
         value = data[key]
         log.debug(f"value: {value}")
         if isinstance(value, list):
             value = data[key][0]
         # unit = data[key][1]
-        # remove spaces
-        key = key.replace(" ", "_")
-        if not keep_case:
-            # make lowercase
-            key = key.lower()
-        if key_wanted(key, filter, excl_filter):
-            output[key] = value
+        output[output_key] = value
     return output
 
 
-def to_json_units(data, keep_case, excl_filter, filter):
-    output = {}
-    # Loop through responses
-    for key in data:
+def to_json_units(data, keep_case, excl_filter, filter, metadata=()):
+    data = ResultView.of(data)
+    output = _metadata_to_json(data, keep_case, excl_filter, filter, metadata)
+    # Loop through the wanted responses
+    for key, output_key in get_key_map(data, True, keep_case, filter, excl_filter):
         value = data[key]
         unit = None
         log.debug(f"value: {value}")
         if isinstance(value, list):
             value = data[key][0]
             unit = data[key][1]
-        # remove spaces
-        key = key.replace(" ", "_")
-        if not keep_case:
-            # make lowercase
-            key = key.lower()
-        if key_wanted(key, filter, excl_filter):
-            if unit is None:
-                output[key] = value
-            else:
-                # { "ac_output_voltage": { "value": 220, "unit": "V" }, ... }
-                output[key] = {"value": value, "unit": unit}
+        if unit is None:
+            output[output_key] = value
+        else:
+            # { "ac_output_voltage": { "value": 220, "unit": "V" }, ... }
+            output[output_key] = {"value": value, "unit": unit}
     return output
 
 
+def to_compact_msgs(topic, command, description, display_data, schemas):
+    """
+    The mqtt messages for the results of a command as a single compact json message
+    - display_data is the formatted and filtered fields, {output_key: [value, unit(, extra info)]}
+    - the message is just the values, the units (and any extra info) are in a retained schema message,
+      published to {topic}/schema only when first seen or changed
+    - schemas holds the last schema published to each topic, the schema is recorded as it is built,
+      so the caller must remove it if the message is not published
+    """
+    values = {}
+    fields = {}
+    for key, value in display_data.items():
+        values[key] = value[0]
+        field = {}
+        if len(value) > 1 and value[1]:
+            field["unit"] = value[1]
+        if len(value) > 2 and value[2]:
+            field["extra"] = value[2]
+        fields[key] = field
+    msgs = []
+    schema = js.dumps({"command": command, "description": description, "fields": fields}, separators=COMPACT_SEPARATORS)
+    if schemas.get(topic) != schema:
+        log.debug(f"publishing schema for {topic}")
+        schemas[topic] = schema
+        msgs.append({"topic": f"{topic}/schema", "payload": schema, "retain": True})
+    msgs.append({"topic": topic, "payload": js.dumps(values, separators=COMPACT_SEPARATORS)})
+    return msgs
+
+
+def forget_schemas(msgs, schemas):
+    """
+    Remove the schemas of a batch of to_compact_msgs messages from schemas, eg as the batch was not published
+    """
+    for msg in msgs:
+        if msg.get("retain") and msg["topic"].endswith("/schema"):
+            schemas.pop(msg["topic"][: -len("/schema")], None)
+
+
+class SchemaCache(dict):
+    """
+    SchemaCache - the schema last published to each topic by to_compact_msgs
+    - forgotten when the mqtt broker (re)connects, as a broker without persistence loses the retained schemas
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._broker = None
+        self._connects = 0
+
+    def follow(self, mqtt_broker):
+        """
+        Check the connections of mqtt_broker, forgetting the schemas if it has connected again
+        """
+        if mqtt_broker is None:
+            return
+        if mqtt_broker is not self._broker:
+            self._broker = mqtt_broker
+            self._connects = mqtt_broker.connects
+            return
+        if mqtt_broker.connects != self._connects:
+            log.debug("mqtt broker connected, publishing the schemas again")
+            self._connects = mqtt_broker.connects
+            self.clear()
+
+
+def to_line_protocol(data, measurement, tags, keep_case, excl_filter, filter):
+    """
+    The results of a command as a single influx line protocol line, ie all the fields in one point
+    eg mpp-solar,command=QPIGS,device=inv1 ac_input_voltage=230.1,load_status="Load on" 1700000000000000000
+    - tags is {tag_key: value}, tags with no value are left out
+    - numbers are written as floats (as influx2_mqtt does), so a field has the same type whatever its value
+    - the timestamp is when the results were received, in nanoseconds
+    - returns None if no fields are wanted
+    """
+    data = ResultView.of(data)
+    fields = []
+    for key, output_key in get_key_map(data, True, keep_case, filter, excl_filter):
+        value = data[key]
+        if isinstance(value, list):
+            value = value[0]
+        if value is None:
+            continue
+        if isinstance(value, bool):
+            value = "true" if value else "false"
+        elif isinstance(value, (int, float)):
+            value = repr(float(value))
+        else:
+            value = f'"{str(value).translate(LINE_STRING_ESCAPES)}"'
+        fields.append(f"{output_key.translate(LINE_KEY_ESCAPES)}={value}")
+    if not fields:
+        return None
+    line = measurement.translate(LINE_MEASUREMENT_ESCAPES)
+    for tag_key, tag_value in tags.items():
+        if tag_value:
+            line += f",{tag_key.translate(LINE_KEY_ESCAPES)}={str(tag_value).translate(LINE_KEY_ESCAPES)}"
+    timestamp = (data.acquired - EPOCH) // timedelta(microseconds=1) * 1000
+    return f"{line} {','.join(fields)} {timestamp}"
+
+
 def get_common_params(kwargs):
-    data = get_kwargs(kwargs, "data")
+    data = ResultView.of(get_kwargs(kwargs, "data"))
     tag = get_kwargs(kwargs, "tag")
     keep_case = get_kwargs(kwargs, "keep_case")
     filter_ = get_kwargs(kwargs, "filter")
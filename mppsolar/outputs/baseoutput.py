@@ -7,3 +7,9 @@ log = logging.getLogger("baseoutput")
 class baseoutput:
     def __str__(self):
         return "the base class for the output processors, not used directly"
+
+    def close(self):
+        """
+        Finish any output still in progress (eg buffered rows), called when the outputs are no longer needed
+        """
+        pass
@@ -0,0 +1,44 @@
+import logging
+
+from . import SchemaCache, forget_schemas, get_common_params, to_compact_msgs
+from .mqtt import mqtt
+from ..helpers import get_key_map, get_kwargs
+
+log = logging.getLogger("compact_mqtt")
+
+
+class compact_mqtt(mqtt):
+    def __str__(self):
+        return 'outputs the results of each command to the supplied mqtt broker as one compact json message, with the units in a retained schema message: eg mpp-solar/{name}/{command} {"battery_voltage":51.4}'
+
+    def __init__(self, *args, **kwargs) -> None:
+        log.debug(f"__init__: kwargs {kwargs}")
+        # the schema last published to each topic, so the schema is only sent when it changes (or the broker reconnects)
+        self.schemas = SchemaCache()
+
+    def build_msgs(self, *args, **kwargs):
+        data, tag, keep_case, filter, excl_filter = get_common_params(kwargs)
+        name = get_kwargs(kwargs, "name", "mpp-solar")
+        mqtt_broker = get_kwargs(kwargs, "mqtt_broker")
+        self.schemas.follow(mqtt_broker)
+        if mqtt_broker is not None:
+            results_topic = mqtt_broker.results_topic
+        else:
+            results_topic = get_kwargs(kwargs, "mqtt_topic", default="mpp-solar")
+        command = data.command
+        if command is None:
+            command = tag
+        topic = f"{results_topic}/{name}/{command}"
+
+        # build data to output
+        _data = {}
+        for key, output_key in get_key_map(data, True, keep_case, filter, excl_filter):
+            _data[output_key] = data[key]
+
+        msgs = to_compact_msgs(topic, command, data.command_description, _data, self.schemas)
+        log.debug(f"build_msgs: {msgs}")
+        return msgs
+
+    def not_published(self, msgs):
+        # forget the schemas in the batch, so they are sent again with the next results
+        forget_schemas(msgs, self.schemas)
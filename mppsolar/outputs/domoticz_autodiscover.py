@@ -3,7 +3,8 @@ import re
 
 from .mqtt import mqtt
 from ..helpers import get_kwargs
-from ..helpers import key_wanted
+from ..helpers import get_key_map
+from ..result import ResultView
 
 log = logging.getLogger("domoticz_autodiscover")
 
@@ -31,44 +32,36 @@ class domoticz_autodiscover(mqtt):
         # assumes hass_config has been run
         # or hass updated manually
         msgs = []
-        # Remove command and _command_description
-        data.pop("_command", None)
-        data.pop("_command_description", None)
-        data.pop("raw_response", None)
+        # the command details are kept apart from the fields, which are not changed
+        data = ResultView.of(data)
 
         # Loop through responses
-        for _key in data:
+        for _key, key in get_key_map(data, True, keep_case, filter, excl_filter):
             # value = data[_key][0]
             unit = data[_key][1]
-            # remove spaces
-            key = _key.replace(" ", "_")
-            if not keep_case:
-                # make lowercase
-                key = key.lower()
-            if key_wanted(key, filter, excl_filter):
-                #
-                # CONFIG / AUTODISCOVER
-                #
-                # <discovery_prefix>/<component>/[<node_id>/]<object_id>/config
-                # topic "homeassistant/binary_sensor/garden/config"
-                # msg '{"name": "garden", "device_class": "motion", "state_topic": "homeassistant/binary_sensor/garden/state", "unit_of_measurement": "°C"}'
-                topic = f"homeassistant/sensor/mpp_{tag}_{key}/config"
-                topic = topic.replace(" ", "_")
-                state_topic = f"domoticz/sensor/mpp_{tag}_{key}/state"
-                state_topic = state_topic.replace(" ", "_")
+            #
+            # CONFIG / AUTODISCOVER
+            #
+            # <discovery_prefix>/<component>/[<node_id>/]<object_id>/config
+            # topic "homeassistant/binary_sensor/garden/config"
+            # msg '{"name": "garden", "device_class": "motion", "state_topic": "homeassistant/binary_sensor/garden/state", "unit_of_measurement": "°C"}'
+            topic = f"homeassistant/sensor/mpp_{tag}_{key}/config"
+            topic = topic.replace(" ", "_")
+            state_topic = f"domoticz/sensor/mpp_{tag}_{key}/state"
+            state_topic = state_topic.replace(" ", "_")
 
-                name = f"{tag} {_key}"
-                if unit == "W":
-                    payload = f'{{"name": "{name}", "stat_t": "{state_topic}", "unit_of_meas": "{unit}", "uniq_id": "mpp_{tag}_{key}", "stat_cla": "measurement", "device_class": "power"  }}'
-                else:
-                    payload = f'{{"name": "{name}", "stat_t": "{state_topic}", "unit_of_meas": "{unit}", "uniq_id": "mpp_{tag}_{key}"  }}'
-                # msg = {"topic": topic, "payload": payload, "retain": True}
-                msg = {"topic": topic, "payload": payload}
-                msgs.append(msg)
-                #
-                # VALUE SETTING
-                #
-                # payload = value
-                # msg = {"topic": state_topic, "payload": payload}
-                # msgs.append(msg)
+            name = f"{tag} {_key}"
+            if unit == "W":
+                payload = f'{{"name": "{name}", "stat_t": "{state_topic}", "unit_of_meas": "{unit}", "uniq_id": "mpp_{tag}_{key}", "stat_cla": "measurement", "device_class": "power"  }}'
+            else:
+                payload = f'{{"name": "{name}", "stat_t": "{state_topic}", "unit_of_meas": "{unit}", "uniq_id": "mpp_{tag}_{key}"  }}'
+            # msg = {"topic": topic, "payload": payload, "retain": True}
+            msg = {"topic": topic, "payload": payload}
+            msgs.append(msg)
+            #
+            # VALUE SETTING
+            #
+            # payload = value
+            # msg = {"topic": state_topic, "payload": payload}
+            # msgs.append(msg)
         return msgs
@@ -3,7 +3,8 @@ import re
 
 from .mqtt import mqtt
 from ..helpers import get_kwargs
-from ..helpers import key_wanted
+from ..helpers import get_key_map
+from ..result import ResultView
 
 log = logging.getLogger("hass_mqtt")
 
@@ -31,62 +32,54 @@ class hass_mqtt(mqtt):
         # assumes hass_config has been run
         # or hass updated manually
         msgs = []
-        # Remove command and _command_description
-        data.pop("_command", None)
-        data.pop("_command_description", None)
-        data.pop("raw_response", None)
+        # the command details are kept apart from the fields, which are not changed
+        data = ResultView.of(data)
 
         # Loop through responses
-        for _key in data:
+        for _key, key in get_key_map(data, True, keep_case, filter, excl_filter):
             value = data[_key][0]
             unit = data[_key][1]
-            # remove spaces
-            key = _key.replace(" ", "_")
-            if not keep_case:
-                # make lowercase
-                key = key.lower()
-            if key_wanted(key, filter, excl_filter):
+            #
+            # CONFIG / AUTODISCOVER
+            #
+            # <discovery_prefix>/<component>/[<node_id>/]<object_id>/config
+            # topic "homeassistant/binary_sensor/garden/config"
+            # msg '{"name": "garden", "device_class": "motion", "state_topic": "homeassistant/binary_sensor/garden/state", "unit_of_measurement": "°C"}'
+            if unit == "bool" or value == "enabled" or value == "disabled":
+                topic = f"homeassistant/binary_sensor/mpp_{tag}_{key}/config"
+                topic = topic.replace(" ", "_")
+                name = f"{tag} {_key}"
+                payload = f'{{"name": "{name}", "state_topic": "homeassistant/binary_sensor/mpp_{tag}_{key}/state", "unique_id": "mpp_{tag}_{key}", "force_update": "true" }}'
+                msg = {"topic": topic, "payload": payload}
+                msgs.append(msg)
+                topic = f"homeassistant/binary_sensor/mpp_{tag}_{key}/state"
+                if value == 0 or value == "0" or value == "disabled":
+                    # for QPIWS one can add [or tag == "myQPIWStag"], if there's a QPIWS section in mpp-solar.conf
+                    value = "OFF"
+                elif value == 1 or value == "1" or value == "enabled":
+                    value = "ON"
+                msg = {"topic": topic, "payload": value}
+                msgs.append(msg)
+            else:
+                topic = f"homeassistant/sensor/mpp_{tag}_{key}/config"
+                topic = topic.replace(" ", "_")
+                name = f"{tag} {_key}"
+                if unit == "W":
+                    payload = f'{{"name": "{name}", "state_topic": "homeassistant/sensor/mpp_{tag}_{key}/state", "unit_of_measurement": "{unit}", "unique_id": "mpp_{tag}_{key}", "state_class": "measurement", "device_class": "power", "force_update": "true" }}'
+                elif unit == "":
+                    payload = f'{{"name": "{name}", "state_topic": "homeassistant/sensor/mpp_{tag}_{key}/state", "unique_id": "mpp_{tag}_{key}", "force_update": "true" }}'
+                else:
+                    payload = f'{{"name": "{name}", "state_topic": "homeassistant/sensor/mpp_{tag}_{key}/state", "unit_of_measurement": "{unit}", "unique_id": "mpp_{tag}_{key}", "force_update": "true" }}'
+                # msg = {"topic": topic, "payload": payload, "retain": True}
+                msg = {"topic": topic, "payload": payload}
+                msgs.append(msg)
                 #
-                # CONFIG / AUTODISCOVER
+                # VALUE SETTING
                 #
-                # <discovery_prefix>/<component>/[<node_id>/]<object_id>/config
-                # topic "homeassistant/binary_sensor/garden/config"
-                # msg '{"name": "garden", "device_class": "motion", "state_topic": "homeassistant/binary_sensor/garden/state", "unit_of_measurement": "°C"}'
-                if unit == "bool" or value == "enabled" or value == "disabled":
-                    topic = f"homeassistant/binary_sensor/mpp_{tag}_{key}/config"
-                    topic = topic.replace(" ", "_")
-                    name = f"{tag} {_key}"
-                    payload = f'{{"name": "{name}", "state_topic": "homeassistant/binary_sensor/mpp_{tag}_{key}/state", "unique_id": "mpp_{tag}_{key}", "force_update": "true" }}'
-                    msg = {"topic": topic, "payload": payload}
-                    msgs.append(msg)
-                    topic = f"homeassistant/binary_sensor/mpp_{tag}_{key}/state"
-                    if value == 0 or value == "0" or value == "disabled":
-                        # for QPIWS one can add [or tag == "myQPIWStag"], if there's a QPIWS section in mpp-solar.conf
-                        value = "OFF"
-                    elif value == 1 or value == "1" or value == "enabled":
-                        value = "ON"
-                    msg = {"topic": topic, "payload": value}
-                    msgs.append(msg)
-                else:
-                    topic = f"homeassistant/sensor/mpp_{tag}_{key}/config"
-                    topic = topic.replace(" ", "_")
-                    name = f"{tag} {_key}"
-                    if unit == "W":
-                        payload = f'{{"name": "{name}", "state_topic": "homeassistant/sensor/mpp_{tag}_{key}/state", "unit_of_measurement": "{unit}", "unique_id": "mpp_{tag}_{key}", "state_class": "measurement", "device_class": "power", "force_update": "true" }}'
-                    elif unit == "":
-                        payload = f'{{"name": "{name}", "state_topic": "homeassistant/sensor/mpp_{tag}_{key}/state", "unique_id": "mpp_{tag}_{key}", "force_update": "true" }}'
-                    else:
-                        payload = f'{{"name": "{name}", "state_topic": "homeassistant/sensor/mpp_{tag}_{key}/state", "unit_of_measurement": "{unit}", "unique_id": "mpp_{tag}_{key}", "force_update": "true" }}'
-                    # msg = {"topic": topic, "payload": payload, "retain": True}
-                    msg = {"topic": topic, "payload": payload}
-                    msgs.append(msg)
-                    #
-                    # VALUE SETTING
-                    #
-                    # unit = data[key][1]
-                    # 'tag'/status/total_output_active_power/value 1250
-                    # 'tag'/status/total_output_active_power/unit W
-                    topic = f"homeassistant/sensor/mpp_{tag}_{key}/state"
-                    msg = {"topic": topic, "payload": value}
-                    msgs.append(msg)
+                # unit = data[key][1]
+                # 'tag'/status/total_output_active_power/value 1250
+                # 'tag'/status/total_output_active_power/unit W
+                topic = f"homeassistant/sensor/mpp_{tag}_{key}/state"
+                msg = {"topic": topic, "payload": value}
+                msgs.append(msg)
         return msgs
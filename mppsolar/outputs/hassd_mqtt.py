@@ -1,11 +1,11 @@
 import json as js
 import logging
 import re
-from datetime import datetime
-from time import sleep
 
-from ..helpers import get_kwargs, key_wanted
+from ..helpers import get_key_map, get_kwargs
+from ..libs.hassdiscovery import DiscoveryRegistry
 from .mqtt import mqtt
+from ..result import ResultView
 
 log = logging.getLogger("hassd_mqtt")
 
@@ -16,17 +16,15 @@ class hassd_mqtt(mqtt):
 
     def __init__(self, *args, **kwargs) -> None:
         log.debug(f"__init__: kwargs {kwargs}")
+        # the discovery configs are only sent when new or changed
+        self.registry = DiscoveryRegistry()
 
     def build_msgs(self, *args, **kwargs):
         log.debug(f"kwargs {kwargs}")
         data = get_kwargs(kwargs, "data")
-        # Clean data
-        if "_command" in data:
-            command = data.pop("_command")
-        if "_command_description" in data:
-            data.pop("_command_description")
-        if "raw_response" in data:
-            data.pop("raw_response")
+        # the command details are kept apart from the fields, which are not changed
+        data = ResultView.of(data)
+        command = data.command
 
         # check if config supplied
         config = get_kwargs(kwargs, "config")
@@ -74,96 +72,87 @@ class hassd_mqtt(mqtt):
         config_msgs = []
         value_msgs = []
 
-        # Loop through responses
-        for key in data:
-            orig_key = key
-            value = data[key][0]
-            unit = data[key][1]
+        # Loop through the wanted responses
+        for orig_key, key in get_key_map(data, remove_spaces, keep_case, filter, excl_filter):
+            value = data[orig_key][0]
+            unit = data[orig_key][1]
             icon = None
-            if len(data[key]) > 2 and data[key][2] and "icon" in data[key][2]:
-                icon = data[key][2]["icon"]
+            if len(data[orig_key]) > 2 and data[orig_key][2] and "icon" in data[orig_key][2]:
+                icon = data[orig_key][2]["icon"]
             device_class = None
-            if len(data[key]) > 2 and data[key][2] and "device-class" in data[key][2]:
-                device_class = data[key][2]["device-class"]
+            if len(data[orig_key]) > 2 and data[orig_key][2] and "device-class" in data[orig_key][2]:
+                device_class = data[orig_key][2]["device-class"]
             state_class = None
-            if len(data[key]) > 2 and data[key][2] and "state_class" in data[key][2]:
-                state_class = data[key][2]["state_class"]
-
-            # remove spaces
-            if remove_spaces:
-                key = key.replace(" ", "_")
-            if not keep_case:
-                # make lowercase
-                key = key.lower()
-            if key_wanted(key, filter, excl_filter):
-                #
-                # CONFIG / AUTODISCOVER
-                #
-                # <discovery_prefix>/<component>/[<node_id>/]<object_id>/config
-                # topic "homeassistant/binary_sensor/garden/config"
-                # msg '{"name": "garden", "device_class": "motion", "state_topic": "homeassistant/binary_sensor/garden/state", "unit_of_measurement": "°C", "icon": "power-plug"}'
-
-                # For binary sensors
-                if unit == "bool" or value == "enabled" or value == "disabled":
-                    sensor = "binary_sensor"
-                    if value == 0 or value == "0" or value == "disabled":
-                        # for QPIWS one can add [or tag == "myQPIWStag"], if there's a QPIWS section in mpp-solar.conf
-                        value = "OFF"
-                    elif value == 1 or value == "1" or value == "enabled":
-                        value = "ON"
-                else:
-                    sensor = "sensor"
-                topic = f"homeassistant/{sensor}/mpp_{tag}_{key}/config"
-                topic = topic.replace(" ", "_")
-                name = f"{tag} {orig_key}"
-                payload = {
-                    "name": f"{name}",
-                    "state_topic": f"homeassistant/{sensor}/mpp_{tag}_{key}/state",
-                    "unique_id": f"mpp_{tag}_{key}",
-                    "force_update": "true",
-                }
-                if unit and unit != "bool":
-                    payload["unit_of_measurement"] = f"{unit}"
-
-                # payload["device"] = {"name": f"{device_name}", "identifiers": ["mppsolar"], "model": "PIP6048MAX", "manufacturer": "MPP-Solar"}
-                payload["device"] = {
-                    "name": device_name,
-                    "identifiers": [device_id],
-                    "model": device_model,
-                    "manufacturer": device_manufacturer,
-                }
-                if device_class:
-                    payload["device_class"] = device_class
-                if state_class:
-                    payload["state_class"] = state_class
-                if icon:
-                    payload.update({"icon": icon})
-                if unit == "W":
-                    payload.update({"state_class": "measurement", "device_class": "power"})
-                if unit == "Wh" or unit == "kWh":
-                    payload.update(
-                        {
-                            "icon": "mdi:counter",
-                            "device_class": "energy",
-                            "state_class": "total",
-                            "last_reset": str(datetime.now()),
-                        }
-                    )
-
-                # msg = {"topic": topic, "payload": payload, "retain": True}
-                payloads = js.dumps(payload)
-                # print(payloads)
-                msg = {"topic": topic, "payload": payloads}
+            if len(data[orig_key]) > 2 and data[orig_key][2] and "state_class" in data[orig_key][2]:
+                state_class = data[orig_key][2]["state_class"]
+
+            #
+            # CONFIG / AUTODISCOVER
+            #
+            # <discovery_prefix>/<component>/[<node_id>/]<object_id>/config
+            # topic "homeassistant/binary_sensor/garden/config"
+            # msg '{"name": "garden", "device_class": "motion", "state_topic": "homeassistant/binary_sensor/garden/state", "unit_of_measurement": "°C", "icon": "power-plug"}'
+
+            # For binary sensors
+            if unit == "bool" or value == "enabled" or value == "disabled":
+                sensor = "binary_sensor"
+                if value == 0 or value == "0" or value == "disabled":
+                    # for QPIWS one can add [or tag == "myQPIWStag"], if there's a QPIWS section in mpp-solar.conf
+                    value = "OFF"
+                elif value == 1 or value == "1" or value == "enabled":
+                    value = "ON"
+            else:
+                sensor = "sensor"
+            topic = f"homeassistant/{sensor}/mpp_{tag}_{key}/config"
+            topic = topic.replace(" ", "_")
+            name = f"{tag} {orig_key}"
+            payload = {
+                "name": f"{name}",
+                "state_topic": f"homeassistant/{sensor}/mpp_{tag}_{key}/state",
+                "unique_id": f"mpp_{tag}_{key}",
+                "force_update": "true",
+            }
+            if unit and unit != "bool":
+                payload["unit_of_measurement"] = f"{unit}"
+
+            # payload["device"] = {"name": f"{device_name}", "identifiers": ["mppsolar"], "model": "PIP6048MAX", "manufacturer": "MPP-Solar"}
+            payload["device"] = {
+                "name": device_name,
+                "identifiers": [device_id],
+                "model": device_model,
+                "manufacturer": device_manufacturer,
+            }
+            if device_class:
+                payload["device_class"] = device_class
+            if state_class:
+                payload["state_class"] = state_class
+            if icon:
+                payload.update({"icon": icon})
+            if unit == "W":
+                payload.update({"state_class": "measurement", "device_class": "power"})
+            if unit == "Wh" or unit == "kWh":
+                payload.update(
+                    {
+                        "icon": "mdi:counter",
+                        "device_class": "energy",
+                        "state_class": "total",
+                    }
+                )
+
+            payloads = js.dumps(payload)
+            # print(payloads)
+            if self.registry.changed(topic, payloads):
+                msg = {"topic": topic, "payload": payloads, "retain": True}
                 config_msgs.append(msg)
-                #
-                # VALUE SETTING
-                #
-                # unit = data[key][1]
-                # 'tag'/status/total_output_active_power/value 1250
-                # 'tag'/status/total_output_active_power/unit W
-                topic = f"homeassistant/{sensor}/mpp_{tag}_{key}/state"
-                msg = {"topic": topic, "payload": value}
-                value_msgs.append(msg)
+            #
+            # VALUE SETTING
+            #
+            # unit = data[key][1]
+            # 'tag'/status/total_output_active_power/value 1250
+            # 'tag'/status/total_output_active_power/unit W
+            topic = f"homeassistant/{sensor}/mpp_{tag}_{key}/state"
+            msg = {"topic": topic, "payload": value}
+            value_msgs.append(msg)
         return config_msgs, value_msgs
 
     def output(self, *args, **kwargs):
@@ -181,12 +170,19 @@ class hassd_mqtt(mqtt):
         if mqtt_broker is None:
             return
 
+        # republish the configs if the broker reconnects or home assistant restarts
+        self.registry.attach(mqtt_broker)
+
         # build the messages...
         config_msgs, value_msgs = self.build_msgs(**kwargs)
         log.debug(f"hassd_mqtt.output config_msgs {config_msgs}")
         log.debug(f"hassd_mqtt.output value_msgs {value_msgs}")
 
-        # publish
-        mqtt_broker.publishMultiple(config_msgs)
-        sleep(0.5)
-        mqtt_broker.publishMultiple(value_msgs)
+        # publish, any new configs go first so home assistant has the entity before its state
+        if mqtt_broker.publishMultiple(config_msgs + value_msgs):
+            self.not_published(config_msgs)
+
+    def not_published(self, msgs):
+        # forget the configs in the batch, so they are sent again with the next results
+        for msg in msgs:
+            self.registry.discard(msg["topic"])
@@ -0,0 +1,56 @@
+import logging
+
+from . import get_common_params, to_line_protocol
+from .baseoutput import baseoutput
+from ..helpers import get_kwargs
+from ..libs.influxwriter import InfluxWriter
+
+log = logging.getLogger("influx")
+
+
+class influx(baseoutput):
+    def __str__(self):
+        return "outputs the results directly to InfluxDB: eg mpp-solar,command={tag},device={name} max_charger_range=120.0 {timestamp}"
+
+    def __init__(self, *args, **kwargs) -> None:
+        log.debug(f"__init__: kwargs {kwargs}")
+        # the writers used, to write their buffered lines on close
+        self.writers = {}
+
+    def output(self, *args, **kwargs):
+        (data, tag, keep_case, filter_, excl_filter) = get_common_params(kwargs)
+
+        influx_url = get_kwargs(kwargs, "influx_url")
+        if influx_url is None:
+            log.error("influx output needs an influx_url")
+            return []
+        writer = self.writers.get(influx_url)
+        if writer is None:
+            writer = InfluxWriter.get(
+                influx_url,
+                token=get_kwargs(kwargs, "influx_token"),
+                spill=get_kwargs(kwargs, "influx_spill"),
+            )
+            self.writers[influx_url] = writer
+            log.debug(writer)
+        # the same measurement as influx2_mqtt, so switching between them keeps the series
+        measurement = get_kwargs(kwargs, "mqtt_topic", default="mpp-solar")
+        if tag is None:
+            tag = data.command
+
+        # Build one Influx Line Protocol line for all the fields of the command
+        # Line format is: mpp-solar,command=QPIGS,device=inv1 ac_input_voltage=230.1,max_charger_range=120.0 1700000000000000000
+        #                 measurement,tag_set field_set timestamp
+        msgs = []
+        line = to_line_protocol(data, measurement, {"command": tag, "device": get_kwargs(kwargs, "name")}, keep_case, excl_filter, filter_)
+        if line is not None:
+            log.debug(line)
+            msgs.append(line)
+        for msg in msgs:
+            writer.add(msg)
+        return msgs
+
+    def close(self):
+        for writer in self.writers.values():
+            writer.close()
+        self.writers = {}
@@ -3,7 +3,8 @@ import re
 
 from .mqtt import mqtt
 from ..helpers import get_kwargs
-from ..helpers import key_wanted
+from ..helpers import get_key_map
+from ..result import ResultView
 
 log = logging.getLogger("influx2_mqtt")
 
@@ -32,30 +33,23 @@ class influx2_mqtt(mqtt):
         #                    mpp-solar,command=inverter2 parallel_instance_number="valid"
         #                    measurement,tag_set field_set
         msgs = []
-        # Remove command and _command_description
-        cmd = data.pop("_command", None)
-        data.pop("_command_description", None)
-        data.pop("raw_response", None)
+        # the command details are kept apart from the fields, which are not changed
+        data = ResultView.of(data)
+        cmd = data.command
         if tag is None:
             tag = cmd
-        # Loop through responses
-        for key in data:
-            value = data[key][0]
-            # remove spaces
-            key = key.replace(" ", "_")
-            if not keep_case:
-                # make lowercase
-                key = key.lower()
-            if key_wanted(key, filter, excl_filter):
-                if isinstance(value, int) or isinstance(value, float):
-                    msg = {
-                        "topic": topic,
-                        "payload": f"{topic},command={tag} {key}={value}",
-                    }
-                else:
-                    msg = {
-                        "topic": topic,
-                        "payload": f'{topic},command={tag} {key}="{value}"',
-                    }
-                msgs.append(msg)
+        # Loop through the wanted responses
+        for source_key, key in get_key_map(data, True, keep_case, filter, excl_filter):
+            value = data[source_key][0]
+            if isinstance(value, int) or isinstance(value, float):
+                msg = {
+                    "topic": topic,
+                    "payload": f"{topic},command={tag} {key}={value}",
+                }
+            else:
+                msg = {
+                    "topic": topic,
+                    "payload": f'{topic},command={tag} {key}="{value}"',
+                }
+            msgs.append(msg)
         return msgs
@@ -3,7 +3,8 @@ import re
 
 from .mqtt import mqtt
 from ..helpers import get_kwargs
-from ..helpers import key_wanted
+from ..helpers import get_key_map
+from ..result import ResultView
 
 log = logging.getLogger("influx_mqtt")
 
@@ -30,33 +31,26 @@ class influx_mqtt(mqtt):
 
         # Build array of Influx Line Protocol messages
         msgs = []
-        # Remove command and _command_description
-        cmd = data.pop("_command", None)
-        data.pop("_command_description", None)
-        data.pop("raw_response", None)
+        # the command details are kept apart from the fields, which are not changed
+        data = ResultView.of(data)
+        cmd = data.command
 
         if tag is None:
             tag = cmd
         # Loop through responses
-        for key in data:
-            value = data[key][0]
-            unit = data[key][1]
-            # remove spaces
-            key = key.replace(" ", "_")
-            if not keep_case:
-                # make lowercase
-                key = key.lower()
+        for source_key, key in get_key_map(data, True, keep_case, filter, excl_filter):
+            value = data[source_key][0]
+            unit = data[source_key][1]
             # Message format is: tag, tag,setting=total_ac_output_apparent_power value=1577.0,unit="VA"
-            if key_wanted(key, filter, excl_filter):
-                if not unit:
-                    msg = {
-                        "topic": topic,
-                        "payload": f"{tag},setting={key} value={value}",
-                    }
-                else:
-                    msg = {
-                        "topic": topic,
-                        "payload": f"{tag},setting={key} value={value},unit={unit}",
-                    }
-                msgs.append(msg)
+            if not unit:
+                msg = {
+                    "topic": topic,
+                    "payload": f"{tag},setting={key} value={value}",
+                }
+            else:
+                msg = {
+                    "topic": topic,
+                    "payload": f"{tag},setting={key} value={value},unit={unit}",
+                }
+            msgs.append(msg)
         return msgs
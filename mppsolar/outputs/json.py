@@ -3,7 +3,7 @@ import logging
 import re
 
 from ..helpers import get_kwargs
-from . import to_json
+from . import JSON_METADATA, to_json
 from .baseoutput import baseoutput
 
 log = logging.getLogger("json")
@@ -21,7 +21,6 @@ class json(baseoutput):
         log.debug(f"kwargs {kwargs}")
         data = get_kwargs(kwargs, "data")
         keep_case = get_kwargs(kwargs, "keep_case")
-        data.pop("raw_response", None)
 
         filter = get_kwargs(kwargs, "filter")
         if filter is not None:
@@ -30,5 +29,5 @@ class json(baseoutput):
         if excl_filter is not None:
             excl_filter = re.compile(excl_filter)
 
-        output = to_json(data, keep_case, excl_filter, filter)
+        output = to_json(data, keep_case, excl_filter, filter, metadata=JSON_METADATA)
         print(js.dumps(output))
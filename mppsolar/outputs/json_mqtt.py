@@ -5,6 +5,7 @@ import re
 from . import to_json
 from .mqtt import mqtt
 from ..helpers import get_kwargs
+from ..result import ResultView
 
 # from ..helpers import key_wanted
 
@@ -39,10 +40,9 @@ class json_mqtt(mqtt):
         #                    mpp-solar,command=inverter2 parallel_instance_number="valid"
         #                    measurement,tag_set field_set
         msgs = []
-        # Remove command and _command_description
-        cmd = data.pop("_command", None)
-        data.pop("_command_description", None)
-        data.pop("raw_response", None)
+        # the command details are kept apart from the fields, which are not changed
+        data = ResultView.of(data)
+        cmd = data.command
         if tag is None:
             tag = cmd
         output = to_json(data, keep_case, excl_filter, filter)
@@ -6,6 +6,7 @@ import socket
 from . import to_json
 from .baseoutput import baseoutput
 from ..helpers import get_kwargs
+from ..result import ResultView
 
 log = logging.getLogger("json_udp")
 
@@ -30,10 +31,9 @@ class json_udp(baseoutput):
             excl_filter = re.compile(excl_filter)
 
         msgs = []
-        # Remove command and _command_description
-        cmd = data.pop("_command", None)
-        data.pop("_command_description", None)
-        data.pop("raw_response", None)
+        # the command details are kept apart from the fields, which are not changed
+        data = ResultView.of(data)
+        cmd = data.command
         if tag is None:
             tag = cmd
         output = to_json(data, keep_case, excl_filter, filter)
@@ -1,12 +1,11 @@
-import datetime
 import logging
 import re
 
-import pymongo as pymongo
-
 from . import to_json
 from .baseoutput import baseoutput
 from ..helpers import get_kwargs
+from ..libs.mongowriter import MongoWriter
+from ..result import ResultView
 # from ..helpers import key_wanted
 
 log = logging.getLogger("mongo")
@@ -18,9 +17,11 @@ class mongo(baseoutput):
 
     def __init__(self, *args, **kwargs) -> None:
         log.debug(f"__init__: kwargs {kwargs}")
+        # the writers used, to write their buffered documents on close
+        self.writers = {}
 
     def output(self, *args, **kwargs):
-        data = get_kwargs(kwargs, "data")
+        data = ResultView.of(get_kwargs(kwargs, "data"))
         # tag = get_kwargs(kwargs, "tag")
         keep_case = get_kwargs(kwargs, "keep_case")
         filter = get_kwargs(kwargs, "filter")
@@ -32,31 +33,26 @@ class mongo(baseoutput):
 
         mongo_url = get_kwargs(kwargs, "mongo_url")
         mongo_database = get_kwargs(kwargs, "mongo_db", "mppsolar")
-        log.debug(f"Connecting to {mongo_url} / {mongo_database}")
-        client = pymongo.MongoClient(mongo_url)
-        db = client[mongo_database]
+        writer = self.writers.get(mongo_url)
+        if writer is None:
+            writer = MongoWriter.get(mongo_url)
+            self.writers[mongo_url] = writer
+            log.debug(f"Using {writer} for {mongo_url} / {mongo_database}")
 
         msgs = []
-        # Remove command and _command_description
-        # cmd = data.pop("_command", None)
-        data.pop("_command_description", None)
-        data.pop("raw_response", None)
-        # if tag is None:
-        #     tag = cmd
+        # the command is the collection, the fields the document
+        col = data.command
         output = to_json(data, keep_case, excl_filter, filter)
 
         log.debug(output)
         msgs.append(output)
-        inserted = 0
-        try:
-            for msg in msgs:
-                col = msg.pop("_command")
-                msg['updated'] = datetime.datetime.now()
-                result = db[col].insert_one(msg)
-                if result is not None:
-                    log.debug(result.inserted_id)
-                    inserted += 1
-            log.debug(f"inserted {inserted} docs")
-        except pymongo.errors.ServerSelectionTimeoutError as dbe:
-            log.error(f"Mongo error {dbe}")
+        for msg in msgs:
+            # the documents are buffered and written in batches by the writer, so are timestamped when the results were received
+            msg['updated'] = data.acquired.replace(tzinfo=None)
+            writer.add(mongo_database, col, msg)
         return msgs
+
+    def close(self):
+        for writer in self.writers.values():
+            writer.close()
+        self.writers = {}
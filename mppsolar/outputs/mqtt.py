@@ -3,7 +3,8 @@ import re
 
 from .baseoutput import baseoutput
 from ..helpers import get_kwargs
-from ..helpers import key_wanted
+from ..helpers import get_key_map
+from ..result import ResultView
 
 log = logging.getLogger("mqtt")
 
@@ -18,13 +19,9 @@ class mqtt(baseoutput):
     def build_msgs(self, *args, **kwargs):
 
         data = get_kwargs(kwargs, "data")
-        # Clean data
-        if "_command" in data:
-            command = data.pop("_command")
-        if "_command_description" in data:
-            data.pop("_command_description")
-        if "raw_response" in data:
-            data.pop("raw_response")
+        # the command details are kept apart from the fields, which are not changed
+        data = ResultView.of(data)
+        command = data.command
 
         # check if config supplied
         config = get_kwargs(kwargs, "config")
@@ -62,16 +59,8 @@ class mqtt(baseoutput):
 
         # build data to output
         _data = {}
-        for key in data:
-            _values = data[key]
-            # remove spaces
-            if remove_spaces:
-                key = key.replace(" ", "_")
-            if not keep_case:
-                # make lowercase
-                key = key.lower()
-            if key_wanted(key, filter, excl_filter):
-                _data[key] = _values
+        for key, output_key in get_key_map(data, remove_spaces, keep_case, filter, excl_filter):
+            _data[output_key] = data[key]
         log.debug(f"output data: {_data}")
 
         # Build array of mqtt messages
@@ -110,4 +99,11 @@ class mqtt(baseoutput):
         log.debug(f"mqtt.output msgs {msgs}")
 
         # publish
-        mqtt_broker.publishMultiple(msgs)
+        if mqtt_broker.publishMultiple(msgs):
+            self.not_published(msgs)
+
+    def not_published(self, msgs):
+        """
+        Called with a batch of messages that were not all published
+        """
+        pass
@@ -1,13 +1,9 @@
 import logging
-from datetime import datetime
-
-import psycopg2 as psycopg2
-from psycopg2._json import Json
-from psycopg2.extensions import register_adapter
 
 from . import to_json, get_common_params
 from .baseoutput import baseoutput
 from ..helpers import get_kwargs
+from ..libs.postgreswriter import PostgresWriter
 
 log = logging.getLogger("postgres")
 
@@ -40,42 +36,34 @@ class postgres(baseoutput):
 
     def __init__(self, *args, **kwargs) -> None:
         log.debug(f"__init__: kwargs {kwargs}")
-        register_adapter(dict, Json)
+        # the writers used, to write their buffered rows on close
+        self.writers = {}
 
     def output(self, *args, **kwargs):
         (data, tag, keep_case, filter_, excl_filter) = get_common_params(kwargs)
 
         postgres_url = get_kwargs(kwargs, "postgres_url")
-        log.debug(f"Connecting to {postgres_url}")
-        conn = psycopg2.connect(postgres_url)
+        writer = self.writers.get(postgres_url)
+        if writer is None:
+            writer = PostgresWriter.get(postgres_url)
+            self.writers[postgres_url] = writer
+            log.debug(writer)
 
         msgs = []
-        # Remove command and _command_description
-        # cmd = data.pop("_command", None)
-        data.pop("_command_description", None)
-        data.pop("raw_response", None)
-        # if tag is None:
-        #     tag = cmd
+        # the command is stored in its own column, the fields as json
+        command = data.command
         output = to_json(data, keep_case, excl_filter, filter_)
 
         log.debug(output)
         msgs.append(output)
-        inserted = 0
-        now = datetime.now().astimezone().replace(microsecond=0).isoformat()
-        try:
-            for msg in msgs:
-                command = msg.pop("_command")
-                msg['updated'] = now
-                log.debug(conn)
-                cursor = conn.cursor()
-                log.debug(cursor)
-                cursor.execute('insert into mppsolar (command,data, updated) values (%s,%s,%s)', (command, msg, now))
-                conn.commit()
-                inserted += 1
-                cursor.close()
-            log.debug(f"inserted {inserted} docs")
-        except Exception as e:
-            log.error(f"Postgres error {e}")
-        finally:
-            conn.close()
+        # the rows are buffered and written in batches by the writer, so are timestamped when the results were received
+        now = data.acquired.replace(microsecond=0).isoformat()
+        for msg in msgs:
+            msg['updated'] = now
+            writer.add(command, msg, now)
         return msgs
+
+    def close(self):
+        for writer in self.writers.values():
+            writer.close()
+        self.writers = {}
@@ -2,6 +2,7 @@ import logging
 
 from .baseoutput import baseoutput
 from ..helpers import get_kwargs
+from ..result import ResultView
 
 log = logging.getLogger("raw")
 
@@ -16,19 +17,16 @@ class raw(baseoutput):
     def output(self, *args, **kwargs):
         log.info("Using output processor: raw")
         log.debug(f"kwargs {kwargs}")
-        data = get_kwargs(kwargs, "data")
+        data = ResultView.of(get_kwargs(kwargs, "data"))
         if data is None:
             return
-        _desc = "No description found"
-        if "_command_description" in data:
-            _desc = data["_command_description"]
-            del data["_command_description"]
-        if "_command" in data:
-            print(f"Command: {data['_command']} - {_desc}")
+        metadata = data.metadata
+        _desc = metadata.get("_command_description", "No description found")
+        if "_command" in metadata:
+            print(f"Command: {metadata['_command']} - {_desc}")
             print("-" * 60)
-            del data["_command"]
-        if "raw_response" in data:
+        if "raw_response" in metadata:
             key = "raw_response"
-            value = data[key][0]
+            value = metadata[key][0]
             print(f"{key:<30}\t{value!a:<15}")
         return
@@ -2,7 +2,8 @@ import logging
 import re
 
 from .baseoutput import baseoutput
-from ..helpers import get_kwargs, key_wanted, pad, getMaxLen
+from ..helpers import get_key_map, get_kwargs, pad, getMaxLen
+from ..result import ResultView
 
 log = logging.getLogger("screen")
 
@@ -20,7 +21,7 @@ class screen(baseoutput):
     def output(self, *args, **kwargs):
         log.info("Using output processor: screen")
         log.debug(f"kwargs {kwargs}")
-        data = get_kwargs(kwargs, "data")
+        data = ResultView.of(get_kwargs(kwargs, "data"))
         if data is None:
             return
 
@@ -45,32 +46,14 @@ class screen(baseoutput):
         if excl_filter is not None:
             excl_filter = re.compile(excl_filter)
 
-        # remove raw response
-        if "raw_response" in data:
-            data.pop("raw_response")
-
-        # build header
-        if "_command" in data:
-            command = data.pop("_command")
-        else:
-            command = "Unknown command"
-        if "_command_description" in data:
-            description = data.pop("_command_description")
-        else:
-            description = "No description found"
+        # build header (the raw response is not shown)
+        command = data.metadata.get("_command", "Unknown command")
+        description = data.metadata.get("_command_description", "No description found")
 
         # build data to display
         displayData = {}
-        for key in data:
-            _values = data[key]
-            # remove spaces
-            if remove_spaces:
-                key = key.replace(" ", "_")
-            if not keep_case:
-                # make lowercase
-                key = key.lower()
-            if key_wanted(key, filter, excl_filter):
-                displayData[key] = _values
+        for key, output_key in get_key_map(data, remove_spaces, keep_case, filter, excl_filter):
+            displayData[output_key] = data[key]
         log.debug(f"displayData: {displayData}")
 
         # print header
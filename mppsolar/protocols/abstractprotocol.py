@@ -1,27 +1,57 @@
 import abc
-import calendar  # noqa: F401
+import functools
 import logging
-import re
+from types import MappingProxyType
 from typing import Tuple
 from dto.protocolDTO import ProtocolDTO
+from mppsolar.result import DecodeDict, ReadingBuilder
 
-from ..helpers import get_resp_defn, get_value
-from .protocol_helpers import BigHex2Short, BigHex2Float  # noqa: F401
-from .protocol_helpers import LittleHex2Float, LittleHex2Short  # noqa: F401
-from .protocol_helpers import LittleHex2UInt, LittleHex2Int  # noqa: F401
-from .protocol_helpers import Hex2Ascii, Hex2Int, Hex2Str  # noqa: F401
-from .protocol_helpers import uptime  # noqa: F401
-from .protocol_helpers import crcPI as crc
+from .command_index import CommandIndex
+from .command_request import CommandRequest
+from .decode_plan import CommandPlan, FieldPlan, UnpackedRecord
+from .framing import Framer, TerminatorFramer
+from .crc import crc_pi as crc
 
 log = logging.getLogger("AbstractProtocol")
 
+# maximum number of full commands memoised per protocol instance
+FULL_COMMAND_CACHE_SIZE = 64
+
+
+def cache_full_command(get_full_command):
+    """
+    Decorator for get_full_command implementations
+    - builds the CommandRequest if one is not supplied, so get_full_command(self, command, request) always gets a request
+    - memoises the result by command string for a protocol instance, only immutable (bytes) full commands are cached
+    - records the full command on the request
+    """
+
+    @functools.wraps(get_full_command)
+    def wrapper(self, command, request=None):
+        if request is None:
+            request = self.get_request(command)
+        full_command = self._full_commands.get(command)
+        if full_command is None:
+            full_command = get_full_command(self, command, request)
+            if type(full_command) is bytes:
+                if len(self._full_commands) >= FULL_COMMAND_CACHE_SIZE:
+                    self._full_commands.clear()
+                self._full_commands[command] = full_command
+        request.full_command = full_command
+        return full_command
+
+    return wrapper
+
 
 class AbstractProtocol(metaclass=abc.ABCMeta):
 
     def __init__(self, *args, **kwargs) -> None:
-        self._command = None
-        self._command_dict = None
-        self.COMMANDS = {}
+        self._command_index = None
+        self._decode_plans = {}
+        self._full_commands = {}
+        # COMMANDS must not be changed once the protocol is in use, subclasses
+        # that add commands replace it with a new (read only) mapping
+        self.COMMANDS = MappingProxyType({})
         self.STATUS_COMMANDS = None
         self.SETTINGS_COMMANDS = None
         self.DEFAULT_COMMAND = None
@@ -51,34 +81,43 @@ class AbstractProtocol(metaclass=abc.ABCMeta):
     def get_protocol_id(self) -> bytes:
         return self._protocol_id
 
-    def get_full_command(self, command) -> bytes:
-        log.info(f"Using protocol {self._protocol_id} with {len(self.COMMANDS)} commands")
+    @cache_full_command
+    def get_full_command(self, command, request=None) -> bytes:
+        log.info("Using protocol %s with %s commands", self._protocol_id, len(self.COMMANDS))
         byte_cmd = bytes(command, "utf-8")
         # calculate the CRC
         crc_high, crc_low = crc(byte_cmd)
         # combine byte_cmd, CRC , return
         full_command = byte_cmd + bytes([crc_high, crc_low, 13])
-        log.debug(f"full command: {full_command}")
+        log.debug("full command: %s", full_command)
         return full_command
 
+    def get_command_index(self) -> CommandIndex:
+        """
+        Get the index of COMMANDS, (re)building it if COMMANDS has changed
+        """
+        if self._command_index is None or not self._command_index.is_for(self.COMMANDS):
+            log.debug("Building command index for protocol %s", self._protocol_id)
+            self._command_index = CommandIndex(self.COMMANDS)
+        return self._command_index
+
+    def get_request(self, command) -> CommandRequest:
+        """
+        Build the CommandRequest for command, this holds all the per call state
+        """
+        if command is None:
+            return CommandRequest(command)
+        command_defn, command_value = self.get_command_index().lookup(command)
+        if command_defn is None:
+            log.info("No command_defn found for %s", command)
+        elif command_value is not None:
+            log.debug("Matched: %s to: %s value: %s", command, command_defn["name"], command_value)
+        return CommandRequest(command, command_defn, command_value)
+
     def get_command_defn(self, command) -> dict:
-        log.debug(f"Processing command '{command}'")
-        if command in self.COMMANDS and "regex" not in self.COMMANDS[command]:
-            log.debug(f"Found command {command} in protocol {self._protocol_id}")
-            return self.COMMANDS[command]
-        for _command in self.COMMANDS:
-            if "regex" in self.COMMANDS[_command] and self.COMMANDS[_command]["regex"]:
-                log.debug(f"Regex commands _command: {_command}")
-                _re = re.compile(self.COMMANDS[_command]["regex"])
-                match = _re.match(command)
-                if match:
-                    log.debug(f"Matched: {command} to: {self.COMMANDS[_command]['name']} value: {match.group(1)}")
-                    self._command_value = match.group(1)
-                    return self.COMMANDS[_command]
-        log.info(f"No command_defn found for {command}")
-        return None
-
-    def get_responses(self, response) -> list:
+        return self.get_request(command).command_defn
+
+    def get_responses(self, response, request=None) -> list:
         """
         Default implementation of split and trim
         """
@@ -87,7 +126,7 @@ class AbstractProtocol(metaclass=abc.ABCMeta):
             return response[1:-3].split(" ")
         return response[1:-3].split(b" ")
 
-    def check_response_valid(self, response) -> Tuple[bool, dict]:
+    def check_response_valid(self, response, request=None) -> Tuple[bool, dict]:
         """
         Simplest validity check, CRC checks should be added to individual protocols
         """
@@ -95,6 +134,13 @@ class AbstractProtocol(metaclass=abc.ABCMeta):
             return False, {"validity check": ["Error: Response was empty", ""]}
         return True, {}
 
+    def get_response_framer(self, request=None) -> Framer:
+        """
+        Framer used by the IO classes to detect the end of a response
+        - default is the CR terminator of the PI protocols
+        """
+        return TerminatorFramer(b"\r")
+
     def process_response(
         self,
         data_name=None,
@@ -104,172 +150,104 @@ class AbstractProtocol(metaclass=abc.ABCMeta):
         frame_number=0,
         extra_info=None,
     ):
-        template = None
-        # Check for a format modifying template
-        if ":" in data_type:
-            data_type, template = data_type.split(":", 1)
-            log.debug(f"Got template {template} for {data_name} {raw_value}")
-        log.debug(f"Processing data_type: {data_type} for data_name: {data_name}, raw_value {raw_value}")
-        if data_type == "loop":
-            log.warning("loop not implemented...")
-            return [(data_name, None, data_units, extra_info)]
-        if data_type == "exclude" or data_type == "discard" or raw_value == "extra":
-            # Just ignore these ones
-            log.debug(f"Discarding {data_name}:{raw_value}")
-            return [(None, raw_value, data_units, extra_info)]
-        if data_type == "option":
-            try:
-                key = int(raw_value)
-                r = data_units[key]
-            except ValueError:
-                r = f"Unable to process to int: {raw_value}"
-                return [(None, r, "", None)]
-            except IndexError:
-                r = f"Invalid option: {key}"
-            return [(data_name, r, "", extra_info)]
-        if data_type == "hex_option":
-            key = int(raw_value[0])
-            if key < len(data_units):
-                r = data_units[key]
-            else:
-                r = f"Invalid hex_option: {key}"
-            return [(data_name, r, "", extra_info)]
-        if data_type == "flags":
-            log.debug("flags defn")
-            # [
-            #     "flags",
-            #     "Device Status",
-            #     [
-            #         "Is SBU Priority Version Added",
-            #         "Is SCC Firmware Updated",
-            #         "Is Load On",
-            #     ],
-            # ],
-            return_value = []
-            for i, flag in enumerate(raw_value):
-                return_value.append((data_units[i], int(chr(flag)), "bool", None))
-
-            # if flag != "" and flag != b'':
-            # msgs[resp_format[2][j]] = [int(flag), "bool"]
-            # print(j, int(flag))
-            return return_value
-        if data_type == "keyed":
-            log.debug("keyed defn")
-            # [
-            #     "keyed",
-            #     1,
-            #     "Command response flag",
-            #     {
-            #         "00": "OK",
-            #         "01": "Unknown ID",
-            #         "02": "Not supported",
-            #         "04": "Parameter Error",
-            #     },
-            # ],
-            key = ""
-            for x in raw_value:
-                key += f"{x:02x}"
-            if key in data_units:
-                r = data_units[key]
-            else:
-                r = f"Invalid key: {key}"
-            return [(data_name, r, "", None)]
-        if data_type == "str_keyed":
-            log.debug("str_keyed defn")
-            # [
-            #     "str_keyed",
-            #     "Device Mode",
-            #     {
-            #         "B": "Inverter (Battery) Mode",
-            #         "C": "PV charging Mode",
-            #         "D": "Shutdown Mode",
-            #         "F": "Fault Mode",
-            #         "G": "Grid Mode",
-            #         "L": "Line Mode",
-            #         "P": "Power on Mode",
-            #         "S": "Standby Mode",
-            #         "Y": "Bypass Mode",
-            #     },
-            # ]
-            key = raw_value.decode()
-            if key in data_units:
-                r = data_units[key]
-            else:
-                r = f"Invalid key: {key}"
-            return [(data_name, r, "", extra_info)]
-        format_string = f"{data_type}(raw_value)"
-        log.debug(f"Processing format string {format_string}")
-        try:
-            r = eval(format_string)
-        except ValueError as e:
-            log.info(f"Failed to eval format {format_string} (returning 0), error: {e}")
-            return [(data_name, 0, data_units, extra_info)]
-        except TypeError as e:
-            log.warning(f"Failed to eval format {format_string}, error: {e}")
-            return [(data_name, format_string, data_units, extra_info)]
-        if template is not None:
-            # eg template=r/1000
-            r = eval(template)
-        if "{" in data_name:
-            # eg "f'Frame Number {f:02d}'"
-            f = frame_number  # noqa: F841
-            data_name = eval(data_name)
-        return [(data_name, r, data_units, extra_info)]
-
-    def decode(self, response, command) -> dict:
         """
-        Take the raw response and turn it into a dict of name: value, unit entries
+        Decode a single raw_value as per the supplied definition
+        - returns a list of (data_name, value, data_units, extra_info) tuples
         """
+        field = FieldPlan(
+            data_type=data_type,
+            data_name=data_name,
+            data_units=data_units,
+            extra_info=extra_info,
+        )
+        return field.process(raw_value, frame_number)
+
+    def get_decode_plan(self, command_defn) -> CommandPlan:
+        """
+        Get the compiled decode plan for a command definition, compiling it on first use
+        """
+        plan = self._decode_plans.get(command_defn["name"])
+        if plan is None or plan.command_defn is not command_defn:
+            log.debug("Compiling decode plan for %s", command_defn["name"])
+            plan = CommandPlan(command_defn)
+            self._decode_plans[command_defn["name"]] = plan
+        return plan
+
+    def get_raw_response(self, response) -> str:
+        """
+        The response as a str, each byte as the character of the same value
+        """
+        if isinstance(response, (bytes, bytearray)):
+            return response.decode("latin-1")
+        return "".join(chr(item) if type(item) is int else item for item in response)
 
-        log.info(f"response passed to decode: {response}")
-        msgs = {}
+    def decode(self, response, command, lean=False, as_reading=False, request=None) -> dict:
+        """
+        Take the raw response and turn it into a dict of name: value, unit entries
+        - lean: do not include the raw_response in the result
+        - as_reading: return a Reading (values with a shared schema) instead of a dict, the values are
+          filled in against the schema of the last decode of the command, so no per field lists are made
+        - request: the CommandRequest for the command, built from command if not supplied
+        """
+        if request is None:
+            request = self.get_request(command)
+        if not as_reading:
+            msgs = DecodeDict()
+            self._decode(response, command, lean, request, msgs)
+            return msgs
+        # the values are filled in against the layout of the last decode of the command
+        plan = self.get_decode_plan(request.command_defn) if request.command_defn is not None else None
+        msgs = ReadingBuilder(plan.schema if plan is not None else None)
+        self._decode(response, command, lean, request, msgs)
+        reading = msgs.build()
+        if plan is not None:
+            plan.schema = reading.schema
+        return reading
+
+    def _decode(self, response, command, lean, request, msgs):
+        """
+        Decode response into msgs, a DecodeDict or ReadingBuilder
+        """
+        log.info("response passed to decode: %s", response)
 
         # Add metadata
-        msgs["_command"] = command
-        # Check for a stored command definition
-        command_defn = self.get_command_defn(command)
+        msgs.set_metadata("_command", command)
+        # Check for a command definition
+        command_defn = request.command_defn
         if command_defn is not None:
-            msgs["_command_description"] = command_defn["description"]
+            msgs.set_metadata("_command_description", command_defn["description"])
             len_command_defn = len(command_defn["response"])
 
         # Check response is valid
-        valid, _msg = self.check_response_valid(response)
+        valid, _msg = self.check_response_valid(response, request)
         if not valid:
-            msgs.update(_msg)
-            log.info(f"validity check fail: {_msg}")
-            return msgs
+            for key, item in _msg.items():
+                msgs.add(key, *item)
+            log.info("validity check fail: %s", _msg)
+            return
 
         # Add Raw response
-        _response = b""
-        for item in response:
-            if type(item) is int:
-                _response += chr(item).encode()
-            else:
-                _response += item.encode()
-        raw_response = _response.decode("utf-8")
-        msgs["raw_response"] = [raw_response, ""]
+        if not lean:
+            msgs.set_metadata("raw_response", [self.get_raw_response(response), ""])
 
         if command_defn is None:
             # No definition, so just return the data
             len_command_defn = 0
-            log.debug(f"No definition for command {command}, (splitted) raw response returned")
-            msgs["WARNING"] = [
-                f"No definition for command {command} in protocol {self._protocol_id}",
-                "",
-            ]
-            msgs["response"] = [raw_response, ""]
-            return msgs
+            log.debug("No definition for command %s, (splitted) raw response returned", command)
+            msgs.add("WARNING", f"No definition for command {command} in protocol {self._protocol_id}", "")
+            msgs.add("response", self.get_raw_response(response), "")
+            return
 
         # Determine the type of response
         if "response_type" in command_defn:
             response_type = command_defn["response_type"]
         else:
             response_type = "DEFAULT"
-        log.info(f"Processing response of type {response_type}")
+        log.info("Processing response of type %s", response_type)
 
         # Split the response into individual responses
-        responses = self.get_responses(response)
-        log.debug(f"trimmed and split responses: {responses}")
+        responses = self.get_responses(response, request)
+        log.debug("trimmed and split responses: %s", responses)
 
         # Decode response based on stored command definition and type
         # process default response type
@@ -294,39 +272,36 @@ class AbstractProtocol(metaclass=abc.ABCMeta):
                 # log.debug(f'result {result}, key {key}, resp_format {resp_format}')
                 # Process results
                 if result == "NAK":
-                    msgs[f"WARNING{i}"] = [
-                        f"Command {command} was rejected",
-                        "",
-                    ]
+                    msgs.add(f"WARNING{i}", f"Command {command} was rejected", "")
                 elif resp_format[0] == "float":
                     try:
                         result = float(result)
                     except ValueError:
-                        log.debug(f"Error resolving {result} as float")
-                    msgs[key] = [result, resp_format[2]]
+                        log.debug("Error resolving %s as float", result)
+                    msgs.add(key, result, resp_format[2])
                 elif resp_format[0] == "int":
                     try:
                         result = int(result)
                     except ValueError:
-                        log.debug(f"Error resolving {result} as int")
-                    msgs[key] = [result, resp_format[2]]
+                        log.debug("Error resolving %s as int", result)
+                    msgs.add(key, result, resp_format[2])
                 elif resp_format[0] == "string":
-                    msgs[key] = [result, resp_format[2]]
+                    msgs.add(key, result, resp_format[2])
                 elif resp_format[0] == "10int":
                     if "--" in result:
                         result = 0
-                    msgs[key] = [float(result) / 10, resp_format[2]]
+                    msgs.add(key, float(result) / 10, resp_format[2])
                 # eg. ['option', 'Output source priority', ['Utility first', 'Solar first', 'SBU first']],
                 elif resp_format[0] == "option":
-                    msgs[key] = [resp_format[2][int(result)], ""]
+                    msgs.add(key, resp_format[2][int(result)], "")
                 # eg. ['keyed', 'Machine type', {'00': 'Grid tie', '01': 'Off Grid', '10': 'Hybrid'}],
                 elif resp_format[0] == "keyed":
-                    msgs[key] = [resp_format[2][result], ""]
+                    msgs.add(key, resp_format[2][result], "")
                 # eg. ['flags', 'Device status', [ 'is_load_on', 'is_charging_on' ...
                 elif resp_format[0] == "flags":
                     for j, flag in enumerate(result):
                         # if flag != "" and flag != b'':
-                        msgs[resp_format[2][j]] = [int(flag), "bool"]
+                        msgs.add(resp_format[2][j], int(flag), "bool")
                 # eg. ['stat_flags', 'Warning status', ['Reserved', 'Inver...
                 elif resp_format[0] == "stat_flags":
                     output = ""
@@ -338,7 +313,7 @@ class AbstractProtocol(metaclass=abc.ABCMeta):
                         key = resp_format[2][j]
                         output = flag
                         if key:  # only add msg if key is something
-                            msgs[key] = [output, ""]
+                            msgs.add(key, output, "")
                 # eg. ['enflags', 'Device Status', {'a': {'name': 'Buzzer', 'state': 'disabled'},
                 elif resp_format[0] == "enflags":
                     # output = {}
@@ -355,7 +330,7 @@ class AbstractProtocol(metaclass=abc.ABCMeta):
                                 _key = resp_format[2][item]["name"]
                             else:
                                 _key = "unknown_{}".format(item)
-                            msgs[_key] = [status, ""]
+                            msgs.add(_key, status, "")
                     # msgs[key] = [output, '']
                 elif resp_format[0] == "multi":
                     for x, item in enumerate(result):
@@ -366,20 +341,20 @@ class AbstractProtocol(metaclass=abc.ABCMeta):
                         if item_type == "option":
                             item_name = item_resp_format[1]
                             resolved_value = item_resp_format[2][item_value]
-                            msgs[item_name] = [resolved_value, ""]
+                            msgs.add(item_name, resolved_value, "")
                         elif item_type == "string":
                             item_name = item_resp_format[1]
-                            msgs[item_name] = [item_value, ""]
+                            msgs.add(item_name, item_value, "")
                         else:
                             print(f"item type {item_type} not defined")
                 elif command_defn["type"] == "SETTER":
                     # _key = "{}".format(command_defn["name"]).lower().replace(" ", "_")
                     _key = command_defn["name"]
-                    msgs[_key] = [result, ""]
+                    msgs.add(_key, result, "")
                 else:
-                    log.info(f"Processing unknown response format {result}")
-                    msgs[i] = [result, ""]
-            return msgs
+                    log.info("Processing unknown response format %s", result)
+                    msgs.add(i, result, "")
+            return
 
         # Check for multiple frame type responses
         if response_type == "MULTIFRAME-POSITIONAL":
@@ -387,171 +362,77 @@ class AbstractProtocol(metaclass=abc.ABCMeta):
             # MULTIFRAME-POSITIONAL - multiple frames of responses are not separated and are determined by the position in the response
             # each frame has the same definition
             frame_count = len(responses)
-            log.debug(f"got {frame_count} frames")
+            log.debug("got %s frames", frame_count)
             # the responses are the frames
             frames = responses
         else:
             frames = [responses]
             frame_count = 1
 
+        plan = self.get_decode_plan(command_defn)
+        fields = plan.fields
+
         for frame_number, frame in enumerate(frames):
+            # values already converted by a RecordLayout struct unpack
+            decoded = frame.decoded if isinstance(frame, UnpackedRecord) else ()
+            len_decoded = len(decoded)
+
+            if frame and response_type != "KEYED":
+                # check for extra definitions...
+                extra_responses_needed = len_command_defn - len(frame)
+                if extra_responses_needed > 0:
+                    for _ in range(extra_responses_needed):
+                        frame.append("extra")
 
             for i, response in enumerate(frame):
-                extra_info = None
                 if response_type == "KEYED":
-                    log.debug("Processing KEYED type responses")
                     # example defn ["V", "Main or channel 1 (battery) voltage", "V", "float:r/1000"]
                     # example response data [b'H1', b'-32914']
                     if len(response) <= 1:
                         # Not enough data in response, so ignore
                         continue
-                    lookup_key = response[0]
-                    raw_value = response[1]
-                    response_defn = get_resp_defn(lookup_key, command_defn["response"])
-                    if response_defn is None:
+                    field = plan.keyed_field(response[0])
+                    if field is None:
                         # No definition for this key, so ignore???
-                        log.warn(f"No definition for {response}")
+                        log.warning("No definition for %s", response)
                         continue
-                    # key = response_defn[0] #0
-                    data_type = response_defn[3]  # 1
-                    data_name = response_defn[1]  # 2
-                    data_units = response_defn[2]  # 3
-
-                elif response_type == "SEQUENTIAL":
-                    log.debug("Processing SEQUENTIAL type responses")
-                    # check for extra definitions...
-                    extra_responses_needed = len(command_defn["response"]) - len(frame)
-                    if extra_responses_needed > 0:
-                        for _ in range(extra_responses_needed):
-                            frame.append("extra")
-                    # example ["int", "Energy produced", "Wh"]
-
-                    # Check if we are past the 'known' responses
-                    if i >= len_command_defn:
-                        response_defn = ["str", f"Unknown value in response {i}", ""]
-                    else:
-                        response_defn = command_defn["response"][i]
-                    log.debug(f"Got defn {response_defn}")
-                    raw_value = response
-                    # spacer = response_defn[0] #0
-                    data_type = response_defn[0]  # 1
-                    data_name = response_defn[1]  # 2
-                    data_units = response_defn[2]  # 3
-
-                elif response_type == "INDEXED":
-                    log.debug("Processing INDEXED type responses")
-                    # [1, "AC Input Voltage", "float", "V", {icon: blah}]
-                    # check for extra definitions...
-                    extra_responses_needed = len(command_defn["response"]) - len(frame)
-                    if extra_responses_needed > 0:
-                        for _ in range(extra_responses_needed):
-                            frame.append("extra")
-
-                    # Check if we are past the 'known' responses
-                    if i >= len_command_defn:
-                        if not response:
-                            continue
-                        response_defn = [
-                            i + 1,
-                            f"Unknown value in response {i+1}",
-                            "str",
-                            "",
-                        ]
-                    else:
-                        response_defn = command_defn["response"][i]
-                    log.debug(f"Got defn {response_defn}")
+                    raw_value = response[1]
+                elif i < len_command_defn:
+                    # SEQUENTIAL, INDEXED, POSITIONAL, MULTIFRAME-POSITIONAL
+                    # - responses are determined by the position in the response
+                    field = fields[i]
                     raw_value = response
-                    # data_posi = get_value(response_defn, 0)
-                    data_name = get_value(response_defn, 1)
-                    data_type = get_value(response_defn, 2)
-                    data_units = get_value(response_defn, 3)
-                    extra_info = get_value(response_defn, 4)
-
-                    # print(f"{data_type=}, {data_name=}, {raw_value=}")
-                elif response_type in ["POSITIONAL", "MULTIFRAME-POSITIONAL"]:
-                    log.debug("Processing POSITIONAL type responses")
-                    # check for extra definitions...
-                    extra_responses_needed = len(command_defn["response"]) - len(frame)
-                    if extra_responses_needed > 0:
-                        for _ in range(extra_responses_needed):
-                            frame.append("extra")
-                    # POSITIONAL - responses are not separated and are determined by the position in the response
-                    # example defn :
-                    #   ["discard", 1, "start flag", ""],
-                    #   ["BigHex2Short", 2, "Battery Bank Voltage", "V"],
-                    # example response data:
-                    #   [b'\xa5', b'\x01', b'\x90', b'\x08', b'\x01\t', b'\x00\x00', b'u\xcf', b'\x03\x99', b'']
+                else:
+                    # past the 'known' responses
+                    if response_type == "INDEXED" and not response:
+                        continue
+                    field = plan.unknown_field(i)
                     raw_value = response
-                    # Check if we are past the 'known' responses
-                    if i >= len_command_defn:
-                        response_defn = ["str", 1, f"Unknown value in response {i}", ""]
-                    else:
-                        response_defn = command_defn["response"][i]
-                    if response_defn is None:
-                        # No definition for this key, so ignore???
-                        log.warn(f"No definition for {response}")
-                        response_defn = [
-                            "str",
-                            1,
-                            f"Undefined value in response {i}",
-                            "",
-                        ]
-                    log.debug(f"Got defn {response_defn}")
-                    # length = response_defn[1] #0
-                    data_type = response_defn[0]  # 1
-                    data_name = response_defn[2]  # 2
-                    data_units = response_defn[3]  # 3
 
+                data_name = field.data_name
+                extra_info = field.extra_info
                 # Check for lookup
-                if data_type.startswith("lookup"):
-                    log.debug("processing lookup...")
-                    log.info(
-                        f"Processing data_type: '{data_type}' for data_name: '{data_name}', raw_value '{raw_value}'"
-                    )
-                    m = msgs
-                    template = data_type.split(":", 1)[1]
-                    log.debug(f"Got template {template} for {data_name} {raw_value}")
-                    lookup = eval(template)
-                    log.debug(f"looking up values for: {lookup}")
-                    value, data_units = m[lookup]
+                if field.kind == "lookup":
+                    # eg "lookup:'Voltage Cell{:02d}'.format(m['Highest Cell'][0])"
+                    lookup = field.expression(msgs)
+                    value, data_units = msgs[lookup]
                     if data_name is not None:
-                        msgs[data_name] = [value, data_units, extra_info]
-                elif data_type.startswith("info"):
-                    log.debug("processing info...")
-                    # print(
-                    #    f"Processing {data_type=} for {data_name=}, {data_units=} {response=} {command=} {self._command_value=}"
-                    # )
-                    template = data_type.split(":", 1)[1]
-                    # Provide cv as shortcut to self._command_value for info fields
-                    cv = self._command_value  # noqa: F841
-                    value = eval(template)
+                        msgs.add(data_name, value, data_units, extra_info)
+                elif field.kind == "info":
+                    # Provide cv as shortcut to the request command_value for info fields
+                    value = field.expression(request.command_value)
                     if data_name is not None:
-                        msgs[data_name] = [value, data_units, extra_info]
+                        msgs.add(data_name, value, field.data_units, extra_info)
                 else:
                     # Process response
-                    processed_responses = self.process_response(
-                        data_name=data_name,
-                        raw_value=raw_value,
-                        data_units=data_units,
-                        data_type=data_type,
-                        frame_number=frame_number,
-                        extra_info=extra_info,
-                    )
-                    # data_name, value, data_units = self.process_response(
-                    #     data_name=data_name,
-                    #     raw_value=raw_value,
-                    #     data_units=data_units,
-                    #     data_type=data_type,
-                    #     frame_number=frame_number,
-                    # )
-                    # print(data_type, data_name, raw_value, value)
-                    for item in processed_responses:
+                    if i < len_decoded and decoded[i]:
+                        items = field.process_value(raw_value, frame_number)
+                    else:
+                        items = field.process(raw_value, frame_number)
+                    for item in items:
                         data_name, value, data_units, extra_info = item
                         if data_name is not None:
                             if extra_info:
-                                msgs[data_name] = [value, data_units, extra_info]
+                                msgs.add(data_name, value, data_units, extra_info)
                             else:
-                                msgs[data_name] = [value, data_units]
-            # print(f"{i=} {response=} {len(command_defn['response'])}")
-
-        return msgs
+                                msgs.add(data_name, value, data_units)
@@ -0,0 +1,74 @@
+import logging
+import re
+from functools import lru_cache
+
+log = logging.getLogger("command_index")
+
+LOOKUP_CACHE_SIZE = 256
+
+
+class CommandIndex:
+    """
+    CommandIndex - fast lookup of command definitions for a protocol
+    - exact (non-regex) commands are found with a dict lookup
+    - regex commands are matched with a single precompiled alternation
+    - results of lookups are held in an LRU cache
+    """
+
+    def __init__(self, commands) -> None:
+        self._commands = commands
+        self._size = len(commands)
+        self._exact = {}
+        self._regex_defns = []
+        self._regex_patterns = []
+        self._regex_offsets = []
+        _alternatives = []
+        for name, defn in commands.items():
+            if "regex" not in defn:
+                self._exact[name] = defn
+                continue
+            if not defn["regex"]:
+                continue
+            # wrap each regex in a named group so the matching command can be identified
+            alternative = f"(?P<c{len(self._regex_defns)}>{defn['regex']})"
+            self._regex_defns.append(defn)
+            self._regex_patterns.append(re.compile(defn["regex"]))
+            _alternatives.append(alternative)
+        try:
+            self._regex = re.compile("|".join(_alternatives)) if _alternatives else None
+            if self._regex is not None:
+                # the group(1) of a command regex follows its wrapping named group
+                self._regex_offsets = [self._regex.groupindex[f"c{i}"] + 1 for i in range(len(_alternatives))]
+        except re.error as e:
+            # fall back to matching each regex in turn
+            log.info("Unable to combine command regexes (%s), matching individually", e)
+            self._regex = None
+        self.lookup = lru_cache(maxsize=LOOKUP_CACHE_SIZE)(self._lookup)
+
+    def __str__(self):
+        return f"CommandIndex: {len(self._exact)} exact commands, {len(self._regex_defns)} regex commands"
+
+    def is_for(self, commands) -> bool:
+        """
+        Check this index was built from (the current state of) commands
+        """
+        return commands is self._commands and len(commands) == self._size
+
+    def _lookup(self, command):
+        """
+        Find the definition for command
+        - returns (command_defn, command_value), command_value is None unless a regex command matched
+        """
+        if command in self._exact:
+            return self._exact[command], None
+        if self._regex is not None:
+            match = self._regex.match(command)
+            if match:
+                index = int(match.lastgroup[1:])
+                return self._regex_defns[index], match.group(self._regex_offsets[index])
+            return None, None
+        for index, _re in enumerate(self._regex_patterns):
+            match = _re.match(command)
+            if match:
+                return self._regex_defns[index], match.group(1)
+        return None, None
@@ -0,0 +1,30 @@
+class CommandRequest:
+    """
+    CommandRequest - the state of a single command being run with a protocol
+    - built by AbstractProtocol.get_request and passed through
+      get_full_command -> send_and_receive -> decode
+    - keeping this state out of the protocol allows one protocol instance to
+      be used for many ports concurrently
+    """
+
+    __slots__ = ("command", "command_defn", "command_value", "full_command")
+
+    def __init__(self, command, command_defn=None, command_value=None, full_command=None):
+        self.command = command
+        self.command_defn = command_defn
+        # the value captured by the regex of a command, eg 230 for PBT230
+        self.command_value = command_value
+        self.full_command = full_command
+
+    def __repr__(self):
+        name = self.command_defn["name"] if self.command_defn is not None else None
+        return f"CommandRequest(command={self.command}, defn={name}, value={self.command_value})"
+
+    @property
+    def response_type(self):
+        """
+        The response_type of the command definition, None if there is no definition
+        """
+        if self.command_defn is None:
+            return None
+        return self.command_defn.get("response_type", "DEFAULT")
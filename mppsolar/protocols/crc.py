@@ -0,0 +1,95 @@
+import logging
+from binascii import crc_hqx
+
+log = logging.getLogger("crc")
+
+# CRC bytes that PI inverters do not accept (they are framing characters), these are incremented
+PI_RESERVED_BYTES = (0x28, 0x0D, 0x0A)  # '(' '\r' '\n'
+
+
+def _build_crc16_table(polynomial):
+    """
+    Build the 256 entry byte table for a msb first 16 bit CRC
+    """
+    table = []
+    for byte in range(256):
+        crc = byte << 8
+        for _ in range(8):
+            if crc & 0x8000:
+                crc = ((crc << 1) ^ polynomial) & 0xFFFF
+            else:
+                crc = (crc << 1) & 0xFFFF
+        table.append(crc)
+    return tuple(table)
+
+
+# CRC-16/XMODEM as used by the PI protocols
+CRC_PI_TABLE = _build_crc16_table(0x1021)
+
+
+def _pi_escape(crc):
+    """
+    Split a PI CRC into [high, low] bytes, incrementing any reserved bytes
+    """
+    crc_high = (crc >> 8) & 0xFF
+    crc_low = crc & 0xFF
+    if crc_low in PI_RESERVED_BYTES:
+        crc_low += 1
+    if crc_high in PI_RESERVED_BYTES:
+        crc_high += 1
+    return [crc_high, crc_low]
+
+
+def crc_pi_table(data):
+    """
+    Calculate the PI CRC of data one byte at a time using CRC_PI_TABLE
+    - data can be bytes, a list of ints or a str
+    """
+    crc = 0
+    table = CRC_PI_TABLE
+    for c in data:
+        if type(c) is str:
+            c = ord(c)
+        crc = ((crc << 8) & 0xFFFF) ^ table[(crc >> 8) ^ c]
+    return _pi_escape(crc)
+
+
+def crc_pi(data):
+    """
+    Calculate the PI CRC of data, returns [crc_high, crc_low]
+    - bytes like data uses binascii.crc_hqx (the same polynomial), anything else uses the table
+    """
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return _pi_escape(crc_hqx(data, 0))
+    return crc_pi_table(data)
+
+
+def crc8(data):
+    """
+    Generate 8 bit CRC (sum of the bytes) of data
+    """
+    return sum(data) & 0xFF
+
+
+def crc8_plus1(data):
+    """
+    Generate 8 bit CRC of data + 1
+    eg as used in REVO PI30 protocol
+    """
+    return (sum(data) + 1) & 0xFF
+
+
+def crc_jk232(data):
+    """
+    Generate JK RS232 / RS485 CRC, returns [crc_high, crc_low]
+    - the sum of the bytes, inverted plus 1
+    """
+    crc = (sum(data) ^ 0xFFFF) + 1
+    return [(crc >> 8) & 0xFF, crc & 0xFF]
+
+
+def daly_checksum(data):
+    """
+    Generate Daly checksum (sum of the bytes) of data
+    """
+    return sum(data) & 0xFF
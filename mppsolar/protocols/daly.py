@@ -1,8 +1,10 @@
 import logging
+from types import MappingProxyType
 from typing import Tuple
 
-from .abstractprotocol import AbstractProtocol
-from .protocol_helpers import crc8 as dalyChecksum
+from .abstractprotocol import AbstractProtocol, cache_full_command
+from .crc import daly_checksum as dalyChecksum
+from .framing import LengthFramer
 
 # from .pi30 import COMMANDS
 
@@ -198,7 +200,7 @@ class daly(AbstractProtocol):
         super().__init__()
         self._protocol_id = b"DALY"
         self.module_address = bytes.fromhex("80")
-        self.COMMANDS = COMMANDS
+        self.COMMANDS = MappingProxyType(COMMANDS)
         self.STATUS_COMMANDS = [
             "SOC",
         ]
@@ -207,23 +209,21 @@ class daly(AbstractProtocol):
         ]
         self.DEFAULT_COMMAND = "SOC"
 
-    def get_full_command(self, command) -> bytes:
+    @cache_full_command
+    def get_full_command(self, command, request=None) -> bytes:
         """
         Override the default get_full_command as its different
         """
         log.info(
             f"Using protocol {self._protocol_id} with {len(self.COMMANDS)} commands"
         )
-        # These need to be set to allow other functions to work`
-        self._command = command
-        self._command_defn = self.get_command_defn(command)
-        # End of required variables setting
-        if self._command_defn is None:
+        command_defn = request.command_defn
+        if command_defn is None:
             return None
 
         # DALY
         # startFlag = bytes.fromhex("A5")
-        commandID = bytes.fromhex(self._command_defn["command_code"])
+        commandID = bytes.fromhex(command_defn["command_code"])
         dataLength = bytes.fromhex("08")
         data = bytes.fromhex("00" * 8)
         cmd = startFlag + self.module_address + commandID + dataLength + data
@@ -233,16 +233,31 @@ class daly(AbstractProtocol):
         log.debug(f"full command: {cmd}")
         return cmd
 
-    def is_multiframe(self, response) -> bool:
+    def is_multiframe(self, response, request=None) -> bool:
+        command_defn = request.command_defn if request is not None else None
         # startFlag = bytes.fromhex("A5")
+        if command_defn is None:
+            return False
         if (
-            "response_length" in self._command_defn
-            and len(response) > self._command_defn["response_length"]
+            "response_length" in command_defn
+            and len(response) > command_defn["response_length"]
         ):
             return True
         return False
 
-    def check_response_valid(self, response) -> Tuple[bool, dict]:
+    def get_response_framer(self, request=None):
+        """
+        Daly frames are start flag, module address, command id, data length, data and checksum
+        - MULTIFRAME responses end when the BMS stops sending, unless the definition
+          has the number of frames as response_frames
+        """
+        command_defn = request.command_defn if request is not None else None
+        frames = 1
+        if command_defn is not None and command_defn["response_type"] == "MULTIFRAME-POSITIONAL":
+            frames = command_defn.get("response_frames")
+        return LengthFramer(startFlag, header_length=4, length_offset=3, trailer_length=1, frames=frames)
+
+    def check_response_valid(self, response, request=None) -> Tuple[bool, dict]:
         """
         DALY protocol - checksum is sum of bytes
         """
@@ -251,7 +266,7 @@ class daly(AbstractProtocol):
             return False, {"validity check": ["Error: Response was empty", ""]}
 
         # Check to see if the response is a multi frame response
-        if self.is_multiframe(response):
+        if self.is_multiframe(response, request):
             log.info("is multiframe response - assuming ok for now")
             # TODO: fix check_response_valid for multiframe results
             return True, {}
@@ -274,43 +289,33 @@ class daly(AbstractProtocol):
                 ]
             }
 
-    def get_responses(self, response):
+    def get_responses(self, response, request=None):
         """
         Override the default get_responses as its different
         """
+        command_defn = request.command_defn if request is not None else None
         responses = []
         # remove \n
         # response = response.replace(b"\n", b"")
 
         if (
-            self._command_defn is not None
-            and self._command_defn["response_type"] == "MULTIFRAME-POSITIONAL"
+            command_defn is not None
+            and command_defn["response_type"] == "MULTIFRAME-POSITIONAL"
         ):
             # Have multiple frames of positional data
             # Split into frames
-            frame_size = self._command_defn["response_length"]
-            frames = [
-                response[i : i + frame_size]
-                for i in range(0, len(response), frame_size)
-            ]
-            log.info(f"Multi frame response with {len(frames)} frames")
+            frame_size = command_defn["response_length"]
+            layout = self.get_decode_plan(command_defn).layout
             # Loop through each frame and process as per definition
-            for frame in frames:
-                if len(frame) == 0:
-                    continue
-                items = []
-                for defn in self._command_defn["response"]:
-                    size = defn[1]
-                    item = frame[:size]
-                    items.append(item)
-                    frame = frame[size:]
-                responses.append(items)
-            # print(responses)
+            for offset in range(0, len(response), frame_size):
+                length = min(frame_size, len(response) - offset)
+                responses.append(layout.split(response, offset, length))
+            log.info("Multi frame response with %s frames", len(responses))
             return responses
 
         if (
-            self._command_defn is not None
-            and self._command_defn["response_type"] == "POSITIONAL"
+            command_defn is not None
+            and command_defn["response_type"] == "POSITIONAL"
         ):
             # Have a POSITIONAL type response, so need to break it up...
             # example defn :
@@ -321,11 +326,7 @@ class daly(AbstractProtocol):
             #   ["discard", 1, "data length", ""],
             # ]
             # example response data b"\xa5\x01\x90\x08\x02\x10\x00\x00uo\x03\xbc\xf3",
-            for defn in self._command_defn["response"]:
-                size = defn[1]
-                item = response[:size]
-                responses.append(item)
-                response = response[size:]
-            return responses
+            layout = self.get_decode_plan(command_defn).layout
+            return layout.split(response)
         else:
             return bytearray(response)
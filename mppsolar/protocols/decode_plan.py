@@ -0,0 +1,394 @@
+import builtins
+import calendar  # noqa: F401
+import logging
+import struct
+
+from ..helpers import get_value
+from .protocol_helpers import BigHex2Short, BigHex2Float  # noqa: F401
+from .protocol_helpers import LittleHex2Float, LittleHex2Short  # noqa: F401
+from .protocol_helpers import LittleHex2UInt, LittleHex2Int  # noqa: F401
+from .protocol_helpers import Hex2Ascii, Hex2Int, Hex2Str  # noqa: F401
+from .protocol_helpers import uptime  # noqa: F401
+
+log = logging.getLogger("decode_plan")
+
+# data_type, template and data_name expressions in the command definitions
+# are resolved against the names available in this module
+NAMESPACE = globals()
+
+KEYED_TYPES = ("option", "hex_option", "flags", "keyed", "str_keyed")
+
+# binary helpers that can be replaced by a struct format code
+# data_type: (byte order, format code, size)
+STRUCT_CODES = {
+    "LittleHex2Short": ("<", "h", 2),
+    "BigHex2Short": (">", "h", 2),
+    "LittleHex2UInt": ("<", "I", 4),
+    "LittleHex2Int": ("<", "i", 4),
+    "LittleHex2Float": ("<", "f", 4),
+    "BigHex2Float": (">", "I", 4),
+    "Hex2Int": ("", "B", 1),
+}
+
+
+def _resolve(name):
+    """
+    Find the callable for a data_type name, or None if it cannot be resolved now
+    """
+    if not name.isidentifier():
+        return None
+    if name in NAMESPACE:
+        return NAMESPACE[name]
+    return getattr(builtins, name, None)
+
+
+def _compile_lambda(arg, expression):
+    """
+    Build a single argument function from an expression in a command definition
+    eg _compile_lambda("r", "r/1000") is equivalent to lambda r: r/1000
+    """
+    return eval(f"lambda {arg}: {expression}", NAMESPACE)
+
+
+def _identity(value):
+    return value
+
+
+class FieldPlan:
+    """
+    FieldPlan - a single response definition entry compiled for repeated decoding
+    - the converter, scaling template and name formatter are built once
+    - process() returns the same list of (name, value, units, extra_info) tuples as
+      AbstractProtocol.process_response
+    """
+
+    __slots__ = (
+        "data_type",
+        "data_name",
+        "data_units",
+        "extra_info",
+        "kind",
+        "format_string",
+        "convert",
+        "template",
+        "expression",
+        "name_formatter",
+    )
+
+    def __init__(self, data_type=None, data_name=None, data_units=None, extra_info=None):
+        self.data_name = data_name
+        self.data_units = data_units
+        self.extra_info = extra_info
+        self.template = None
+        self.expression = None
+        self.convert = None
+        self.name_formatter = None
+        self.format_string = None
+
+        # lookup and info fields are evaluated against the decode state
+        if data_type.startswith("lookup") or data_type.startswith("info"):
+            self.kind = "lookup" if data_type.startswith("lookup") else "info"
+            self.data_type = data_type
+            self.expression = _compile_lambda("m" if self.kind == "lookup" else "cv", data_type.split(":", 1)[1])
+            return
+
+        # Check for a format modifying template
+        template = None
+        if ":" in data_type:
+            data_type, template = data_type.split(":", 1)
+        self.data_type = data_type
+
+        if data_type == "loop":
+            self.kind = "loop"
+        elif data_type == "exclude" or data_type == "discard":
+            self.kind = "discard"
+        elif data_type in KEYED_TYPES:
+            self.kind = data_type
+        else:
+            self.kind = "value"
+            self.format_string = f"{data_type}(raw_value)"
+            if data_type == "":
+                # eval("(raw_value)") just returns the raw value
+                self.convert = _identity
+            else:
+                self.convert = _resolve(data_type)
+            if template is not None:
+                self.template = _compile_lambda("r", template)
+            if data_name and "{" in data_name:
+                # eg "f'Frame Number {f:02d}'"
+                self.name_formatter = _compile_lambda("f", data_name)
+
+    def __repr__(self):
+        return f"FieldPlan({self.kind}, {self.data_type}, {self.data_name})"
+
+    def _convert(self, raw_value):
+        if self.convert is None:
+            # data_type not resolvable when the plan was built, so defer to eval
+            return eval(self.format_string, NAMESPACE, {"raw_value": raw_value})
+        return self.convert(raw_value)
+
+    def process_value(self, r, frame_number=0):
+        """
+        Apply the template and name formatter to an already converted value
+        """
+        data_name = self.data_name
+        if self.template is not None:
+            # eg template=r/1000
+            r = self.template(r)
+        if self.name_formatter is not None:
+            data_name = self.name_formatter(frame_number)
+        return [(data_name, r, self.data_units, self.extra_info)]
+
+    def process(self, raw_value, frame_number=0):
+        kind = self.kind
+        data_name = self.data_name
+        data_units = self.data_units
+        extra_info = self.extra_info
+        if kind == "value":
+            if raw_value == "extra":
+                return [(None, raw_value, data_units, extra_info)]
+            try:
+                r = self._convert(raw_value)
+            except ValueError as e:
+                log.info("Failed to eval format %s (returning 0), error: %s", self.format_string, e)
+                return [(data_name, 0, data_units, extra_info)]
+            except TypeError as e:
+                log.warning("Failed to eval format %s, error: %s", self.format_string, e)
+                return [(data_name, self.format_string, data_units, extra_info)]
+            if self.template is not None:
+                # eg template=r/1000
+                r = self.template(r)
+            if self.name_formatter is not None:
+                data_name = self.name_formatter(frame_number)
+            return [(data_name, r, data_units, extra_info)]
+        if kind == "loop":
+            log.warning("loop not implemented...")
+            return [(data_name, None, data_units, extra_info)]
+        if kind == "discard" or raw_value == "extra":
+            # Just ignore these ones
+            return [(None, raw_value, data_units, extra_info)]
+        if kind == "option":
+            try:
+                key = int(raw_value)
+                r = data_units[key]
+            except ValueError:
+                r = f"Unable to process to int: {raw_value}"
+                return [(None, r, "", None)]
+            except IndexError:
+                r = f"Invalid option: {key}"
+            return [(data_name, r, "", extra_info)]
+        if kind == "hex_option":
+            key = int(raw_value[0])
+            if key < len(data_units):
+                r = data_units[key]
+            else:
+                r = f"Invalid hex_option: {key}"
+            return [(data_name, r, "", extra_info)]
+        if kind == "flags":
+            return [(data_units[i], int(chr(flag)), "bool", None) for i, flag in enumerate(raw_value)]
+        if kind == "keyed":
+            key = "".join(f"{x:02x}" for x in raw_value)
+            if key in data_units:
+                r = data_units[key]
+            else:
+                r = f"Invalid key: {key}"
+            return [(data_name, r, "", None)]
+        if kind == "str_keyed":
+            key = raw_value.decode()
+            if key in data_units:
+                r = data_units[key]
+            else:
+                r = f"Invalid key: {key}"
+            return [(data_name, r, "", extra_info)]
+        raise ValueError(f"FieldPlan kind {kind} cannot be processed")
+
+
+def _field_for_defn(response_type, defn, index):
+    """
+    Build the FieldPlan for the response definition at index for the supplied response_type
+    """
+    if response_type == "SEQUENTIAL":
+        # example ["int", "Energy produced", "Wh"]
+        return FieldPlan(data_type=defn[0], data_name=defn[1], data_units=defn[2])
+    if response_type == "INDEXED":
+        # example [1, "AC Input Voltage", "float", "V", {icon: blah}]
+        return FieldPlan(
+            data_name=get_value(defn, 1),
+            data_type=get_value(defn, 2),
+            data_units=get_value(defn, 3),
+            extra_info=get_value(defn, 4),
+        )
+    if response_type == "KEYED":
+        # example ["V", "Main or channel 1 (battery) voltage", "V", "float:r/1000"]
+        return FieldPlan(data_type=defn[3], data_name=defn[1], data_units=defn[2])
+    # POSITIONAL and MULTIFRAME-POSITIONAL
+    # example ["BigHex2Short", 2, "Battery Bank Voltage", "V"]
+    if defn is None:
+        log.warning("No definition for response %s", index)
+        defn = ["str", 1, f"Undefined value in response {index}", ""]
+    return FieldPlan(data_type=defn[0], data_name=defn[2], data_units=defn[3])
+
+
+class UnpackedRecord(list):
+    """
+    UnpackedRecord - the values of a POSITIONAL record split by a RecordLayout
+    - decoded[i] is True where the value has already been converted by the struct unpack
+    """
+
+    __slots__ = ("decoded",)
+
+    def __init__(self, values, decoded):
+        super().__init__(values)
+        self.decoded = decoded
+
+
+class RecordLayout:
+    """
+    RecordLayout - the byte offsets of the fields of a POSITIONAL response definition
+    - fields with a fixed size binary data_type are decoded with a single struct unpack_from call
+    - other fields (uptime, Hex2Ascii, discard etc) are sliced from the buffer at their offset
+    - lookup fields do not consume any of the response
+    """
+
+    __slots__ = ("slices", "size", "struct", "struct_positions", "decoded")
+
+    def __init__(self, response_defns, fields):
+        self.slices = []
+        self.struct_positions = []
+        offset = 0
+        byte_orders = {"<": 0, ">": 0}
+        codes = []
+        for defn, field in zip(response_defns, fields):
+            if field.kind == "lookup":
+                self.slices.append(None)
+                codes.append(None)
+                continue
+            size = defn[1]
+            self.slices.append((offset, offset + size))
+            code = STRUCT_CODES.get(field.data_type) if field.kind == "value" else None
+            if code is not None and (size < code[2] or (code[0] and size != code[2])):
+                # size does not suit the format (the helper will return 0 or fail), so leave to the helper
+                code = None
+            if code is not None and code[0]:
+                byte_orders[code[0]] += 1
+            codes.append(code)
+            offset += size
+        self.size = offset
+
+        # a struct format has a single byte order, any fields in the other order are converted individually
+        byte_order = ">" if byte_orders[">"] > byte_orders["<"] else "<"
+        struct_format = byte_order
+        position = 0
+        for span, code in zip(self.slices, codes):
+            if span is None:
+                self.struct_positions.append(None)
+                continue
+            size = span[1] - span[0]
+            if code is not None and code[0] in ("", byte_order):
+                struct_format += code[1]
+                if size > code[2]:
+                    struct_format += f"{size - code[2]}x"
+                self.struct_positions.append(position)
+                position += 1
+            else:
+                if size:
+                    struct_format += f"{size}x"
+                self.struct_positions.append(None)
+        self.struct = struct.Struct(struct_format) if position else None
+        self.decoded = [p is not None for p in self.struct_positions]
+
+    def __repr__(self):
+        return f"RecordLayout({len(self.slices)} fields, {self.size} bytes, {self.struct.format if self.struct else None})"
+
+    def split(self, buffer, offset=0, length=None, remainder=False):
+        """
+        Split the record in buffer[offset:offset+length] into a list with an item per field
+        - struct decodable fields are returned converted if the record is complete
+        - if remainder is set any bytes after the defined fields are appended as an extra item
+        """
+        if length is None:
+            length = len(buffer) - offset
+        end = offset + length
+        if self.struct is not None and length >= self.size:
+            values = self.struct.unpack_from(buffer, offset)
+            items = []
+            for span, position in zip(self.slices, self.struct_positions):
+                if span is None:
+                    items.append("lookup")
+                elif position is not None:
+                    items.append(values[position])
+                else:
+                    items.append(buffer[offset + span[0] : offset + span[1]])
+            decoded = self.decoded
+        else:
+            # incomplete record, so split as is and leave the helpers to deal with any short values
+            items = []
+            for span in self.slices:
+                if span is None:
+                    items.append("lookup")
+                else:
+                    items.append(buffer[min(offset + span[0], end) : min(offset + span[1], end)])
+            decoded = None
+        if remainder and offset + self.size < end:
+            items.append(buffer[offset + self.size : end])
+        if decoded is None:
+            return items
+        return UnpackedRecord(items, decoded)
+
+
+class CommandPlan:
+    """
+    CommandPlan - the response definitions of a command compiled into FieldPlans
+    - schema is the ResultSchema of the last Reading decoded with the plan, the layout the next is expected to have
+    """
+
+    __slots__ = ("command_defn", "response_type", "fields", "keyed_fields", "layout", "schema")
+
+    def __init__(self, command_defn):
+        self.command_defn = command_defn
+        self.schema = None
+        self.response_type = command_defn.get("response_type", "DEFAULT")
+        self.fields = []
+        self.keyed_fields = {}
+        self.layout = None
+        if self.response_type == "DEFAULT":
+            # DEFAULT responses are decoded inline by AbstractProtocol.decode
+            return
+        for index, defn in enumerate(command_defn["response"]):
+            field = _field_for_defn(self.response_type, defn, index)
+            self.fields.append(field)
+            if self.response_type == "KEYED":
+                # first definition for a key wins, as per get_resp_defn
+                self.keyed_fields.setdefault(defn[0], field)
+        if self.response_type in ("POSITIONAL", "MULTIFRAME-POSITIONAL"):
+            self.layout = RecordLayout(command_defn["response"], self.fields)
+
+    def __repr__(self):
+        return f"CommandPlan({self.command_defn.get('name')}, {self.response_type}, {len(self.fields)} fields)"
+
+    def keyed_field(self, key):
+        """
+        Get the FieldPlan for a KEYED response, returns None if key is empty
+        """
+        if not key:
+            return None
+        if type(key) is bytes:
+            try:
+                key = key.decode("utf-8")
+            except UnicodeDecodeError:
+                log.info("key decode error for %s", key)
+        field = self.keyed_fields.get(key)
+        if field is None:
+            # did not find definition for this key
+            log.info("No defn found for %s key", key)
+            field = FieldPlan(data_type="", data_name=key, data_units="")
+        return field
+
+    def unknown_field(self, index):
+        """
+        Get a FieldPlan for a response past the end of the definition
+        """
+        if self.response_type == "INDEXED":
+            # INDEXED responses are numbered from 1
+            return FieldPlan(data_type="str", data_name=f"Unknown value in response {index+1}", data_units="")
+        return FieldPlan(data_type="str", data_name=f"Unknown value in response {index}", data_units="")
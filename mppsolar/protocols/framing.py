@@ -0,0 +1,134 @@
+import logging
+from abc import ABC, abstractmethod
+
+log = logging.getLogger("framing")
+
+
+class Framer(ABC):
+    """
+    Framer - recognises when a response is complete
+    - frame_end(buffer) returns the length of the complete response at the start of buffer,
+      or None if more data is needed
+    - used by the IO classes to stop reading as soon as the response is complete
+    """
+
+    @abstractmethod
+    def frame_end(self, buffer):
+        raise NotImplementedError
+
+
+class TerminatorFramer(Framer):
+    """
+    TerminatorFramer - response ends with a terminator, eg b'\\r' for the PI protocols
+    """
+
+    def __init__(self, terminator=b"\r") -> None:
+        self.terminator = terminator
+
+    def __repr__(self):
+        return f"TerminatorFramer({self.terminator})"
+
+    def frame_end(self, buffer):
+        position = buffer.find(self.terminator)
+        if position == -1:
+            return None
+        return position + len(self.terminator)
+
+
+class LengthFramer(Framer):
+    """
+    LengthFramer - response is one or more frames that carry their own data length
+    - each frame is start byte, header (including the data length byte), data, trailer (checksum etc)
+    - frames=None means the number of frames is not known, so the response only ends
+      when the device stops sending (the reader inter byte timeout)
+    """
+
+    def __init__(self, start, header_length, length_offset, trailer_length, frames=1) -> None:
+        self.start = start
+        self.header_length = header_length
+        self.length_offset = length_offset
+        self.trailer_length = trailer_length
+        self.frames = frames
+
+    def __repr__(self):
+        return f"LengthFramer(start={self.start}, frames={self.frames})"
+
+    def frame_end(self, buffer):
+        if self.frames is None:
+            return None
+        # anything before the first start byte is left for the protocol to reject
+        offset = buffer.find(self.start)
+        if offset == -1:
+            return None
+        for _ in range(self.frames):
+            if len(buffer) <= offset + self.length_offset:
+                return None
+            offset += self.header_length + buffer[offset + self.length_offset] + self.trailer_length
+            if len(buffer) < offset:
+                return None
+        return offset
+
+
+class SORFramer(Framer):
+    """
+    SORFramer - fixed length record that begins with a start of record marker, eg the JK records
+    - if crc (a function of the record without the crc byte) is supplied the record is only
+      complete when the crc byte matches, otherwise the read continues until the timeout
+    """
+
+    def __init__(self, sor, length, crc=None) -> None:
+        self.sor = sor
+        self.length = length
+        self.crc = crc
+
+    def __repr__(self):
+        return f"SORFramer(sor={self.sor}, length={self.length})"
+
+    def frame_end(self, buffer):
+        offset = buffer.find(self.sor)
+        if offset == -1:
+            return None
+        end = offset + self.length
+        if len(buffer) < end:
+            return None
+        if self.crc is not None and self.crc(buffer[offset:end - 1]) != buffer[end - 1]:
+            log.debug("SORFramer: crc does not match for record at %s", offset)
+            return None
+        return end
+
+
+class VEDTextFramer(Framer):
+    """
+    VEDTextFramer - VE.Direct text protocol, the device sends blocks of 'label\\tvalue\\r\\n' lines
+    each ending with a 'Checksum\\t<byte>' record
+    - complete once blocks Checksum records have been received
+    - or after max_lines lines, if supplied
+    """
+
+    CHECKSUM = b"\r\nChecksum\t"
+
+    def __init__(self, blocks=2, max_lines=None) -> None:
+        self.blocks = blocks
+        self.max_lines = max_lines
+
+    def __repr__(self):
+        return f"VEDTextFramer(blocks={self.blocks}, max_lines={self.max_lines})"
+
+    def frame_end(self, buffer):
+        offset = 0
+        for _ in range(self.blocks):
+            position = buffer.find(self.CHECKSUM, offset)
+            if position == -1:
+                break
+            # include the checksum byte
+            offset = position + len(self.CHECKSUM) + 1
+            if len(buffer) < offset:
+                break
+        else:
+            return offset
+        if self.max_lines is not None and buffer.count(b"\n") >= self.max_lines:
+            position = -1
+            for _ in range(self.max_lines):
+                position = buffer.find(b"\n", position + 1)
+            return position + 1
+        return None
@@ -1,4 +1,5 @@
 import logging
+from types import MappingProxyType
 
 from .jkabstractprotocol import jkAbstractProtocol
 
@@ -160,7 +161,7 @@ class jk02(jkAbstractProtocol):
     def __init__(self, *args, **kwargs) -> None:
         super().__init__()
         self._protocol_id = b"JK02"
-        self.COMMANDS.update(NEW_COMMANDS)
+        self.COMMANDS = MappingProxyType({**self.COMMANDS, **NEW_COMMANDS})
         self.STATUS_COMMANDS = [
             "getCellData",
         ]
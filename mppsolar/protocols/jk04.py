@@ -1,4 +1,5 @@
 import logging
+from types import MappingProxyType
 
 from .jkabstractprotocol import jkAbstractProtocol
 
@@ -120,7 +121,7 @@ class jk04(jkAbstractProtocol):
     def __init__(self, *args, **kwargs) -> None:
         super().__init__()
         self._protocol_id = b"JK04"
-        self.COMMANDS.update(NEW_COMMANDS)
+        self.COMMANDS = MappingProxyType({**self.COMMANDS, **NEW_COMMANDS})
         self.STATUS_COMMANDS = [
             "getCellData",
         ]
@@ -1,7 +1,9 @@
 import logging
+from types import MappingProxyType
 
-from .abstractprotocol import AbstractProtocol
-from .protocol_helpers import crcJK232 as crc
+from .abstractprotocol import AbstractProtocol, cache_full_command
+from .crc import crc_jk232 as crc
+from .framing import LengthFramer
 
 
 log = logging.getLogger("jk232")
@@ -69,7 +71,7 @@ class jk232(AbstractProtocol):
     def __init__(self, *args, **kwargs) -> None:
         super().__init__()
         self._protocol_id = b"JK232"
-        self.COMMANDS = COMMANDS
+        self.COMMANDS = MappingProxyType(COMMANDS)
         self.STATUS_COMMANDS = [
             "getBalancerData",
         ]
@@ -78,19 +80,17 @@ class jk232(AbstractProtocol):
         ]
         self.DEFAULT_COMMAND = "getBalancerData"
 
-    def get_full_command(self, command) -> bytes:
+    @cache_full_command
+    def get_full_command(self, command, request=None) -> bytes:
         """
         Override the default get_full_command as its different
         """
         log.info(f"Using protocol {self._protocol_id} with {len(self.COMMANDS)} commands")
-        # These need to be set to allow other functions to work`
-        self._command = command
-        self._command_defn = self.get_command_defn(command)
-        # End of required variables setting
-        if self._command_defn is None:
+        command_defn = request.command_defn
+        if command_defn is None:
             # Maybe return a default here?
             return None
-        if "command_code" in self._command_defn:
+        if "command_code" in command_defn:
 
             # Read basic information and status
             # DD A5 03 00 FF FD 77
@@ -102,12 +102,12 @@ class jk232(AbstractProtocol):
             log.debug(f"cmd with start bit: {cmd}")
 
             # status 0xA5 means read, status 0x5A means write.
-            if self._command_defn["type"] == "SETTER":
+            if command_defn["type"] == "SETTER":
                 cmd[1] = 0x5A
             else:
                 cmd[1] = 0xA5
             # command code 0x03
-            command_code = int(self._command_defn["command_code"], 16)
+            command_code = int(command_defn["command_code"], 16)
             # Data length: 1 byte, indicating the effective length of the data carried in the frame.
             # Data content: N bytes, the content carried by the frame data, when the data length is 0, there is no such part.
             data = ""
@@ -124,15 +124,22 @@ class jk232(AbstractProtocol):
             log.debug(f"cmd with crc: {cmd}")
             return cmd
 
-    def get_responses(self, response):
+    def get_response_framer(self, request=None):
+        """
+        Response is start byte, command code, status, data length, data, 2 byte crc and stop byte
+        """
+        return LengthFramer(b"\xdd", header_length=4, length_offset=3, trailer_length=3)
+
+    def get_responses(self, response, request=None):
         """
         Override the default get_responses as its different
         """
+        command_defn = request.command_defn if request is not None else None
         responses = []
         # remove \n
         # response = response.replace(b"\n", b"")
 
-        if self._command_defn is not None and self._command_defn["response_type"] == "POSITIONAL":
+        if command_defn is not None and command_defn["response_type"] == "POSITIONAL":
             # Have a POSITIONAL type response, so need to break it up...
             # example defn :
             # "response": [
@@ -142,14 +149,9 @@ class jk232(AbstractProtocol):
             #   ["discard", 1, "data length", ""],
             # ]
             # example response data b"\xa5\x01\x90\x08\x02\x10\x00\x00uo\x03\xbc\xf3",
-            for defn in self._command_defn["response"]:
-                size = defn[1]
-                item = response[:size]
-                responses.append(item)
-                response = response[size:]
-            if response:
-                responses.append(response)
-            log.debug(f"get_responses: responses {responses}")
+            layout = self.get_decode_plan(command_defn).layout
+            responses = layout.split(response, remainder=True)
+            log.debug("get_responses: responses %s", responses)
             return responses
         else:
             return bytearray(response)
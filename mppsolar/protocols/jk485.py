@@ -1,11 +1,16 @@
 import logging
+from types import MappingProxyType
 
+from .abstractprotocol import cache_full_command
 from .jkabstractprotocol import jkAbstractProtocol
-from .protocol_helpers import crc8
+from .crc import crc8
+from .framing import SORFramer
 
 
 log = logging.getLogger("jk485")
 
+# start of the balancer response
+RESPONSE_HEADER = bytes.fromhex("eb90")
 
 # Request balancer data
 # 55 AA 01 FF 00 00 FF
@@ -84,7 +89,7 @@ class jk485(jkAbstractProtocol):
     def __init__(self, *args, **kwargs) -> None:
         super().__init__()
         self._protocol_id = b"JK485"
-        self.COMMANDS = COMMANDS
+        self.COMMANDS = MappingProxyType(COMMANDS)
         self.STATUS_COMMANDS = [
             "getBalancerData",
         ]
@@ -93,19 +98,17 @@ class jk485(jkAbstractProtocol):
         ]
         self.DEFAULT_COMMAND = "getBalancerData"
 
-    def get_full_command(self, command) -> bytes:
+    @cache_full_command
+    def get_full_command(self, command, request=None) -> bytes:
         """
         Override the default get_full_command as its different for JK485
         """
         log.info(f"Using protocol {self._protocol_id} with {len(self.COMMANDS)} commands")
-        # These need to be set to allow other functions to work`
-        self._command = command
-        self._command_defn = self.get_command_defn(command)
-        # End of required variables setting
-        if self._command_defn is None:
+        command_defn = request.command_defn
+        if command_defn is None:
             # Maybe return a default here?
             return None
-        if "command_code" in self._command_defn:
+        if "command_code" in command_defn:
             # full command is 7 bytes long
             cmd = bytearray(7)
             # 55 AA 01 FF 00 00 FF
@@ -116,7 +119,7 @@ class jk485(jkAbstractProtocol):
             cmd[2] = 0x01
             log.debug(f"cmd with header + slave address: {cmd}")
             # command code  0xff
-            cmd[3] = int(self._command_defn["command_code"], 16)
+            cmd[3] = int(command_defn["command_code"], 16)
             # frame data    0x0000
             cmd[4:6] = bytes.fromhex("0000")
             log.debug(f"cmd with command code and frame data: {cmd}")
@@ -124,3 +127,12 @@ class jk485(jkAbstractProtocol):
             cmd[-1] = crc8(cmd)
             log.debug(f"cmd with crc: {cmd}")
             return cmd
+
+    def get_response_framer(self, request=None):
+        """
+        Balancer responses start with RESPONSE_HEADER, are the length of the definition and end with a crc8
+        """
+        command_defn = request.command_defn if request is not None else None
+        if command_defn is None or command_defn["response_type"] != "POSITIONAL":
+            return super().get_response_framer(request)
+        return SORFramer(RESPONSE_HEADER, self.get_decode_plan(command_defn).layout.size, crc=crc8)
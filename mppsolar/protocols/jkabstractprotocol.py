@@ -1,13 +1,17 @@
 import logging
+from types import MappingProxyType
 import struct
 
-from .abstractprotocol import AbstractProtocol
-from .protocol_helpers import crc8
+from .abstractprotocol import AbstractProtocol, cache_full_command
+from .crc import crc8
+from .framing import SORFramer
 
 
 log = logging.getLogger("jkAbstractProtocol")
 
 SOR = bytes.fromhex("55aaeb90")
+# length of a JK record, the last byte is the crc
+RECORD_LENGTH = 300
 
 COMMANDS = {
     "getInfo": {
@@ -56,7 +60,7 @@ class jkAbstractProtocol(AbstractProtocol):
     def __init__(self, *args, **kwargs) -> None:
         super().__init__()
         self._protocol_id = b"JK"
-        self.COMMANDS = COMMANDS
+        self.COMMANDS = MappingProxyType(COMMANDS)
         self.STATUS_COMMANDS = [
             "",
         ]
@@ -66,33 +70,30 @@ class jkAbstractProtocol(AbstractProtocol):
         self.DEFAULT_COMMAND = "getInfo"
         self.ID_COMMANDS = None
 
-    def get_full_command(self, command) -> bytes:
+    @cache_full_command
+    def get_full_command(self, command, request=None) -> bytes:
         """
         Override the default get_full_command as its different for JK
         """
         # getInfo = b'\xaa\x55\x90\xeb\x97\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x11'
         log.info(f"Using protocol {self._protocol_id} with {len(self.COMMANDS)} commands")
-        # These need to be set to allow other functions to work`
-        self._command = command
-        self._command_defn = self.get_command_defn(command)
-        # log.debug(f"self._command = {self._command}, self._command_defn = {self._command_defn}")
-        log.debug(f"self._command = {self._command}")
-        # End of required variables setting
-        if self._command_defn is None:
+        command_defn = request.command_defn
+        log.debug(f"command = {command}")
+        if command_defn is None:
             # Maybe return a default here?
             log.debug("No command_defn found")
             return None
-        if "command_code" in self._command_defn:
+        if "command_code" in command_defn:
             # full command is 20 bytes long
             cmd = bytearray(20)
             # starts with \xaa\x55\x90\xeb
             cmd[0:4] = bytes.fromhex("aa5590eb")
             log.debug(f"cmd with SOR: {cmd}")
             # then has command code
-            cmd[4] = int(self._command_defn["command_code"], 16)
-            if self._command_defn["type"] == "SETTER":
+            cmd[4] = int(command_defn["command_code"], 16)
+            if command_defn["type"] == "SETTER":
                 cmd[5] = 0x04
-                value = struct.pack("<h", int(float(self._command_value) * 1000))
+                value = struct.pack("<h", int(float(request.command_value) * 1000))
                 cmd[6] = value[0]
                 cmd[7] = value[1]
             log.debug(f"cmd with command code: {cmd}")
@@ -108,12 +109,12 @@ class jkAbstractProtocol(AbstractProtocol):
             return None
         return super().get_command_defn(command)
 
-    def get_responses(self, response):
+    def get_responses(self, response, request=None):
         """
         Override the default get_responses as its different for JK
         """
-        responses = []
-        if self._command_defn is not None and self._command_defn["response_type"] == "POSITIONAL":
+        command_defn = request.command_defn if request is not None else None
+        if command_defn is not None and command_defn["response_type"] == "POSITIONAL":
             # Have a POSITIONAL type response, so need to break it up...
             # example defn :
             # "response": [
@@ -123,21 +124,18 @@ class jkAbstractProtocol(AbstractProtocol):
             #   ["discard", 1, "data length", ""],
             # ]
             # example response data b"\xa5\x01\x90\x08\x02\x10\x00\x00uo\x03\xbc\xf3",
-            for defn in self._command_defn["response"]:
-                log.debug(f"Got defn: {defn}")
-                if defn[0].startswith("lookup"):
-                    responses.append("lookup")
-                    continue
-                size = defn[1]
-                item = response[:size]
-                responses.append(item)
-                response = response[size:]
-            if len(response) > 0:
-                responses.append(response)
-            return responses
+            # - split using the precomputed field offsets, lookup fields do not consume any data
+            layout = self.get_decode_plan(command_defn).layout
+            return layout.split(response, remainder=True)
         else:
             return bytearray(response)
 
+    def get_response_framer(self, request=None):
+        """
+        JK records start with SOR, are RECORD_LENGTH long and end with a crc8
+        """
+        return SORFramer(SOR, RECORD_LENGTH, crc=crc8)
+
     def is_record_start(self, record):
         if record.startswith(SOR):
             log.debug("SOR found in record")
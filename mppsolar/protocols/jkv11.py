@@ -1,4 +1,5 @@
 import logging
+from types import MappingProxyType
 
 from .jkabstractprotocol import jkAbstractProtocol
 
@@ -157,7 +158,7 @@ class jkv11(jkAbstractProtocol):
     def __init__(self, *args, **kwargs) -> None:
         super().__init__()
         self._protocol_id = b"JKv11"
-        self.COMMANDS.update(NEW_COMMANDS)
+        self.COMMANDS = MappingProxyType({**self.COMMANDS, **NEW_COMMANDS})
         self.STATUS_COMMANDS = [
             "getCellData",
         ]
@@ -1,6 +1,7 @@
 import logging
+from types import MappingProxyType
 
-from .abstractprotocol import AbstractProtocol
+from .abstractprotocol import AbstractProtocol, cache_full_command
 
 # from .pi30 import COMMANDS
 
@@ -233,7 +234,7 @@ class pi16(AbstractProtocol):
     def __init__(self, *args, **kwargs) -> None:
         super().__init__()
         self._protocol_id = b"PI16"
-        self.COMMANDS = COMMANDS
+        self.COMMANDS = MappingProxyType(COMMANDS)
         self.STATUS_COMMANDS = [
             "QPIGS",
         ]
@@ -262,23 +263,21 @@ class pi16(AbstractProtocol):
         _sum = _sum.encode()
         return _sum
 
-    def get_full_command(self, command) -> bytes:
+    @cache_full_command
+    def get_full_command(self, command, request=None) -> bytes:
         """
         Override the default get_full_command as its different for PI16
         """
         log.info(f"Using protocol {self._protocol_id} with {len(self.COMMANDS)} commands")
-        # These need to be set to allow other functions to work`
-        self._command = command
-        self._command_defn = self.get_command_defn(command)
-        # End of required variables setting
-        cmd = bytes(self._command, "utf-8")
+        command_defn = request.command_defn
+        cmd = bytes(command, "utf-8")
         if (
-            self._command_defn
-            and "checksum_required" in self._command_defn
-            and self._command_defn["checksum_required"] == "True"
+            command_defn
+            and "checksum_required" in command_defn
+            and command_defn["checksum_required"] == "True"
         ):
             # calculate the CRC
-            checksum = self.checksum(self._command)
+            checksum = self.checksum(command)
             log.debug(f"checksum {checksum}")
             # combine byte_cmd, CRC , return
             full_command = cmd + checksum + bytes([13])
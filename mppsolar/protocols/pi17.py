@@ -1,6 +1,7 @@
 import logging
+from types import MappingProxyType
 
-from .abstractprotocol import AbstractProtocol
+from .abstractprotocol import AbstractProtocol, cache_full_command
 
 # from .protocol_helpers import crcPI as crc
 
@@ -866,7 +867,7 @@ class pi17(AbstractProtocol):
     def __init__(self, *args, **kwargs) -> None:
         super().__init__()
         self._protocol_id = b"PI17"
-        self.COMMANDS = COMMANDS
+        self.COMMANDS = MappingProxyType(COMMANDS)
         self.STATUS_COMMANDS = []
         self.SETTINGS_COMMANDS = [
             "PI",
@@ -890,20 +891,18 @@ class pi17(AbstractProtocol):
         self.DEFAULT_COMMAND = "PI"
         self.ID_COMMANDS = ["PI", "DM"]
 
-    def get_full_command(self, command) -> bytes:
+    @cache_full_command
+    def get_full_command(self, command, request=None) -> bytes:
         """
         Override the default get_full_command as its different
         """
         log.info(f"Using protocol {self._protocol_id} with {len(self.COMMANDS)} commands")
-        # These need to be set to allow other functions to work`
-        self._command = command
-        self._command_defn = self.get_command_defn(command)
-        # End of required variables setting
-        if self._command_defn is None:
+        command_defn = request.command_defn
+        if command_defn is None:
             return None
 
-        _cmd = bytes(self._command, "utf-8")
-        _type = self._command_defn["type"]
+        _cmd = bytes(command, "utf-8")
+        _type = command_defn["type"]
         # No CRC in PI17 commands?
         data_length = len(_cmd) + 1
         if _type == "QUERY":
@@ -920,7 +919,7 @@ class pi17(AbstractProtocol):
             log.debug(f"full command: {full_command}")
             return full_command
         elif _type == "QUERYD":
-            _prefix = self._command_defn["prefix"]
+            _prefix = command_defn["prefix"]
             _pre_cmd = bytes(_prefix, "utf-8") + _cmd
             log.debug(f"_pre_cmd: {_pre_cmd}")
             log.debug(f"_prefix: {_prefix}")
@@ -936,7 +935,7 @@ class pi17(AbstractProtocol):
             data_length1 = len(_cmd) + 4
             _prefix = f"^P{data_length1:03}"
             log.debug(f"_prefix: {_prefix}")
-            intermedstr = _prefix + self._command
+            intermedstr = _prefix + command
             _numb0 = sum(bytearray(intermedstr, "utf-8")) & 255
             _numb = f"{_numb0:03d}"
             log.debug(f"_numb: {_numb}")
@@ -958,7 +957,7 @@ class pi17(AbstractProtocol):
             log.debug(f"full command: {full_command}")
             return full_command
 
-    def get_responses(self, response):
+    def get_responses(self, response, request=None):
         """
         Override the default get_responses as its different
         """
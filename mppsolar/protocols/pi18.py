@@ -1,7 +1,8 @@
 import logging
+from types import MappingProxyType
 
-from .abstractprotocol import AbstractProtocol
-from .protocol_helpers import crcPI as crc
+from .abstractprotocol import AbstractProtocol, cache_full_command
+from .crc import crc_pi as crc
 
 # from .pi30 import COMMANDS
 
@@ -548,7 +549,7 @@ class pi18(AbstractProtocol):
     def __init__(self, *args, **kwargs) -> None:
         super().__init__()
         self._protocol_id = b"PI18"
-        self.COMMANDS = COMMANDS
+        self.COMMANDS = MappingProxyType(COMMANDS)
         self.STATUS_COMMANDS = [
             "ET",
             "EY",
@@ -575,27 +576,25 @@ class pi18(AbstractProtocol):
         self.DEFAULT_COMMAND = ["PI"]
         self.ID_COMMANDS = [("PI", "Protocol Version"), ("VFW", "Main CPU Version")]
 
-    def get_full_command(self, command) -> bytes:
+    @cache_full_command
+    def get_full_command(self, command, request=None) -> bytes:
         """
         Override the default get_full_command as its different
         """
         log.info(f"Using protocol {self._protocol_id} with {len(self.COMMANDS)} commands")
-        # These need to be set to allow other functions to work`
-        self._command = command
-        self._command_defn = self.get_command_defn(command)
-        # End of required variables setting
-        if self._command_defn is None:
+        command_defn = request.command_defn
+        if command_defn is None:
             return None
 
         # Full command components
-        _cmd = bytes(self._command, "utf-8")
+        _cmd = bytes(command, "utf-8")
         log.debug(f"_cmd is: {_cmd}")
 
-        _type = self._command_defn["type"]
+        _type = command_defn["type"]
         log.debug(f"_type is: {_type}")
 
         # Hand coded prefix
-        _prefix = self._command_defn["prefix"]
+        _prefix = command_defn["prefix"]
         log.debug(f"_prefix: {_prefix}")
         # Auto determined prefix - TODO
         data_length = len(_cmd) + 3
@@ -613,7 +612,7 @@ class pi18(AbstractProtocol):
         log.debug(f"_pre_cmd: {_pre_cmd}")
 
         # For commands that dont need CRC
-        if "nocrc" in self._command_defn and self._command_defn["nocrc"] is True:
+        if "nocrc" in command_defn and command_defn["nocrc"] is True:
             full_command = _pre_cmd + bytes([13])
         # crc commands
         else:
@@ -624,7 +623,7 @@ class pi18(AbstractProtocol):
         log.debug(f"full command: {full_command}")
         return full_command
 
-    def get_responses(self, response):
+    def get_responses(self, response, request=None):
         """
         Override the default get_responses as its different for PI18
         """
@@ -1,4 +1,5 @@
 import logging
+from types import MappingProxyType
 
 from .pi18 import pi18
 
@@ -918,8 +919,7 @@ class pi18sv(pi18):
     def __init__(self, *args, **kwargs) -> None:
         super().__init__()
         self._protocol_id = b"PI18SV"
-        self.COMMANDS = COMMANDS
-        self.COMMANDS.update(SETTER_COMMANDS)
+        self.COMMANDS = MappingProxyType({**COMMANDS, **SETTER_COMMANDS})
         self.STATUS_COMMANDS = [
             "PI",
             "T",
@@ -1,7 +1,8 @@
 import logging
+from types import MappingProxyType
 
 from .abstractprotocol import AbstractProtocol
-from .protocol_helpers import crcPI as crc
+from .crc import crc_pi as crc
 
 log = logging.getLogger("pi30")
 
@@ -919,15 +920,14 @@ class pi30(AbstractProtocol):
     def __init__(self, *args, **kwargs) -> None:
         super().__init__()
         self._protocol_id = b"PI30"
-        self.COMMANDS = QUERY_COMMANDS
-        self.COMMANDS.update(SETTER_COMMANDS)
+        self.COMMANDS = MappingProxyType({**QUERY_COMMANDS, **SETTER_COMMANDS})
         self.STATUS_COMMANDS = ["QPIGS", "Q1"]
         self.SETTINGS_COMMANDS = ["QPIRI", "QFLAG"]
         self.DEFAULT_COMMAND = "QPI"
         self.ID_COMMANDS = ["QPI", "QGMN", "QMN"]
         # log.info(f'Using protocol {self._protocol_id} with {len(self.COMMANDS)} commands')
 
-    def check_response_valid(self, response):
+    def check_response_valid(self, response, request=None):
         if response is None:
             return False, {"validity check": ["Error: Response was empty", ""]}
         if type(response) is dict:
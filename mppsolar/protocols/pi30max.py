@@ -1,4 +1,5 @@
 import logging
+from types import MappingProxyType
 
 from .pi30 import pi30
 
@@ -1117,14 +1118,12 @@ class pi30max(pi30):
     def __init__(self, *args, **kwargs) -> None:
         super().__init__()
         self._protocol_id = b"PI30MAX"
-        # Add pi30max specific commands to pi30 commands
-        self.COMMANDS.update(QUERY_COMMANDS)
-        # Add pi30max specific setter commands
-        self.COMMANDS.update(SETTER_COMMANDS)
+        # Add pi30max specific commands and setter commands to pi30 commands
+        commands = {**self.COMMANDS, **QUERY_COMMANDS, **SETTER_COMMANDS}
         # remove and unwanted pi30 commands
         for item in COMMANDS_TO_REMOVE:
-            if item in self.COMMANDS:
-                self.COMMANDS.pop(item)
+            commands.pop(item, None)
+        self.COMMANDS = MappingProxyType(commands)
         self.STATUS_COMMANDS = ["QPIGS", "QPIGS2"]
         self.SETTINGS_COMMANDS = ["QPIRI", "QFLAG"]
         self.DEFAULT_COMMAND = "QPI"
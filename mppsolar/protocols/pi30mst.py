@@ -1,4 +1,5 @@
 import logging
+from types import MappingProxyType
 
 from .pi30max import pi30max
 
@@ -41,7 +42,7 @@ class pi30mst(pi30max):
     def __init__(self, *args, **kwargs) -> None:
         super().__init__()
         self._protocol_id = b"PI30MST"
-        self.COMMANDS.update(QUERY_COMMANDS)
+        self.COMMANDS = MappingProxyType({**self.COMMANDS, **QUERY_COMMANDS})
         self.STATUS_COMMANDS = ["QPIGS", "QPIGS2"]
         self.SETTINGS_COMMANDS = ["QPIRI", "QFLAG"]
         self.DEFAULT_COMMAND = "QPI"
@@ -1,8 +1,9 @@
 import logging
+from types import MappingProxyType
 
-from .abstractprotocol import AbstractProtocol
-from .protocol_helpers import crcPI as crc
-from .protocol_helpers import crc8P1 as chk
+from .abstractprotocol import AbstractProtocol, cache_full_command
+from .crc import crc_pi as crc
+from .crc import crc8_plus1 as chk
 
 log = logging.getLogger("pi30revo")
 
@@ -334,7 +335,7 @@ class pi30revo(AbstractProtocol):
     def __init__(self, *args, **kwargs) -> None:
         super().__init__()
         self._protocol_id = b"PI30REVO"
-        self.COMMANDS = COMMANDS
+        self.COMMANDS = MappingProxyType(COMMANDS)
         self.STATUS_COMMANDS = ["QPIGS"]
         self.SETTINGS_COMMANDS = ["QPIRI"]
         self.DEFAULT_COMMAND = "QPI"
@@ -360,7 +361,7 @@ class pi30revo(AbstractProtocol):
             return True
         return False
 
-    def get_responses(self, response) -> list:
+    def get_responses(self, response, request=None) -> list:
         """
         Split and trim for this protocol is complicated by 2 possible crc approaches
           each with different lengths
@@ -375,7 +376,7 @@ class pi30revo(AbstractProtocol):
             return response[1:-3].split(" ")
         return response[1:-3].split(b" ")
 
-    def check_response_valid(self, response):
+    def check_response_valid(self, response, request=None):
         if response is None:
             return False, {"validity check": ["Error: Response was empty", ""]}
         if len(response) <= 3:
@@ -390,30 +391,28 @@ class pi30revo(AbstractProtocol):
         else:
             return False, {"validity check": ["Error: Invalid response CRCs", ""]}
 
-    def get_full_command(self, command) -> bytes:
+    @cache_full_command
+    def get_full_command(self, command, request=None) -> bytes:
         """
         Override the default get_full_command as its different for PI30REVO
         """
         log.info(
             f"sing protocol {self._protocol_id} with {len(self.COMMANDS)} commands"
         )
-        # These need to be set to allow other functions to work`
-        self._command = command
-        self._command_defn = self.get_command_defn(command)
-        # End of required variables setting
+        command_defn = request.command_defn
 
         byte_cmd = bytes(command, "utf-8")
         if (
-            self._command_defn
-            and "crctype" in self._command_defn
-            and self._command_defn["crctype"] == "chk"
+            command_defn
+            and "crctype" in command_defn
+            and command_defn["crctype"] == "chk"
         ):
-            log.debug(f"Using CHK checksum approach for command {self._command}")
+            log.debug(f"Using CHK checksum approach for command {command}")
             checksum = chk(byte_cmd)
             log.debug(f"checksum {checksum}")
             full_command = byte_cmd + bytes([checksum]) + bytes([13])
         else:
-            log.debug(f"Using PI30 CRC checksum approach for command {self._command}")
+            log.debug(f"Using PI30 CRC checksum approach for command {command}")
             # calculate the CRC
             crc_high, crc_low = crc(byte_cmd)
             # combine byte_cmd, CRC , return
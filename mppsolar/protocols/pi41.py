@@ -1,4 +1,5 @@
 import logging
+from types import MappingProxyType
 
 from .pi30 import pi30
 
@@ -364,7 +365,7 @@ class pi41(pi30):
     def __init__(self, *args, **kwargs) -> None:
         super().__init__()
         self._protocol_id = b"PI41"
-        self.COMMANDS.update(NEW_COMMANDS)
+        self.COMMANDS = MappingProxyType({**self.COMMANDS, **NEW_COMMANDS})
         self.STATUS_COMMANDS = ["QPIGS", "Q1"]
         self.SETTINGS_COMMANDS = ["QPIRI", "QFLAG"]
         self.DEFAULT_COMMAND = "QDI"
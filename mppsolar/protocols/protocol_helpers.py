@@ -5,6 +5,8 @@ import math
 # from binascii import unhexlify
 from struct import unpack
 
+from . import crc
+
 log = logging.getLogger("protocol_helpers")
 
 
@@ -12,14 +14,7 @@ def crc8(byteData):
     """
     Generate 8 bit CRC of supplied string
     """
-    CRC = 0
-    # for j in range(0, len(str),2):
-    for b in byteData:
-        # char = int(str[j:j+2], 16)
-        # print(b)
-        CRC = CRC + b
-    CRC &= 0xFF
-    return CRC
+    return crc.crc8(byteData)
 
 
 def crc8P1(byteData):
@@ -27,12 +22,7 @@ def crc8P1(byteData):
     Generate 8 bit CRC of supplied string + 1
     eg as used in REVO PI30 protocol
     """
-    CRC = 0
-    for b in byteData:
-        CRC = CRC + b
-    CRC += 1
-    CRC &= 0xFF
-    return CRC
+    return crc.crc8_plus1(byteData)
 
 
 def crcJK232(byteData):
@@ -41,15 +31,7 @@ def crcJK232(byteData):
     - 2 bytes, the verification field is "command code + length byte + data segment content",
     the verification method is thesum of the above fields and then the inverse plus 1, the high bit is in the front and the low bit is in the back.
     """
-    CRC = 0
-    for b in byteData:
-        CRC += b
-    CRC = CRC ^ 0xFFFF
-    CRC += 1
-
-    crc_low = CRC & 0xFF
-    crc_high = (CRC >> 8) & 0xFF
-    return [crc_high, crc_low]
+    return crc.crc_jk232(byteData)
 
 
 def vedHexChecksum(byteData):
@@ -309,56 +291,4 @@ def crcPI(data_bytes):
     """
     Calculates CRC for supplied data_bytes
     """
-    # assert type(byte_cmd) == bytes
-    log.debug(f"Calculating CRC for {data_bytes}")
-
-    crc = 0
-    da = 0
-    crc_ta = [
-        0x0000,
-        0x1021,
-        0x2042,
-        0x3063,
-        0x4084,
-        0x50A5,
-        0x60C6,
-        0x70E7,
-        0x8108,
-        0x9129,
-        0xA14A,
-        0xB16B,
-        0xC18C,
-        0xD1AD,
-        0xE1CE,
-        0xF1EF,
-    ]
-
-    for c in data_bytes:
-        # log.debug('Encoding %s', c)
-        if type(c) == str:
-            c = ord(c)
-        da = ((crc >> 8) & 0xFF) >> 4
-        crc = (crc << 4) & 0xFFFF
-
-        index = da ^ (c >> 4)
-        crc ^= crc_ta[index]
-
-        da = ((crc >> 8) & 0xFF) >> 4
-        crc = (crc << 4) & 0xFFFF
-
-        index = da ^ (c & 0x0F)
-        crc ^= crc_ta[index]
-
-    crc_low = crc & 0xFF
-    crc_high = (crc >> 8) & 0xFF
-
-    if crc_low == 0x28 or crc_low == 0x0D or crc_low == 0x0A:
-        crc_low += 1
-    if crc_high == 0x28 or crc_high == 0x0D or crc_high == 0x0A:
-        crc_high += 1
-
-    crc = crc_high << 8
-    crc += crc_low
-
-    log.debug(f"Generated CRC {crc_high:#04x} {crc_low:#04x} {crc:#06x}")
-    return [crc_high, crc_low]
+    return crc.crc_pi(data_bytes)
@@ -1,8 +1,10 @@
 import logging
+from types import MappingProxyType
 from typing import Tuple
 
-from .abstractprotocol import AbstractProtocol
+from .abstractprotocol import AbstractProtocol, cache_full_command
 from .protocol_helpers import vedHexChecksum
+from .framing import TerminatorFramer, VEDTextFramer
 
 # from .pi30 import COMMANDS
 
@@ -129,7 +131,7 @@ class ved(AbstractProtocol):
     def __init__(self, *args, **kwargs) -> None:
         super().__init__()
         self._protocol_id = b"VED"
-        self.COMMANDS = COMMANDS
+        self.COMMANDS = MappingProxyType(COMMANDS)
         self.STATUS_COMMANDS = [
             "vedtext",
         ]
@@ -138,18 +140,16 @@ class ved(AbstractProtocol):
         ]
         self.DEFAULT_COMMAND = "vedtext"
 
-    def get_full_command(self, command) -> bytes:
+    @cache_full_command
+    def get_full_command(self, command, request=None) -> bytes:
         """
         Override the default get_full_command as its different for VEDirect
         """
         log.info(
             f"Using protocol {self._protocol_id} with {len(self.COMMANDS)} commands"
         )
-        # These need to be set to allow other functions to work`
-        self._command = command
-        self._command_defn = self.get_command_defn(command)
-        # End of required variables setting
-        if self._command_defn is None:
+        command_defn = request.command_defn
+        if command_defn is None:
             return None
 
         # VEDHEX
@@ -160,13 +160,13 @@ class ved(AbstractProtocol):
         # 00 cs
         # \n
         # eg b':70010003E\n' = get battery capacity id = 0x1000 = 0010 little endian
-        cmd_type = self._command_defn["type"]
+        cmd_type = command_defn["type"]
         if cmd_type == "VEDTEXT":
             # Just listen - dont need to send a command
             log.debug(f"command is VEDTEXT type so returning {cmd_type}")
             return cmd_type
         elif cmd_type == "VEDGET":
-            ID = self._command_defn["command_code"]
+            ID = command_defn["command_code"]
             cmd = f"7{ID}00"
             # pad cmd and convert to bytes for checksum
             _r = f"0{cmd}"
@@ -178,7 +178,7 @@ class ved(AbstractProtocol):
         log.warn("unable to generate full command - is the definition wrong?")
         return None
 
-    def check_response_valid(self, response) -> Tuple[bool, dict]:
+    def check_response_valid(self, response, request=None) -> Tuple[bool, dict]:
         """
         VED HEX protocol - sum of bytes should be 0x55
         VED Text protocol - no validity check
@@ -212,10 +212,20 @@ class ved(AbstractProtocol):
         else:
             return True, {}
 
-    def get_responses(self, response):
+    def get_response_framer(self, request=None):
+        """
+        VEDTEXT responses end with the Checksum record, HEX responses with a newline
+        """
+        command_defn = request.command_defn if request is not None else None
+        if command_defn is not None and command_defn["type"] == "VEDTEXT":
+            return VEDTextFramer()
+        return TerminatorFramer(b"\n")
+
+    def get_responses(self, response, request=None):
         """
         Override the default get_responses as its different for PI00
         """
+        command_defn = request.command_defn if request is not None else None
         # remove \n
         response = response.replace(b"\n", b"")
         responses = []
@@ -227,16 +237,12 @@ class ved(AbstractProtocol):
             _r = f"0{_r}"
             _r = bytes.fromhex(_r)
             if (
-                self._command_defn is not None
-                and self._command_defn["response_type"] == "POSITIONAL"
+                command_defn is not None
+                and command_defn["response_type"] == "POSITIONAL"
             ):
                 # Have a POSITIONAL type response, so need to break it up...
-                for defn in self._command_defn["response"]:
-                    size = defn[1]
-                    item = _r[:size]
-                    responses.append(item)
-                    _r = _r[size:]
-                return responses
+                layout = self.get_decode_plan(command_defn).layout
+                return layout.split(_r)
             else:
                 return bytearray(response)
                 # convert string hex to bytes
@@ -0,0 +1,350 @@
+import logging
+from collections.abc import Mapping, MutableMapping
+from datetime import datetime
+
+log = logging.getLogger("result")
+
+# maximum number of distinct schemas held for sharing between readings
+SCHEMA_CACHE_SIZE = 1024
+# the entries of a result that describe the command rather than being fields
+METADATA_KEYS = ("_command", "_command_description", "raw_response")
+
+
+class ResultSchema:
+    """
+    ResultSchema - the immutable layout of the results of a command
+    - field names, units, extra info and formatted output keys are held once and
+      shared by every Reading with the same layout
+    - has_extra is whether each field has the extra info entry, as decode can add one that is None
+    """
+
+    __slots__ = ("names", "units", "extra_info", "has_extra", "index", "output_keys", "output_keys_case")
+
+    _schemas = {}
+
+    def __init__(self, names, units, extra_info, has_extra=None):
+        self.names = names
+        self.units = units
+        self.extra_info = extra_info
+        if has_extra is None:
+            has_extra = tuple(extra is not None for extra in extra_info)
+        self.has_extra = has_extra
+        self.index = {name: position for position, name in enumerate(names)}
+        # keys as used by the outputs eg 'AC Input Voltage' -> 'ac_input_voltage'
+        self.output_keys_case = tuple(f"{name}".replace(" ", "_") for name in names)
+        self.output_keys = tuple(key.lower() for key in self.output_keys_case)
+
+    def __repr__(self):
+        return f"ResultSchema({len(self.names)} fields)"
+
+    def __len__(self):
+        return len(self.names)
+
+    @classmethod
+    def get(cls, names, units, extra_info, has_extra=None):
+        """
+        Get the shared schema for the supplied layout, creating it if it is new
+        """
+        names = tuple(names)
+        units = tuple(units)
+        extra_info = tuple(extra_info)
+        if has_extra is None:
+            has_extra = tuple(extra is not None for extra in extra_info)
+        else:
+            has_extra = tuple(has_extra)
+        key = (names, units, has_extra)
+        # extra_info can hold dicts (which are not hashable), so is compared separately
+        candidates = cls._schemas.get(key)
+        if candidates is None:
+            if len(cls._schemas) >= SCHEMA_CACHE_SIZE:
+                log.debug("Schema cache full, clearing")
+                cls._schemas.clear()
+            candidates = cls._schemas[key] = []
+        for schema in candidates:
+            if schema.extra_info == extra_info:
+                return schema
+        schema = cls(names, units, extra_info, has_extra)
+        candidates.append(schema)
+        return schema
+
+
+class Reading(MutableMapping):
+    """
+    Reading - the results of a single command as a shared ResultSchema and a tuple of values
+    - metadata holds the non field entries, eg _command and _command_description
+    - behaves as the dict returned by decode, ie name: [value, unit(, extra_info)]
+    - new outputs can read the columns directly from schema and values
+    - changing a Reading converts it to a plain dict internally (copy on write)
+    """
+
+    __slots__ = ("schema", "values", "metadata", "_dict")
+
+    def __init__(self, schema, values, metadata=None):
+        self.schema = schema
+        self.values = tuple(values)
+        self.metadata = metadata if metadata is not None else {}
+        self._dict = None
+
+    def __repr__(self):
+        return f"Reading({dict(self)})"
+
+    @classmethod
+    def from_dict(cls, results):
+        """
+        Build a Reading from a decode style dict of name: [value, unit(, extra_info)]
+        """
+        metadata = {}
+        names = []
+        units = []
+        extra_info = []
+        has_extra = []
+        values = []
+        for key, item in results.items():
+            if isinstance(item, (list, tuple)) and len(item) >= 2:
+                names.append(key)
+                values.append(item[0])
+                units.append(item[1])
+                extra_info.append(item[2] if len(item) > 2 else None)
+                has_extra.append(len(item) > 2)
+            else:
+                metadata[key] = item
+        return cls(ResultSchema.get(names, units, extra_info, has_extra), values, metadata)
+
+    def to_dict(self) -> dict:
+        """
+        Build the decode style dict for this Reading
+        """
+        if self._dict is not None:
+            return dict(self._dict)
+        result = dict(self.metadata)
+        schema = self.schema
+        for name, value, unit, extra, has_extra in zip(schema.names, self.values, schema.units, schema.extra_info, schema.has_extra):
+            result[name] = [value, unit, extra] if has_extra else [value, unit]
+        return result
+
+    def columns(self):
+        """
+        Iterate over (name, value, unit, extra_info) of the fields
+        """
+        if self._dict is not None:
+            return Reading.from_dict(self._dict).columns()
+        schema = self.schema
+        return zip(schema.names, self.values, schema.units, schema.extra_info)
+
+    def value(self, name, default=None):
+        """
+        Get just the value of field name
+        """
+        if self._dict is not None:
+            item = self._dict.get(name)
+            return item[0] if isinstance(item, (list, tuple)) else default
+        position = self.schema.index.get(name)
+        if position is None:
+            return default
+        return self.values[position]
+
+    def __getitem__(self, key):
+        if self._dict is not None:
+            return self._dict[key]
+        if key in self.metadata:
+            return self.metadata[key]
+        position = self.schema.index[key]
+        if self.schema.has_extra[position]:
+            return [self.values[position], self.schema.units[position], self.schema.extra_info[position]]
+        return [self.values[position], self.schema.units[position]]
+
+    def __contains__(self, key):
+        if self._dict is not None:
+            return key in self._dict
+        return key in self.metadata or key in self.schema.index
+
+    def __iter__(self):
+        if self._dict is not None:
+            return iter(self._dict)
+        return iter((*self.metadata, *self.schema.names))
+
+    def __len__(self):
+        if self._dict is not None:
+            return len(self._dict)
+        return len(self.metadata) + len(self.schema.names)
+
+    def __setitem__(self, key, value):
+        if self._dict is None:
+            self._dict = self.to_dict()
+        self._dict[key] = value
+
+    def __delitem__(self, key):
+        if self._dict is None:
+            self._dict = self.to_dict()
+        del self._dict[key]
+
+
+class DecodeDict(dict):
+    """
+    DecodeDict - the decode style dict of name: [value, unit(, extra_info)], filled by decode
+    with the same calls as a ReadingBuilder
+    """
+
+    __slots__ = ()
+
+    def set_metadata(self, key, value):
+        self[key] = value
+
+    def add(self, name, value, units, *extra_info):
+        self[name] = [value, units, *extra_info]
+
+
+class ReadingBuilder:
+    """
+    ReadingBuilder - collects the fields of a decode straight into the values of a Reading
+    - schema is the layout expected, eg that of the last decode of the command, while the fields
+      match it only the values are kept (no per field lists are made)
+    - from the first field that does not match the layout is collected, and build() gets the shared schema for it
+    - a name added again replaces its value, as it would in a dict
+    """
+
+    __slots__ = ("schema", "values", "metadata", "_names", "_units", "_extra_info", "_has_extra", "_index")
+
+    def __init__(self, schema=None):
+        self.schema = schema
+        self.values = []
+        self.metadata = {}
+        self._names = None
+        self._units = None
+        self._extra_info = None
+        self._has_extra = None
+        self._index = None
+
+    def set_metadata(self, key, value):
+        self.metadata[key] = value
+
+    def add(self, name, value, units, *extra_info):
+        extra = extra_info[0] if extra_info else None
+        has_extra = bool(extra_info)
+        values = self.values
+        if self._names is None:
+            schema = self.schema
+            position = len(values)
+            try:
+                if (
+                    schema.names[position] == name
+                    and schema.units[position] == units
+                    and schema.has_extra[position] == has_extra
+                    and schema.extra_info[position] == extra
+                ):
+                    values.append(value)
+                    return
+            except (AttributeError, IndexError):
+                # no schema, or more fields than it has
+                pass
+            self._collect_layout(position)
+        position = self._index.get(name)
+        if position is None:
+            self._index[name] = len(values)
+            self._names.append(name)
+            self._units.append(units)
+            self._extra_info.append(extra)
+            self._has_extra.append(has_extra)
+            values.append(value)
+        else:
+            values[position] = value
+            self._units[position] = units
+            self._extra_info[position] = extra
+            self._has_extra[position] = has_extra
+
+    def _collect_layout(self, count):
+        # the fields no longer match the schema, so keep the layout of the first count and collect the rest
+        schema = self.schema
+        if schema is None:
+            self._names, self._units, self._extra_info, self._has_extra = [], [], [], []
+        else:
+            self._names = list(schema.names[:count])
+            self._units = list(schema.units[:count])
+            self._extra_info = list(schema.extra_info[:count])
+            self._has_extra = list(schema.has_extra[:count])
+        self._index = {name: position for position, name in enumerate(self._names)}
+
+    def __getitem__(self, name):
+        """
+        The [value, unit] of a field already added, eg for lookup fields
+        """
+        if self._names is None:
+            position = self.schema.index.get(name) if self.schema is not None else None
+            if position is None or position >= len(self.values):
+                raise KeyError(name)
+            return [self.values[position], self.schema.units[position]]
+        position = self._index[name]
+        return [self.values[position], self._units[position]]
+
+    def build(self) -> Reading:
+        """
+        The Reading of the fields added, schema is the schema to expect next time
+        """
+        if self._names is None:
+            if self.schema is not None and len(self.values) == len(self.schema.names):
+                return Reading(self.schema, self.values, self.metadata)
+            self._collect_layout(len(self.values))
+        self.schema = ResultSchema.get(self._names, self._units, self._extra_info, self._has_extra)
+        return Reading(self.schema, self.values, self.metadata)
+
+
+class ResultView(Mapping):
+    """
+    ResultView - a read only view of the results of a command, shared by all the outputs
+    - the mapping is the fields only (name: [value, unit(, extra_info)]), the metadata
+      (_command, _command_description and raw_response) is kept apart in metadata
+    - nothing is copied and the outputs cannot change the results, so every output sees the same data
+    - results can be a decode style dict or a Reading
+    - acquired is when the view was made, ie when the results were received, for outputs that
+      timestamp the results (they may run later, eg from the output queue or a buffered writer)
+    """
+
+    __slots__ = ("_results", "metadata", "acquired")
+
+    def __init__(self, results):
+        self._results = results
+        self.metadata = {key: results[key] for key in METADATA_KEYS if key in results}
+        self.acquired = datetime.now().astimezone()
+
+    def __repr__(self):
+        return f"ResultView({self.command}, {len(self)} fields)"
+
+    @classmethod
+    def of(cls, results):
+        """
+        Get a view of results, results itself if it is already a view (or None)
+        """
+        if results is None or isinstance(results, ResultView):
+            return results
+        return cls(results)
+
+    @property
+    def command(self):
+        return self.metadata.get("_command")
+
+    @property
+    def command_description(self):
+        return self.metadata.get("_command_description")
+
+    @property
+    def raw_response(self):
+        return self.metadata.get("raw_response")
+
+    def __getitem__(self, key):
+        if key in self.metadata:
+            raise KeyError(key)
+        return self._results[key]
+
+    def __contains__(self, key):
+        return key not in self.metadata and key in self._results
+
+    def __iter__(self):
+        metadata = self.metadata
+        return (key for key in self._results if key not in metadata)
+
+    def __len__(self):
+        return len(self._results) - len(self.metadata)
+
+    def __bool__(self):
+        # a result with only metadata is still a result
+        return bool(self._results)
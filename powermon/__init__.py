@@ -2,6 +2,8 @@
 """main powermon code"""
 
 import logging
+import re
+import threading
 from argparse import ArgumentParser
 
 # from collections import deque
@@ -12,6 +14,7 @@ from datetime import date, timedelta  # noqa: F401
 import yaml
 
 
+from mppsolar.libs.outputqueue import DROP_OLDEST, QUEUE_SIZE, OutputQueue
 from mppsolar.version import __version__  # noqa: F401
 from powermon.libs.daemon import Daemon
 from powermon.libs.mqttbroker import MqttBroker
@@ -19,6 +22,7 @@ from powermon.libs.mqttbroker import MqttBroker
 from powermon.libs.schedule import Schedule
 from powermon.libs.device import Device
 from powermon.libs.apicoordinator import ApiCoordinator
+from powermon.libs.deviceworker import DeviceWorker
 
 # from powermon.ports import getPortFromConfig
 
@@ -26,6 +30,24 @@ from powermon.libs.apicoordinator import ApiCoordinator
 # Set-up logger
 log = logging.getLogger("")
 
+# seconds to wait for the device workers to finish their current command when stopping
+WORKER_STOP_TIMEOUT = 5
+# a clock time, eg 15:00 or 15:00:00
+CLOCK_TIME = re.compile(r"^[0-9]{1,2}:[0-5][0-9](?::[0-5][0-9])?$")
+
+
+class ConfigLoader(yaml.SafeLoader):
+    """
+    ConfigLoader - the yaml loader for the config, with clock times (eg time: 15:00) read as strings
+    - yaml 1.1 reads an unquoted 15:00 as the base 60 integer 900, which a time schedule would run at 00:15
+    """
+
+
+ConfigLoader.yaml_implicit_resolvers = {key: list(resolvers) for key, resolvers in yaml.SafeLoader.yaml_implicit_resolvers.items()}
+for _first in "0123456789":
+    # ahead of the int resolver, the first match wins
+    ConfigLoader.yaml_implicit_resolvers.setdefault(_first, []).insert(0, ("tag:yaml.org,2002:str", CLOCK_TIME))
+
 
 def read_yaml_file(yaml_file=None):
     """function to read a yaml file and return dict"""
@@ -33,7 +55,7 @@ def read_yaml_file(yaml_file=None):
     if yaml_file is not None:
         try:
             with open(yaml_file, "r", encoding="utf-8") as stream:
-                _yaml = yaml.safe_load(stream)
+                _yaml = yaml.load(stream, Loader=ConfigLoader)
         except yaml.YAMLError as exc:
             log.error("Error processing yaml file: %s", exc)
         except FileNotFoundError as exc:
@@ -41,6 +63,18 @@ def read_yaml_file(yaml_file=None):
     return _yaml
 
 
+def get_device_configs(config):
+    """
+    function to return a (device config, scheduling config) tuple for each device
+    - either a single device: with the top level scheduling:
+    - or a devices: list, each with its own scheduling: (or the top level scheduling:)
+    """
+    devices = config.get("devices")
+    if devices is None:
+        return [(config.get("device", None), config.get("scheduling", None))]
+    return [(device, device.get("scheduling", config.get("scheduling", None))) for device in devices]
+
+
 def process_command_line_overrides(args):
     """override config with command line options"""
     _config = {}
@@ -138,47 +172,67 @@ def main():
     mqtt_broker = MqttBroker(config=config.get("mqttbroker", {}))
     log.debug("mqtt_broker: %s", mqtt_broker)
 
-    # build device object (required)
-    device = Device(config=config.get("device", None))
-    log.debug("device: %s", device)
-
     # build the daemon object (optional)
     daemon = Daemon(config=config)
     log.debug("daemon: %s", daemon)
 
-    # Get scheduled commands
-    scheduling_config = config.get("scheduling", None)
-    log.debug("scheduling_config: %s", scheduling_config)
-    schedule = Schedule.parseScheduleConfig(scheduling_config, device, mqtt_broker)
-
-    log.debug(schedule)
+    # build the output queue (optional), outputs are run inline without it
+    output_queue = None
+    output_queue_config = config.get("output_queue", None)
+    if output_queue_config is not None:
+        output_queue = OutputQueue(
+            maxsize=output_queue_config.get("size", QUEUE_SIZE),
+            policy=output_queue_config.get("policy", DROP_OLDEST),
+        )
+        log.debug("output_queue: %s", output_queue)
+
+    # build a device and schedule for each device (required), all sharing the mqtt broker and output queue
+    schedules = []
+    for device_config, scheduling_config in get_device_configs(config):
+        device = Device(config=device_config)
+        log.debug("device: %s", device)
+        log.debug("scheduling_config: %s", scheduling_config)
+        schedule = Schedule.parseScheduleConfig(scheduling_config, device, mqtt_broker, output_queue)
+        log.debug(schedule)
+        schedules.append(schedule)
 
     # setup api coordinator
     api_coordinator = ApiCoordinator(
         config=config.get("api", None),
-        device=device,
         mqtt_broker=mqtt_broker,
-        schedule=schedule,
+        schedules=schedules,
     )
-    # TODO: run in the schedule loop
 
     # initialize daemon
     daemon.initialize()
 
-    # Main working loop
-    keep_looping = True
+    # Main working loop, each device runs its schedule in a worker thread
+    finished = threading.Event()
+    workers = [DeviceWorker(schedule, finished) for schedule in schedules]
     try:
-        schedule.beforeLoop()
-        while keep_looping:
+        for worker in workers:
+            worker.start()
+        while not all(worker.done for worker in workers):
             # tell the daemon we're still working
             daemon.watchdog()
-            keep_looping = schedule.runLoop()
             api_coordinator.run()
+            # sleep until a worker finishes, waking in time for the watchdog and announcements
+            finished.wait(min(daemon.keepalive / 2, api_coordinator.timeToAnnounce()))
+            finished.clear()
     except KeyboardInterrupt:
         print("KeyboardInterrupt")
     except Exception as general_exception:
         print(general_exception)
     finally:
+        # Stop the device workers
+        for worker in workers:
+            worker.stop()
+        for worker in workers:
+            worker.join(timeout=WORKER_STOP_TIMEOUT)
+        # Send any queued results
+        if output_queue is not None:
+            output_queue.close(timeout=WORKER_STOP_TIMEOUT)
+            log.info("output queue metrics: %s", output_queue.metrics())
         # Disconnect port
         # port.disconnect()
         # Disconnect mqtt
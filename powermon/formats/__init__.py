@@ -1,7 +1,7 @@
 from .abstractformat import FormatterType
 
 
-def getFormatfromConfig(formatConfig, device, topic, tag):
+def getFormatfromConfig(formatConfig, device, topic, tag, mqtt_broker=None):
     #Get values from config
     #Type is required
     formatType = formatConfig["type"]
@@ -11,10 +11,13 @@ def getFormatfromConfig(formatConfig, device, topic, tag):
         formatter = htmltable(formatConfig)
     elif formatType == FormatterType.HASS:
         from .hass import hass
-        formatter = hass(formatConfig, device)
+        formatter = hass(formatConfig, device, mqtt_broker)
     elif formatType == FormatterType.TOPICS:
         from .topics import Topics
         formatter = Topics(formatConfig, topic, tag)
+    elif formatType == FormatterType.COMPACT:
+        from .compact import compact
+        formatter = compact(formatConfig, topic, tag, mqtt_broker)
     elif formatType == FormatterType.SIMPLE:
         from .simple import simple
         formatter = simple(formatConfig)
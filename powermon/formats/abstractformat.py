@@ -3,10 +3,14 @@ import logging
 import re
 from enum import StrEnum, auto
 
+from mppsolar.helpers import get_key_map
+from mppsolar.result import ResultView
+
 # from time import sleep
 log = logging.getLogger("Formatter")
 
 class FormatterType(StrEnum):
+    COMPACT = auto()
     HASS = auto()
     HTMLTABLE = auto()
     RAW = auto()
@@ -39,23 +43,17 @@ class AbstractFormat(ABC):
     def sendsMultipleMessages(self) -> bool:
         return False
 
-    def formatAndFilterData(self, data):
-        #TODO: should we make data a proper object so it's easy to get the data we want?
-        # remove raw response
-        if "raw_response" in data:
-            data.pop("raw_response")
-        # remove command details
-        if "_command" in data:
-            data.pop("_command")
-        if "_command_description" in data:
-            data.pop("_command_description")
+    # Override this if the format remembers what it has sent, called with a batch of messages that were not all published
+    def notPublished(self, msgs):
+        pass
 
+    def formatAndFilterData(self, data):
+        # the view leaves out the raw response and command details, without changing data
+        data = ResultView.of(data)
+        # the (key, formatted key) pairs wanted are cached for each set of keys
         displayData = {}
-        for key in data:
-            _values = data[key]
-            formattedKey = self.formatKey(key)
-            if self.isKeyWanted(formattedKey):
-                displayData[formattedKey] = _values
+        for key, formattedKey in get_key_map(data, self.remove_spaces, self.keep_case, self._keyFilter, self._keyExclusionfilter):
+            displayData[formattedKey] = data[key]
         return displayData
 
     def formatKey(self, key) -> str:
@@ -0,0 +1,44 @@
+# Description: Output format for mqtt as a single compact json message per command
+import logging
+
+from mppsolar.outputs import SchemaCache, forget_schemas, to_compact_msgs
+from mppsolar.result import ResultView
+from powermon.formats.abstractformat import AbstractFormat
+
+log = logging.getLogger("compact")
+
+
+class compact(AbstractFormat):
+    def __init__(self, formatConfig, topic, tag, mqtt_broker=None):
+        super().__init__(formatConfig)
+        self.results_topic = topic
+        self.tag = tag
+        self.mqtt_broker = mqtt_broker
+        # the schema last published to each topic, so the schema is only sent when it changes (or the broker reconnects)
+        self.schemas = SchemaCache()
+        self.schemas.follow(mqtt_broker)
+
+    def sendsMultipleMessages(self) -> bool:
+        return True
+
+    def format(self, data):
+        log.info("Using output formatter: compact")
+        if data is None:
+            return []
+        data = ResultView.of(data)
+
+        # build topic, one for each command
+        if self.results_topic is not None:
+            topic = f"{self.results_topic}/{self.tag}/{data.command}"
+        else:
+            topic = f"{self.tag}/status/{data.command}"
+
+        _data = self.formatAndFilterData(data)
+        self.schemas.follow(self.mqtt_broker)
+        msgs = to_compact_msgs(topic, data.command, data.command_description, _data, self.schemas)
+        log.debug(f"build_msgs: {msgs}")
+        return msgs
+
+    def notPublished(self, msgs):
+        # forget the schemas in the batch, so they are sent again with the next results
+        forget_schemas(msgs, self.schemas)
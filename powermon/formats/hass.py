@@ -1,14 +1,16 @@
 import json as js
 import logging
-from datetime import datetime
+from mppsolar.libs.hassdiscovery import DiscoveryRegistry
 from powermon.formats.abstractformat import AbstractFormat
 
 log = logging.getLogger("hass")
 
 
 class hass(AbstractFormat):
-    def __init__(self, formatConfig, device):
+    def __init__(self, formatConfig, device, mqtt_broker=None):
         super().__init__(formatConfig)
+        # the discovery configs are only sent when new or changed (or the broker reconnects / home assistant restarts)
+        self.registry = DiscoveryRegistry(mqtt_broker)
         self.discovery_prefix = formatConfig.get("discovery_prefix", "homeassistant")
         self.entity_id_prefix = formatConfig.get("entity_id_prefix", "mpp")
         if device is None:
@@ -18,7 +20,7 @@ class hass(AbstractFormat):
             self.device_manufacturer="MPP Solar"
         else:
             self.device_name=device.name
-            self.device_id=device.id
+            self.device_id=device.identifier
             self.device_model=device.model
             self.device_manufacturer=device.manufacturer
         
@@ -90,7 +92,6 @@ class hass(AbstractFormat):
                 "state_topic": f"{state_topic}",
                 "unique_id": f"{object_id}",
                 "force_update": "true",
-                "last_reset": str(datetime.now()),
             }
 
             # Add device info
@@ -133,8 +134,9 @@ class hass(AbstractFormat):
 
             payloads = js.dumps(payload)
             # print(payloads)
-            msg = {"topic": topic, "payload": payloads}
-            config_msgs.append(msg)
+            if self.registry.changed(topic, payloads):
+                msg = {"topic": topic, "payload": payloads, "retain": True}
+                config_msgs.append(msg)
 
             # VALUE SETTING
             msg = {"topic": state_topic, "payload": value}
@@ -142,3 +144,9 @@ class hass(AbstractFormat):
 
         # order value msgs after config to allow HA time to build entity before state data arrives
         return config_msgs + value_msgs
+
+    def notPublished(self, msgs):
+        # forget the configs (the retained messages) in the batch, so they are sent again with the next results
+        for msg in msgs:
+            if msg.get("retain"):
+                self.registry.discard(msg["topic"])
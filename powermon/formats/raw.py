@@ -1,11 +1,12 @@
 from mppsolar.helpers import get_kwargs
+from mppsolar.result import ResultView
 
 
 class raw:
     def output(*args, **kwargs):
         # print(args, kwargs)
         _result = None
-        _data = get_kwargs(kwargs, "data", None)
-        if "raw_response" in _data:
-            _result = _data["raw_response"][0]
+        _data = ResultView.of(get_kwargs(kwargs, "data", None))
+        if "raw_response" in _data.metadata:
+            _result = _data.metadata["raw_response"][0]
         return _result
@@ -1,7 +1,8 @@
 import logging
 import re
 
-from mppsolar.helpers import get_kwargs, getMaxLen, key_wanted, pad
+from mppsolar.helpers import get_key_map, get_kwargs, getMaxLen, pad
+from mppsolar.result import ResultView
 
 log = logging.getLogger("table")
 
@@ -10,7 +11,7 @@ class table:
     def output(*args, **kwargs):
         log.info("Using output formatter: table")
         log.debug(f"kwargs {kwargs}")
-        data = get_kwargs(kwargs, "data")
+        data = ResultView.of(get_kwargs(kwargs, "data"))
 
         _result = []
         if data is None:
@@ -36,32 +37,14 @@ class table:
         if excl_filter is not None:
             _excl_filter = re.compile(excl_filter)
 
-        # remove raw response
-        if "raw_response" in data:
-            data.pop("raw_response")
-
         # build header
-        if "_command" in data:
-            command = data.pop("_command")
-        else:
-            command = "Unknown command"
-        if "_command_description" in data:
-            description = data.pop("_command_description")
-        else:
-            description = "No description found"
+        command = data.metadata.get("_command", "Unknown command")
+        description = data.metadata.get("_command_description", "No description found")
 
         # build data to display
         displayData = {}
-        for key in data:
-            _values = data[key]
-            # remove spaces
-            if remove_spaces:
-                key = key.replace(" ", "_")
-            if not keep_case:
-                # make lowercase
-                key = key.lower()
-            if key_wanted(key, _filter, _excl_filter):
-                displayData[key] = _values
+        for key, output_key in get_key_map(data, remove_spaces, keep_case, _filter, _excl_filter):
+            displayData[output_key] = data[key]
         log.debug(f"displayData: {displayData}")
 
         # build header
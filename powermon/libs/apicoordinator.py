@@ -1,15 +1,21 @@
 import yaml
 import logging
 import json
+from time import monotonic
 from powermon.libs.schedule import Schedule
 
 log = logging.getLogger("APICoordinator")
+
+# seconds between announcements of the device and schedule
+ANNOUNCE_INTERVAL = 10
+
+
 class ApiCoordinator:
-    def __init__(self, config, device, mqtt_broker, schedule : Schedule):
-        self.device = device
+    def __init__(self, config, mqtt_broker, schedules : list[Schedule]):
         self.mqtt_broker = mqtt_broker
-        self.schedule = schedule
-        self.count = 0
+        self.schedules = schedules
+        self.announceInterval = config.get("announce_interval", ANNOUNCE_INTERVAL)
+        self.nextAnnounce = monotonic() + self.announceInterval
         self.adhocTopic = config.get("adhoc_topic", "powermon/adhoc")
         self.announceTopic = config.get("announce_topic", "powermon/announce")
 
@@ -27,19 +33,40 @@ class ApiCoordinator:
         except yaml.YAMLError as exc:
             log.error(f"Error processing config file: {exc}")
 
+        schedule = self.getSchedule(_command_config.get("device"))
+        if schedule is None:
+            log.error(f"No device named {_command_config.get('device')} for adhoc commands")
+            return
         for command in _command_config["commands"]:
             log.debug(f"command: {command}")
             log.debug(f"self: {self}")
-            self.schedule.addOneTimeCommandFromConfig(command)
+            schedule.addOneTimeCommandFromConfig(command)
+
+    def getSchedule(self, deviceName=None):
+        """
+        The schedule of the named device, the first device if no name is given
+        """
+        if deviceName is None:
+            return self.schedules[0] if self.schedules else None
+        for schedule in self.schedules:
+            if schedule.device.name == deviceName:
+                return schedule
+        return None
+
+    def timeToAnnounce(self):
+        """
+        Seconds until the next announcement is due
+        """
+        return max(self.nextAnnounce - monotonic(), 0)
 
     def run(self):
-        if(self.count > 20):
+        now = monotonic()
+        if now >= self.nextAnnounce:
             log.info("Starting APICoordinator")
             self.announceDevice()
-            self.count = 0
-
-        self.count += 1
+            self.nextAnnounce = now + self.announceInterval
 
     def announceDevice(self):
-        scheduleDTO = self.schedule.toDTO()
-        self.mqtt_broker.publish(self.announceTopic, scheduleDTO.json())
\ No newline at end of file
+        for schedule in self.schedules:
+            scheduleDTO = schedule.toDTO()
+            self.mqtt_broker.publish(self.announceTopic, scheduleDTO.json())
\ No newline at end of file
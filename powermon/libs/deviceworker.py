@@ -0,0 +1,37 @@
+import logging
+import threading
+
+
+log = logging.getLogger("DeviceWorker")
+
+
+class DeviceWorker(threading.Thread):
+    """
+    DeviceWorker - runs the schedule of a single device in its own thread
+    - connects the device port, then runs the schedule until it finishes (loop: once) or is stopped
+    - finished (a threading.Event) is set when the worker is done, so the main loop can wake up
+    """
+
+    def __init__(self, schedule, finished=None):
+        super().__init__(name=f"device {schedule.device.name}", daemon=True)
+        self.schedule = schedule
+        self.finished = finished
+        self.done = False
+
+    def __str__(self):
+        return f"DeviceWorker: {self.schedule.device.name}, done: {self.done}"
+
+    def run(self):
+        try:
+            self.schedule.beforeLoop()
+            while self.schedule.runLoop():
+                pass
+        except Exception as exc:
+            log.error("Device %s stopped after error: %s", self.schedule.device.name, exc)
+        finally:
+            self.done = True
+            if self.finished is not None:
+                self.finished.set()
+
+    def stop(self):
+        self.schedule.stop()
@@ -1,8 +1,14 @@
 from enum import StrEnum, auto
-from time import sleep, time
+from datetime import datetime, timedelta
+from heapq import heappop, heappush
+from functools import partial
+from itertools import count
+from time import monotonic, time
 import yaml
 import json
 import logging
+import threading
+from mppsolar.result import ResultView
 from powermon.outputs import getOutputFromConfig
 
 from dto.scheduleDTO import ScheduleDTO
@@ -14,11 +20,15 @@ from .device import Device
 log = logging.getLogger("Schedule")
 
 class Command:
-    def __init__(self, command, commandType, outputs, port):
+    def __init__(self, command, commandType, outputs, port, lean=False, output_queue=None):
         self.command = command
         self.commandType = commandType
         self.outputs = outputs
         self.port = port
+        # outputs are run inline if there is no output queue
+        self.output_queue = output_queue
+        # lean commands are decoded without the raw_response
+        self.lean = lean
 
     def __str__(self):
         return f"Command: {self.command}, CommandType: {self.commandType}, Outputs: {self.outputs}"
@@ -30,31 +40,51 @@ class Command:
         )
         return dto
 
-    def run(self):
-        log.debug(f"Running command: {self.command}")
-        results = self.port.process_command(command=self.command)
+    def run(self, lean=None):
+        log.debug("Running command: %s", self.command)
+        if lean is None:
+            lean = self.lean
+        # every output gets the same read only view of the results, decoded as a Reading as the outputs do not change them
+        results = ResultView.of(self.port.process_command(command=self.command, lean=lean, as_reading=True))
         for output in self.outputs:
-            log.debug(f"Output: {output}")
-            output.output(data=results)
+            log.debug("Output: %s", output)
+            if self.output_queue is None:
+                output.output(data=results)
+            else:
+                # queued results of this command can be coalesced
+                self.output_queue.put(type(output).__name__, self, partial(output.output, data=results))
 
     
 
 class Schedule:
-    def __init__(self, scheduledCommands, loopDuration, mqtt_broker, device: Device):
+    """
+    Schedule - runs the scheduled commands from a heap of monotonic deadlines
+    - runLoop sleeps until the next command is due, an adhoc command is added or max_wait passes
+    - adhoc commands can be added from other threads (eg the mqtt callback)
+    """
+
+    def __init__(self, scheduledCommands, loopDuration, mqtt_broker, device: Device, output_queue=None, clock=monotonic, wall_clock=time):
         self.scheduledCommands = scheduledCommands
         self.loopDuration = loopDuration
-        self.inDelay = False
         self.mqtt_broker = mqtt_broker
         self.device = device
+        self.output_queue = output_queue
+        self._clock = clock
+        self._wall_clock = wall_clock
+        # heap of (deadline, sequence, scheduledCommand), sequence keeps equal deadlines in order
+        self._heap = []
+        self._sequence = count()
+        self._condition = threading.Condition()
+        self._stopped = False
 
-        if(loopDuration == "once"):
-            self.delayRemaining = 0
-        else:
-            self.delayRemaining = loopDuration
+        now = self._clock()
+        wall = self._wall_clock()
+        for scheduledCommand in self.scheduledCommands:
+            self._push(scheduledCommand.first_run(now, wall, loopDuration), scheduledCommand)
 
     def __str__(self):
         return f"Schedule: {self.scheduledCommands}, {self.loopDuration}"
-    
+
     def toDTO(self) -> ScheduleDTO:
         commandSchedules = []
         for scheduledCommand in self.scheduledCommands:
@@ -62,48 +92,97 @@ class Schedule:
         dto = ScheduleDTO(loopDuration=self.loopDuration, device=self.device.toDTO(), schedulesCommands=commandSchedules)
         return dto
 
-    
+    def _push(self, deadline, scheduledCommand):
+        if deadline is not None:
+            heappush(self._heap, (deadline, next(self._sequence), scheduledCommand))
+
     def addOneTimeCommandFromConfig(self, commandConfig):
-        command = self.parseCommandConfig(commandConfig, self.mqtt_broker, self.device)
-        self.scheduledCommands.append(OneTimeCommandSchedule({command}))
+        command = self.parseCommandConfig(commandConfig, self.mqtt_broker, self.device, self.output_queue)
+        scheduledCommand = OneTimeCommandSchedule([command])
+        with self._condition:
+            self.scheduledCommands.append(scheduledCommand)
+            self._push(self._clock(), scheduledCommand)
+            # wake runLoop
+            self._condition.notify()
 
+    def stop(self):
+        """
+        Stop the schedule, waking runLoop if it is waiting
+        """
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+
+    def next_due(self):
+        """
+        Seconds until the next command is due, None if nothing is scheduled
+        """
+        with self._condition:
+            if not self._heap:
+                return None
+            return self._heap[0][0] - self._clock()
 
     #The hook for the port to connect before the main loops starts
     def beforeLoop(self):
         self.device.port.connect()
-    
-    def runLoop(self) -> bool:
-        start_time = time()
-        if(self.inDelay is False):
-            for scheduledCommand in self.scheduledCommands:
-                if scheduledCommand.is_due():
-                    for command in scheduledCommand.commands:
-                        command.run()
-                    
-        # Small pause to ....
-        sleep(0.5)
-        elapsed_time = time() - start_time
-        self.delayRemaining = self.delayRemaining - elapsed_time
-        if self.delayRemaining > 0 and not self.inDelay:
-            log.debug(f"delaying for {self.loopDuration}sec, delayRemaining: {self.delayRemaining}")
-            self.inDelay = True
-        if self.delayRemaining < 0:
-            log.debug(f"Next loop: {self.loopDuration}, {self.delayRemaining}")
-            self.inDelay = False
-            self.delayRemaining = self.loopDuration
+
+    def _pop_due(self, max_wait):
+        """
+        Wait until commands are due (or max_wait passes), and remove them from the heap
+        """
+        with self._condition:
+            deadline = None if max_wait is None else self._clock() + max_wait
+            while True:
+                now = self._clock()
+                if self._stopped:
+                    return now, []
+                if self._heap and self._heap[0][0] <= now:
+                    break
+                waits = [when - now for when in (self._heap[0][0] if self._heap else None, deadline) if when is not None]
+                if waits and min(waits) <= 0:
+                    return now, []
+                self._condition.wait(min(waits) if waits else None)
+            due = []
+            while self._heap and self._heap[0][0] <= now:
+                when, _, scheduledCommand = heappop(self._heap)
+                due.append((when, scheduledCommand))
+            return now, due
+
+    def runLoop(self, max_wait=None) -> bool:
+        """
+        Run the commands that are due, waiting for them if needed
+        - with loop: once the commands due now are run and False is returned
+        - otherwise waits up to max_wait seconds (forever if None) and returns True
+        """
+        if self.loopDuration == "once":
+            max_wait = 0
+        now, due = self._pop_due(max_wait)
+        for when, scheduledCommand in due:
+            if self._stopped:
+                break
+            log.debug("Running %s, %.3fs late", scheduledCommand, now - when)
+            for command in scheduledCommand.commands:
+                command.run()
+            if self.loopDuration != "once":
+                with self._condition:
+                    self._push(scheduledCommand.next_run(when, self._clock(), self._wall_clock(), self.loopDuration), scheduledCommand)
 
         if self.loopDuration == "once":
             log.debug("loopDuration is once, returning False")
             return False
+        elif self._stopped:
+            log.debug("schedule stopped, returning False")
+            return False
         else:
             return True
 
     #TODO: this should follow the same pattern as the other parsers
     @classmethod
-    def parseCommandConfig(cls, command, mqtt_broker, device) -> Command:
+    def parseCommandConfig(cls, command, mqtt_broker, device, output_queue=None) -> Command:
         
         _command = command["command"]
         _commandType = command["type"]
+        _lean = command.get("lean", False)
         _outputs = []
         for outputConfig in command["outputs"]:
             logging.debug(f"command: {command}")
@@ -111,11 +190,11 @@ class Schedule:
             logging.debug(f"output: {_output}")
             _outputs.append(_output)
 
-        return Command(_command, _commandType, _outputs, device.port)
+        return Command(_command, _commandType, _outputs, device.port, lean=_lean, output_queue=output_queue)
 
     #TODO: this should follow the same pattern as the other parsers
     @classmethod
-    def parseScheduleConfig(cls, config, device, mqtt_broker):
+    def parseScheduleConfig(cls, config, device, mqtt_broker, output_queue=None):
         logging.debug("parseScheduleConfig")
         _loopDuration = config["loop"]
 
@@ -123,22 +202,28 @@ class Schedule:
         for schedule in config["schedules"]:
             _scheduleType = schedule["type"]
             if _scheduleType == CommandScheduleType.LOOP:
-                _loopCount = schedule["loopCount"]
+                _loopCount = schedule.get("loopCount", schedule.get("run_every_x_loops"))
             elif _scheduleType == CommandScheduleType.TIME:
-                _runTime = schedule["runTime"]
+                _runTime = schedule.get("runTime", schedule.get("time"))
+            elif _scheduleType == CommandScheduleType.INTERVAL:
+                _interval = schedule["interval"]
 
             _commands = []
             for command in schedule["commands"]:
-                _commands.append(cls.parseCommandConfig(command, mqtt_broker, device))
+                _commands.append(cls.parseCommandConfig(command, mqtt_broker, device, output_queue))
             
             if _scheduleType == CommandScheduleType.LOOP:
                 _schedules.append(LoopCommandSchedule(_loopCount, _commands))
             elif _scheduleType == CommandScheduleType.ONCE:
                 _schedules.append(OneTimeCommandSchedule(_commands))
+            elif _scheduleType == CommandScheduleType.TIME:
+                _schedules.append(TimeCommandSchedule(_runTime, _commands))
+            elif _scheduleType == CommandScheduleType.INTERVAL:
+                _schedules.append(IntervalCommandSchedule(_interval, _commands))
             else:
                 raise KeyError(f"Undefined schedule type: {_scheduleType}")
 
-        schedule = Schedule(_schedules, _loopDuration, mqtt_broker, device)
+        schedule = Schedule(_schedules, _loopDuration, mqtt_broker, device, output_queue=output_queue)
         return schedule
 
 
@@ -146,11 +231,56 @@ class CommandScheduleType(StrEnum):
     LOOP = auto()
     TIME = auto()
     ONCE = auto()
+    INTERVAL = auto()
 
 class InformalScheduledCommandInterface:
-    def is_due(self):
+    def first_run(self, now, wall, loopDuration):
+        """
+        Monotonic time the commands are first due, None if never
+        """
         raise NotImplementedError
-    
+
+    def next_run(self, last_run, now, wall, loopDuration):
+        """
+        Monotonic time the commands are next due after running at last_run, None if not again
+        """
+        raise NotImplementedError
+
+    def toDTO(self):
+        commandDTOs = []
+        for command in self.commands:
+            commandDTOs.append(command.toDTO())
+        dto = CommandScheduleDTO(type=self.scheduleType, commands=commandDTOs)
+        return dto
+
+
+def next_fixed_rate_run(name, last_run, interval, now):
+    """
+    Next run on the fixed rate grid last_run + n * interval, skipping any slots already missed
+    """
+    next_run = last_run + interval
+    if next_run <= now:
+        missed = int((now - next_run) // interval) + 1
+        log.warning(f"{name} overran its {interval}s interval, skipping {missed} run(s)")
+        next_run += missed * interval
+    return next_run
+
+
+class IntervalCommandSchedule(InformalScheduledCommandInterface):
+    def __init__(self, interval, commands: list):
+        self.scheduleType = CommandScheduleType.INTERVAL
+        self.interval = interval
+        self.commands = commands
+
+    def __str__(self):
+        return f"ScheduleType: {self.scheduleType}, Interval: {self.interval}, Commands: {self.commands}"
+
+    def first_run(self, now, wall, loopDuration):
+        return now
+
+    def next_run(self, last_run, now, wall, loopDuration):
+        return next_fixed_rate_run(self, last_run, self.interval, now)
+
 
 class LoopCommandSchedule(InformalScheduledCommandInterface):
     def __init__(self, loopCount, commands: list):
@@ -158,50 +288,62 @@ class LoopCommandSchedule(InformalScheduledCommandInterface):
         self.loopCount = loopCount
         self.commands = commands
 
-        self.currentLoopCount = loopCount # Set to loopCount so that the first loop will run
-
     def __str__(self):
         return f"ScheduleType: {self.scheduleType}, LoopCount: {self.loopCount}, Commands: {self.commands}"
 
-    def toDTO(self):
-        commandDTOs = []
-        for command in self.commands:
-            commandDTOs.append(command.toDTO())
-        dto = CommandScheduleDTO(type=self.scheduleType, commands=commandDTOs)
-        return dto
+    def first_run(self, now, wall, loopDuration):
+        # the first loop runs straight away
+        return now
 
-    def is_due(self):
-        if self.currentLoopCount < self.loopCount:
-            self.currentLoopCount += 1
-            return False
+    def next_run(self, last_run, now, wall, loopDuration):
+        # every loopCount loops of loopDuration seconds
+        return next_fixed_rate_run(self, last_run, self.loopCount * loopDuration, now)
+
+
+class TimeCommandSchedule(InformalScheduledCommandInterface):
+    """
+    TimeCommandSchedule - runs the commands every day at runTime (local time)
+    - runTime is 'HH:MM[:SS]' or seconds after midnight
+    - the config is read with ConfigLoader, so an unquoted time: 15:00 is the string '15:00'
+      (plain yaml would read it as the base 60 integer 900, ie 00:15)
+    """
+
+    def __init__(self, runTime, commands: list):
+        self.scheduleType = CommandScheduleType.TIME
+        self.runTime = runTime
+        self.commands = commands
+        if isinstance(runTime, int):
+            self._seconds = runTime
         else:
-            self.currentLoopCount = 1
-            return True
-        
+            parts = [int(part) for part in str(runTime).split(":")]
+            parts += [0] * (3 - len(parts))
+            self._seconds = parts[0] * 3600 + parts[1] * 60 + parts[2]
+
+    def __str__(self):
+        return f"ScheduleType: {self.scheduleType}, RunTime: {self.runTime}, Commands: {self.commands}"
+
+    def first_run(self, now, wall, loopDuration):
+        current = datetime.fromtimestamp(wall)
+        target = current.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(seconds=self._seconds)
+        if target <= current:
+            target += timedelta(days=1)
+        # the wall clock time as a monotonic deadline
+        return now + (target.timestamp() - wall)
+
+    def next_run(self, last_run, now, wall, loopDuration):
+        return self.first_run(now, wall, loopDuration)
+
 
 class OneTimeCommandSchedule(InformalScheduledCommandInterface):
     def __init__(self, _commands):
         self.scheduleType = CommandScheduleType.ONCE
         self.commands = _commands
-        self.has_run = False
     
     def __str__(self):
         return f"ScheduleType: {self.scheduleType}, Commands: {self.commands}"
-    
-    def toDTO(self):
-        commandDTOs = []
-        for command in self.commands:
-            commandDTOs.append(command.toDTO())
-        dto = CommandScheduleDTO(scheduleType=self.scheduleType, commands=commandDTOs)
-        return dto
-    
-    def is_due(self):
-        if self.has_run:
-            log.debug("One time command has already run")
-            return False
-        else:
-            log.debug("One time command is due to run")
-            self.has_run = True
-            return True
 
+    def first_run(self, now, wall, loopDuration):
+        return now
 
+    def next_run(self, last_run, now, wall, loopDuration):
+        return None
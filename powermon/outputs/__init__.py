@@ -7,7 +7,7 @@ def getOutputFromConfig(outputConfig, device, mqtt_broker):
     formatConfig = outputConfig["format"]
     topic = outputConfig.get("topic", None)
     tag = outputConfig.get("tag", None)
-    format = getFormatfromConfig(formatConfig, device, topic, tag)
+    format = getFormatfromConfig(formatConfig, device, topic, tag, mqtt_broker)
 
     output_class = None
     #Only import the required class
@@ -49,6 +49,7 @@ class MQTT(AbstractOutput):
 
         # publish
         if (self.formatter.sendsMultipleMessages()):
-            self.mqtt_broker.publishMultiple(formattedData)
+            if self.mqtt_broker.publishMultiple(formattedData):
+                self.formatter.notPublished(formattedData)
         else:
             self.mqtt_broker.publish(self.topic_prefix, formattedData)
\ No newline at end of file
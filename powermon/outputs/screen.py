@@ -1,10 +1,14 @@
 import logging
+import threading
 
 from mppsolar.helpers import get_kwargs
 from powermon.outputs.abstractoutput import AbstractOutput
 
 log = logging.getLogger("screen")
 
+# keeps the lines of each output together when several devices print at once
+_print_lock = threading.Lock()
+
 
 class Screen(AbstractOutput):
     def __init__(self, outputConfig, formatter):
@@ -21,8 +25,9 @@ class Screen(AbstractOutput):
             print("Nothing returned from data formatting")
             return
 
-        if isinstance(formatted_data, list):
-            for line in formatted_data:
-                print(line)
-        else:
-            print(formatted_data)
+        with _print_lock:
+            if isinstance(formatted_data, list):
+                for line in formatted_data:
+                    print(line)
+            else:
+                print(formatted_data)
@@ -5,6 +5,7 @@ import importlib
 from powermon.ports.abstractport import PortType
 from powermon.ports.serialport import SerialPort
 from powermon.ports.usbport import USBPort
+from mppsolar.inout.hidrawtransport import REPORT_GAP
 
 def getPortFromConfig(port_config):
 
@@ -26,7 +27,7 @@ def getPortFromConfig(port_config):
     if portType == PortType.SERIAL:
         portObject = SerialPort(portPath, portBaud, protocol)
     elif portType == PortType.USB:
-        portObject = USBPort(portPath, protocol)
+        portObject = USBPort(portPath, protocol, report_gap=port_config.get("report_gap", REPORT_GAP))
 
     #Pattern for port types that cause problems when imported
     elif portType == PortType.TEST:
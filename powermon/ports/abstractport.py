@@ -34,7 +34,7 @@ class AbstractPort(ABC):
         return
 
     @abstractmethod
-    def send_and_receive(self, command) -> dict:
+    def send_and_receive(self, command, request=None) -> dict:
         raise NotImplementedError
     
     @abstractmethod
@@ -42,14 +42,16 @@ class AbstractPort(ABC):
         raise NotImplementedError
 
     # Question: Should we make this an abstract method?
-    def process_command(self, command):
+    def process_command(self, command, lean=False, as_reading=False):
         # Band-aid solution, need to reduce what is sent
-        log.debug(f"Command {command}")
-        full_command = self.protocol.get_full_command(command)
-        log.debug(f"Full Command {full_command}")
+        log.debug("Command %s", command)
+        # the per call state is kept in the request so the protocol can be shared
+        request = self.protocol.get_request(command)
+        full_command = self.protocol.get_full_command(command, request=request)
+        log.debug("Full Command %s", full_command)
 
-        raw_response = self.send_and_receive(command)
-        log.debug(f"Send and Receive Response {raw_response}")
+        raw_response = self.send_and_receive(command, request=request)
+        log.debug("Send and Receive Response %s", raw_response)
 
         # Handle errors
         # Maybe there should a decode for ERRORs and WARNINGS...
@@ -67,7 +69,7 @@ class AbstractPort(ABC):
             return raw_response
 
         # Decode response
-        decoded_response = self.protocol.decode(raw_response, command)
-        log.info(f"Decoded response {decoded_response}")
+        decoded_response = self.protocol.decode(raw_response, command, lean=lean, as_reading=as_reading, request=request)
+        log.info("Decoded response %s", decoded_response)
 
         return decoded_response
\ No newline at end of file
@@ -36,8 +36,11 @@ class SerialPort(AbstractPort):
             self.serialPort.close()
         return
 
-    def send_and_receive(self, command) -> dict:
-        full_command = self.protocol.get_full_command(command)
+    def send_and_receive(self, command, request=None) -> dict:
+        if request is not None and request.full_command is not None:
+            full_command = request.full_command
+        else:
+            full_command = self.protocol.get_full_command(command)
         response_line = None
         log.debug(f"port {self.serialPort}")
         if self.serialPort is None:
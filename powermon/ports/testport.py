@@ -38,8 +38,11 @@ class TestPort(AbstractPort):
         log.debug("Test port disconnected")
         return
 
-    def send_and_receive(self, command) -> dict:
-        command_defn = self.protocol.get_command_defn(command)
+    def send_and_receive(self, command, request=None) -> dict:
+        if request is not None:
+            command_defn = request.command_defn
+        else:
+            command_defn = self.protocol.get_command_defn(command)
 
         if command_defn is not None:
             # Have test data defined, so use that
@@ -0,0 +1,137 @@
+import asyncio
+import os
+import threading
+import time
+import tty
+import unittest
+
+from mppsolar.asyncloop import group_by_port, run_commands, run_loop
+from mppsolar.devices.asyncdevice import AsyncDevice
+from mppsolar.inout.asyncbaseio import ThreadedIO
+from mppsolar.inout.asyncserialio import AsyncSerialIO
+from mppsolar.protocols.pi30 import pi30
+
+# seconds the fake inverters take to answer
+DELAY = 0.2
+
+
+def fake_inverter(master, response, stop):
+    """ answer every command received on the pty master with response after DELAY """
+    received = b""
+    while not stop.is_set():
+        try:
+            received += os.read(master, 64)
+        except OSError:
+            return
+        while b"\r" in received:
+            _, received = received.split(b"\r", 1)
+            time.sleep(DELAY)
+            os.write(master, response)
+
+
+class SlowDevice:
+    """ an async device taking delay seconds per command """
+
+    def __init__(self, name, port, delay):
+        self._name = name
+        self._port_name = port
+        self.delay = delay
+        self.commands = []
+
+    async def run_command(self, command, as_reading=False):
+        await asyncio.sleep(self.delay)
+        self.commands.append(command)
+        return {"_command": command}
+
+
+class test_asyncdevice(unittest.TestCase):
+    def test_run_command_test_port(self):
+        """ test a port without an asyncio implementation is run in a worker thread """
+        device = AsyncDevice(name="test", port="test", protocol="PI30")
+        result = asyncio.run(device.run_command("QPI"))
+        self.assertEqual(result["Protocol ID"][0], "PI30")
+
+    def test_group_by_port(self):
+        """ test commands are grouped by port in their original order """
+        a = AsyncDevice(name="a", port="test0", protocol="PI30")
+        b = AsyncDevice(name="b", port="test1", protocol="PI30")
+        c = AsyncDevice(name="c", port="test0", protocol="PI30")
+        commands = [(a, "QPI"), (b, "QPI"), (c, "QMOD"), (a, "QID")]
+        self.assertEqual(list(group_by_port(commands).values()), [[(a, "QPI"), (c, "QMOD"), (a, "QID")], [(b, "QPI")]])
+
+    def test_ports_scheduled_independently(self):
+        """ test each port runs on its own schedule, a slow port does not delay the others """
+        slow = SlowDevice("slow", "test0", delay=0.6)
+        fast = SlowDevice("fast", "test1", delay=0)
+        commands = [(slow, "QPIGS"), (fast, "QPIGS")]
+        notified = []
+
+        async def run():
+            try:
+                await asyncio.wait_for(run_loop(commands, lambda item, result: None, schedules={"slow": (1, 0)}, pause=0.1, notify=lambda: notified.append(1)), 1)
+            except asyncio.TimeoutError:
+                pass
+
+        asyncio.run(run())
+        self.assertLessEqual(len(slow.commands), 1)
+        self.assertGreaterEqual(len(fast.commands), 7)
+        self.assertTrue(notified)
+
+    def test_concurrent_serial_ports(self):
+        """ test two serial ports are polled concurrently, with the commands for each port in order """
+        response = pi30().get_command_defn("QPI")["test_responses"][0]
+        stop = threading.Event()
+        masters = []
+        devices = []
+        for number in range(2):
+            master, slave = os.openpty()
+            tty.setraw(slave)
+            masters.append((master, slave))
+            threading.Thread(target=fake_inverter, args=(master, response, stop), daemon=True).start()
+            devices.append(AsyncDevice(name=f"inverter{number}", port=os.ttyname(slave), porttype="serial", protocol="PI30"))
+        commands = [(device, "QPI") for device in devices for _ in range(2)]
+        results = []
+
+        start = time.monotonic()
+        asyncio.run(run_commands(commands, lambda item, result: results.append((item[0]._name, result))))
+        elapsed = time.monotonic() - start
+
+        stop.set()
+        for device in devices:
+            asyncio.run(device.disconnect())
+        for master, slave in masters:
+            os.close(slave)
+            os.close(master)
+        self.assertEqual(len(results), 4)
+        for _, result in results:
+            self.assertEqual(result["Protocol ID"][0], "PI30")
+        # 2 commands per port in sequence, the ports concurrently
+        self.assertGreaterEqual(elapsed, 2 * DELAY)
+        self.assertLess(elapsed, 4 * DELAY)
+
+    def test_url_serial_port(self):
+        """ test a url serial port, without a file descriptor to wait on, is run in a worker thread """
+        io = AsyncSerialIO(device_path="loop://", serial_baud=2400)
+        self.assertEqual(asyncio.run(io.send_and_receive(full_command=b"QPI\xbe\xac\r", protocol=None, request=None)), b"QPI\xbe\xac\r")
+        self.assertIsInstance(io._threaded, ThreadedIO)
+        asyncio.run(io.disconnect())
+
+    def test_socket_port(self):
+        """ test the asyncio remote socket port """
+        response = pi30().get_command_defn("QPI")["test_responses"][0]
+
+        async def handle(reader, writer):
+            await reader.readuntil(b"\r")
+            writer.write(response)
+            await writer.drain()
+            writer.close()
+
+        async def run():
+            server = await asyncio.start_server(handle, "127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+            device = AsyncDevice(name="remote", port=f"127.0.0.1:{port}", porttype="remotesocket", protocol="PI30")
+            async with server:
+                return await device.run_command("QPI")
+
+        result = asyncio.run(run())
+        self.assertEqual(result["Protocol ID"][0], "PI30")
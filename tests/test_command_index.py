@@ -0,0 +1,41 @@
+import unittest
+
+from mppsolar.protocols.command_index import CommandIndex
+from mppsolar.protocols.pi18 import pi18
+from mppsolar.protocols.pi30 import pi30
+
+
+class test_command_index(unittest.TestCase):
+    def test_exact_command(self):
+        """test lookup of a non-regex command"""
+        protocol = pi30()
+        command_defn = protocol.get_command_defn("QPIGS")
+        self.assertEqual(command_defn["name"], "QPIGS")
+
+    def test_regex_command(self):
+        """test lookup of a regex command captures the command value"""
+        protocol = pi30()
+        request = protocol.get_request("MCHGC040")
+        self.assertEqual(request.command_defn["name"], "MCHGC")
+        self.assertEqual(request.command_value, "040")
+
+    def test_regex_command_multiple_groups(self):
+        """test the command value is the first group of the matching regex"""
+        protocol = pi18()
+        request = protocol.get_request("MUCHGC0,030")
+        self.assertEqual(request.command_defn["name"], "MUCHGC")
+        self.assertEqual(request.command_value, "0")
+
+    def test_unknown_command(self):
+        """test lookup of an undefined command"""
+        protocol = pi30()
+        self.assertIsNone(protocol.get_command_defn("XYZ"))
+
+    def test_index_rebuilt_on_change(self):
+        """test the index follows changes to COMMANDS"""
+        commands = {"A": {"name": "A"}}
+        index = CommandIndex(commands)
+        self.assertTrue(index.is_for(commands))
+        commands["B"] = {"name": "B", "regex": "B(\\d)$"}
+        self.assertFalse(index.is_for(commands))
+        self.assertEqual(CommandIndex(commands).lookup("B1"), (commands["B"], "1"))
@@ -0,0 +1,42 @@
+import unittest
+
+from mppsolar.protocols.pi18 import pi18
+from mppsolar.protocols.pi30 import pi30
+from mppsolar.protocols.pi30max import pi30max
+
+
+class test_command_request(unittest.TestCase):
+    def test_request(self):
+        """test the request holds the per call state"""
+        protocol = pi18()
+        request = protocol.get_request("EY2021")
+        self.assertEqual(request.command_defn["name"], "EY")
+        self.assertEqual(request.command_value, "2021")
+        self.assertIsNone(request.full_command)
+        full_command = protocol.get_full_command("EY2021", request=request)
+        self.assertEqual(request.full_command, full_command)
+
+    def test_interleaved_requests(self):
+        """test interleaved commands on a shared protocol decode with their own state"""
+        protocol = pi18()
+        response = b"^D01105580051\x0b\x9f\r"
+        first = protocol.get_request("EY2021")
+        second = protocol.get_request("EY2022")
+        protocol.get_full_command("EY2021", request=first)
+        protocol.get_full_command("EY2022", request=second)
+        result = protocol.decode(response, "EY2021", request=first)
+        self.assertEqual(result["Year"], ["2021", "", None])
+        result = protocol.decode(response, "EY2022", request=second)
+        self.assertEqual(result["Year"], ["2022", "", None])
+
+    def test_commands_read_only(self):
+        """test the command tables cannot be changed"""
+        protocol = pi30()
+        with self.assertRaises(TypeError):
+            protocol.COMMANDS["QXYZ"] = {}
+
+    def test_subclass_commands_isolated(self):
+        """test a subclass does not change the commands of its parent"""
+        pi30max()
+        self.assertIn("QVFW2", pi30().COMMANDS)
+        self.assertNotIn("QVFW2", pi30max().COMMANDS)
@@ -0,0 +1,46 @@
+import unittest
+
+from mppsolar.protocols.crc import crc_pi, crc_pi_table, crc_jk232, daly_checksum
+from mppsolar.protocols.pi30 import pi30
+
+
+class test_crc(unittest.TestCase):
+    def test_crc_pi(self):
+        """ test the PI CRC of QPIGS """
+        result = crc_pi(b"QPIGS")
+        expected = [0xB7, 0xA9]
+        self.assertEqual(result, expected)
+
+    def test_crc_pi_table(self):
+        """ test the table and accelerated PI CRC agree """
+        for data in [b"QPIRI", b"QMOD", b"POP02", b"(230.0 50.0 0000 000"]:
+            self.assertEqual(crc_pi(data), crc_pi_table(data))
+            self.assertEqual(crc_pi(data), crc_pi_table(data.decode()))
+
+    def test_crc_pi_escape(self):
+        """ test reserved bytes are not used in the PI CRC """
+        # POP02 has a crc of 0xe20a
+        self.assertEqual(crc_pi(b"POP02"), [0xE2, 0x0B])
+        # QBOOT has a crc of 0x0a88
+        self.assertEqual(crc_pi(b"QBOOT"), [0x0B, 0x88])
+
+    def test_crc_jk232(self):
+        """ test the JK232 CRC """
+        result = crc_jk232([0x03, 0x00])
+        expected = [0xFF, 0xFD]
+        self.assertEqual(result, expected)
+
+    def test_daly_checksum(self):
+        """ test the Daly checksum """
+        result = daly_checksum(b"\xa5\x80\x90\x08\x00\x00\x00\x00\x00\x00\x00\x00")
+        expected = 0xBD
+        self.assertEqual(result, expected)
+
+    def test_full_command_cached(self):
+        """ test the full command is only built once """
+        protocol = pi30()
+        full_command = protocol.get_full_command("QPIGS")
+        self.assertEqual(full_command, b"QPIGS\xb7\xa9\r")
+        request = protocol.get_request("QPIGS")
+        self.assertIs(protocol.get_full_command("QPIGS", request=request), full_command)
+        self.assertIs(request.full_command, full_command)
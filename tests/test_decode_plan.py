@@ -0,0 +1,87 @@
+import unittest
+
+from mppsolar.protocols.daly import daly
+from mppsolar.protocols.decode_plan import CommandPlan, FieldPlan, UnpackedRecord
+from mppsolar.protocols.jk02 import jk02
+
+
+class test_decode_plan(unittest.TestCase):
+    maxDiff = 9999
+
+    def test_field_template(self):
+        """test a field with a scaling template"""
+        field = FieldPlan(data_type="BigHex2Short:r/10", data_name="Battery Bank Voltage", data_units="V")
+        result = field.process(b"\x02\x14")
+        expected = [("Battery Bank Voltage", 53.2, "V", None)]
+        self.assertEqual(result, expected)
+
+    def test_field_name_formatter(self):
+        """test a field with a frame dependant name"""
+        field = FieldPlan(data_type="BigHex2Short:r/1000", data_name="f'Cell {3*f+2:02d} Voltage'", data_units="V")
+        result = field.process(b"\x0c\xfe", frame_number=1)
+        expected = [("Cell 05 Voltage", 3.326, "V", None)]
+        self.assertEqual(result, expected)
+
+    def test_field_discard(self):
+        """test discard fields are not named"""
+        field = FieldPlan(data_type="discard", data_name="checksum", data_units="")
+        result = field.process(b"\x99")
+        expected = [(None, b"\x99", "", None)]
+        self.assertEqual(result, expected)
+
+    def test_field_value_error(self):
+        """test a value that will not convert returns 0"""
+        field = FieldPlan(data_type="int", data_name="AC Output Load", data_units="%")
+        result = field.process(b"--")
+        expected = [("AC Output Load", 0, "%", None)]
+        self.assertEqual(result, expected)
+
+    def test_plan_matches_process_response(self):
+        """test the compiled plan matches process_response for each field"""
+        protocol = daly()
+        command_defn = protocol.get_command_defn("SOC")
+        plan = CommandPlan(command_defn)
+        raw_values = [b"\xa5", b"\x01", b"\x90", b"\x08", b"\x02\x14", b"\x00\x00", b"uE", b"\x03x", b"\x89"]
+        for field, defn, raw_value in zip(plan.fields, command_defn["response"], raw_values):
+            expected = protocol.process_response(
+                data_name=defn[2], data_type=defn[0], data_units=defn[3], raw_value=raw_value
+            )
+            self.assertEqual(field.process(raw_value), expected)
+
+    def test_plan_cached(self):
+        """test the decode plan is compiled once per command"""
+        protocol = daly()
+        command_defn = protocol.get_command_defn("SOC")
+        plan = protocol.get_decode_plan(command_defn)
+        self.assertIs(protocol.get_decode_plan(command_defn), plan)
+
+    def test_layout_unpack(self):
+        """test the record layout unpacks binary fields in one pass"""
+        plan = CommandPlan(daly().get_command_defn("SOC"))
+        result = plan.layout.split(b"\xa5\x01\x90\x08\x02\x14\x00\x00uE\x03x\x89")
+        self.assertIsInstance(result, UnpackedRecord)
+        expected = [b"\xa5", b"\x01", b"\x90", b"\x08", 532, 0, 30021, 888, b"\x89"]
+        self.assertEqual(list(result), expected)
+        self.assertEqual(result.decoded, [False, False, False, False, True, True, True, True, False])
+
+    def test_layout_short_record(self):
+        """test a short record is split without conversion"""
+        plan = CommandPlan(daly().get_command_defn("SOC"))
+        result = plan.layout.split(b"\xa5\x01\x90\x08\x02\x14\x00")
+        self.assertNotIsInstance(result, UnpackedRecord)
+        expected = [b"\xa5", b"\x01", b"\x90", b"\x08", b"\x02\x14", b"\x00", b"", b"", b""]
+        self.assertEqual(result, expected)
+
+    def test_layout_matches_decode(self):
+        """test struct decoded values match the per field helpers"""
+        protocol = jk02()
+        command_defn = protocol.get_command_defn("getCellData")
+        response = command_defn["test_responses"][0]
+        plan = protocol.get_decode_plan(command_defn)
+        record = plan.layout.split(response, remainder=True)
+        offset = 0
+        for i, defn in enumerate(command_defn["response"]):
+            raw_value = response[offset : offset + defn[1]]
+            offset += defn[1]
+            if record.decoded[i]:
+                self.assertEqual(plan.fields[i].process_value(record[i]), plan.fields[i].process(raw_value))
@@ -0,0 +1,83 @@
+import socket
+import threading
+import time
+import unittest
+
+import serial
+
+from mppsolar.inout.framereader import read_frame, recv_frame
+from mppsolar.protocols.daly import daly
+from mppsolar.protocols.framing import Framer, LengthFramer, TerminatorFramer, VEDTextFramer
+from mppsolar.protocols.jk232 import jk232
+from mppsolar.protocols.jk485 import jk485
+from mppsolar.protocols.pi30 import pi30
+from mppsolar.protocols.ved import ved
+
+
+class test_framing(unittest.TestCase):
+    def test_protocol_framers(self):
+        """ test the protocol framers recognise their test responses as complete """
+        for protocol, command in [(pi30(), "QPIGS"), (daly(), "SOC"), (jk232(), "getBalancerData"), (jk485(), "getBalancerData")]:
+            request = protocol.get_request(command)
+            framer = protocol.get_response_framer(request)
+            for response in request.command_defn["test_responses"]:
+                self.assertEqual(framer.frame_end(response), len(response), f"{protocol} {command}")
+                self.assertIsNone(framer.frame_end(response[:-1]), f"{protocol} {command}")
+
+    def test_framer_needs_frame_end(self):
+        """ test a framer without frame_end fails when it is created, rather than during a read """
+
+        class NoFrameEnd(Framer):
+            pass
+
+        with self.assertRaises(TypeError):
+            NoFrameEnd()
+
+    def test_daly_multiframe(self):
+        """ test Daly multiframe responses are counted in whole frames """
+        response = daly().COMMANDS["cellTemperatures"]["test_responses"][0]
+        framer = LengthFramer(b"\xa5", header_length=4, length_offset=3, trailer_length=1, frames=2)
+        self.assertEqual(framer.frame_end(response), 26)
+        self.assertIsNone(framer.frame_end(response[:20]))
+        # unknown number of frames, only ends on the inter byte timeout
+        framer.frames = None
+        self.assertIsNone(framer.frame_end(response))
+
+    def test_vedtext_framer(self):
+        """ test VE.Direct text responses end at the Checksum record """
+        protocol = ved()
+        response = protocol.COMMANDS["vedtext"]["test_responses"][0]
+        framer = protocol.get_response_framer(protocol.get_request("vedtext"))
+        end = framer.frame_end(response)
+        self.assertTrue(response[:end].endswith(b"Checksum\tL"))
+        self.assertIsNone(VEDTextFramer(blocks=3).frame_end(response))
+        self.assertEqual(VEDTextFramer(blocks=3, max_lines=2).frame_end(response), len(b"H1\t-32914\r\nH2\t0\r\n"))
+
+    def test_read_frame(self):
+        """ test read_frame returns as soon as the response is complete """
+        port = serial.serial_for_url("loop://", 2400)
+        port.write(b"(230.0 50.0\r(extra")
+        start = time.monotonic()
+        self.assertEqual(read_frame(port, TerminatorFramer(b"\r"), timeout=2), b"(230.0 50.0\r")
+        self.assertLess(time.monotonic() - start, 1)
+        port.reset_input_buffer()
+        # incomplete response ends on the inter byte timeout
+        port.write(b"(230.0")
+        self.assertEqual(read_frame(port, TerminatorFramer(b"\r"), timeout=2, inter_byte_timeout=0.05), b"(230.0")
+        port.close()
+
+    def test_recv_frame(self):
+        """ test recv_frame assembles a response sent in pieces """
+        left, right = socket.socketpair()
+
+        def send():
+            for part in [b"(230.0", b" 50.0", b"\r"]:
+                right.sendall(part)
+                time.sleep(0.02)
+
+        sender = threading.Thread(target=send)
+        sender.start()
+        self.assertEqual(recv_frame(left, TerminatorFramer(b"\r"), timeout=2), b"(230.0 50.0\r")
+        sender.join()
+        left.close()
+        right.close()
@@ -0,0 +1,96 @@
+import unittest
+
+from mppsolar.libs.hassdiscovery import HASS_STATUS_TOPIC, DiscoveryRegistry
+from mppsolar.outputs.hassd_mqtt import hassd_mqtt
+from powermon.formats.hass import hass
+from powermon.outputs.mqtt import MQTT
+
+
+class Broker:
+    def __init__(self):
+        self.connects = 1
+        self.callbacks = {}
+
+    def subscribeCallback(self, topic, callback):
+        self.callbacks[topic] = callback
+
+
+class PublishingBroker(Broker):
+    """ records the topics of each batch, reporting dropped messages not published """
+
+    def __init__(self):
+        super().__init__()
+        self.batches = []
+        self.dropped = 0
+
+    def publishMultiple(self, msgs):
+        self.batches.append([msg["topic"] for msg in msgs])
+        return self.dropped
+
+
+class Message:
+    def __init__(self, payload):
+        self.payload = payload
+
+
+class TestDiscoveryRegistry(unittest.TestCase):
+    def test_changed(self):
+        """ test a config is only published when new or changed """
+        registry = DiscoveryRegistry()
+        self.assertTrue(registry.changed("homeassistant/sensor/a/config", '{"name": "a"}'))
+        self.assertFalse(registry.changed("homeassistant/sensor/a/config", '{"name": "a"}'))
+        self.assertTrue(registry.changed("homeassistant/sensor/a/config", '{"name": "b"}'))
+        self.assertTrue(registry.changed("homeassistant/sensor/b/config", '{"name": "b"}'))
+
+    def test_republish(self):
+        """ test the configs are published again after a reconnect or home assistant restart """
+        broker = Broker()
+        registry = DiscoveryRegistry(broker)
+        self.assertTrue(registry.changed("a", "{}"))
+        broker.connects += 1
+        self.assertTrue(registry.changed("a", "{}"))
+        self.assertFalse(registry.changed("a", "{}"))
+        broker.callbacks[HASS_STATUS_TOPIC](None, None, Message(b"offline"))
+        self.assertFalse(registry.changed("a", "{}"))
+        broker.callbacks[HASS_STATUS_TOPIC](None, None, Message(b"online"))
+        self.assertTrue(registry.changed("a", "{}"))
+
+    def test_hassd_mqtt_configs_once(self):
+        """ test hassd_mqtt sends the configs (retained) once and the states every time """
+        data = {"_command": "QPIGS", "Battery voltage": [51.4, "V"], "Battery energy": [12, "kWh"]}
+        op = hassd_mqtt()
+        config_msgs, value_msgs = op.build_msgs(data=data, tag="test", keep_case=False, filter=None, excl_filter=None)
+        self.assertEqual([msg["topic"] for msg in config_msgs], ["homeassistant/sensor/mpp_test_battery_voltage/config", "homeassistant/sensor/mpp_test_battery_energy/config"])
+        self.assertTrue(all(msg["retain"] for msg in config_msgs))
+        config_msgs, value_msgs = op.build_msgs(data=data, tag="test", keep_case=False, filter=None, excl_filter=None)
+        self.assertEqual(config_msgs, [])
+        self.assertEqual(value_msgs, [
+            {"topic": "homeassistant/sensor/mpp_test_battery_voltage/state", "payload": 51.4},
+            {"topic": "homeassistant/sensor/mpp_test_battery_energy/state", "payload": 12},
+        ])
+
+    def test_hassd_mqtt_config_not_published(self):
+        """ test a config that was not published is sent again with the next results """
+        broker = PublishingBroker()
+        broker.dropped = 1
+        data = {"_command": "QPIGS", "Battery voltage": [51.4, "V"]}
+        op = hassd_mqtt()
+        op.output(data=data, tag="test", mqtt_broker=broker, keep_case=False, filter=None, excl_filter=None)
+        broker.dropped = 0
+        op.output(data=data, tag="test", mqtt_broker=broker, keep_case=False, filter=None, excl_filter=None)
+        op.output(data=data, tag="test", mqtt_broker=broker, keep_case=False, filter=None, excl_filter=None)
+        config = ["homeassistant/sensor/mpp_test_battery_voltage/config", "homeassistant/sensor/mpp_test_battery_voltage/state"]
+        self.assertEqual(broker.batches, [config, config, ["homeassistant/sensor/mpp_test_battery_voltage/state"]])
+
+    def test_powermon_hass_config_not_published(self):
+        """ test powermon sends a config that was not published again with the next results """
+        broker = PublishingBroker()
+        broker.dropped = 1
+        output = MQTT({"tag": "test"}, broker, hass({}, None, broker))
+        data = {"_command": "QPIGS", "Battery voltage": [51.4, "V"]}
+        output.output(data)
+        broker.dropped = 0
+        output.output(data)
+        output.output(data)
+        config = ["homeassistant/sensor/mpp_battery_voltage/config", "homeassistant/sensor/mpp_battery_voltage/state"]
+        self.assertEqual(broker.batches, [config, config, ["homeassistant/sensor/mpp_battery_voltage/state"]])
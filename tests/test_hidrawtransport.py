@@ -0,0 +1,94 @@
+import os
+import select
+import socket
+import threading
+import time
+import tty
+import unittest
+
+from mppsolar.inout.hidrawtransport import HIDRawTransport, split_reports
+from mppsolar.protocols.pi30 import pi30
+
+
+def fake_inverter(sock, response, reports):
+    """ record the reports received until a CR, then send the response in 8 byte reports """
+    received = b""
+    while b"\r" not in received:
+        report = sock.recv(64)
+        if not report:
+            return
+        reports.append((time.monotonic(), report))
+        received += report
+    for i in range(0, len(response), 8):
+        sock.sendall(response[i:i + 8].ljust(8, b"\x00"))
+
+
+class test_hidrawtransport(unittest.TestCase):
+    def test_split_reports(self):
+        """ test full commands are split into reports as the inverters expect """
+        self.assertEqual(split_reports(b"QPI\xbe\xac\r"), [b"QPI\xbe\xac\r"])
+        self.assertEqual(split_reports(b"QPIGS\xb7\xa9\r"), [b"QPIGS\xb7\xa9\r"])
+        self.assertEqual(split_reports(b"QPIGS2\x68\x2d\r"), [b"QPIGS", b"2\x68\x2d\r"])
+        self.assertEqual(split_reports(b"PBATCD111\x00\x00\r"), [b"PBATCD11", b"1\x00\x00\r"])
+        self.assertEqual(split_reports(b"PBATCD111\x00\x00\r", None), [b"PBATCD111\x00\x00\r"])
+
+    def test_send_and_receive(self):
+        """ test a command and response over a socketpair stand in for the hidraw device """
+        protocol = pi30()
+        full_command = protocol.get_full_command("QPIRI")
+        response = protocol.get_command_defn("QPIRI")["test_responses"][0]
+        host, device = socket.socketpair()
+        reports = []
+        inverter = threading.Thread(target=fake_inverter, args=(device, response, reports))
+        inverter.start()
+        transport = HIDRawTransport("socketpair", report_gap=0.02, fd=host.detach())
+        start = time.monotonic()
+        result = transport.send_and_receive(full_command)
+        elapsed = time.monotonic() - start
+        inverter.join()
+        self.assertEqual(result, response)
+        self.assertEqual(b"".join(report for _, report in reports), full_command)
+        # reports are at least report_gap apart, and there are no other fixed delays
+        self.assertTrue(all(b[0] - a[0] >= 0.015 for a, b in zip(reports, reports[1:])))
+        self.assertLess(elapsed, 0.5)
+        self.assertTrue(transport.is_open)
+        transport.close()
+        device.close()
+
+    def test_stale_input_discarded(self):
+        """ test the late end of an earlier response is not read as the start of the next """
+        protocol = pi30()
+        response = protocol.get_command_defn("QPI")["test_responses"][0]
+        host, device = socket.socketpair()
+        device.sendall(b"1.0 0 0\r".ljust(16, b"\x00"))
+        reports = []
+        inverter = threading.Thread(target=fake_inverter, args=(device, response, reports))
+        inverter.start()
+        transport = HIDRawTransport("socketpair", report_gap=0, fd=host.detach())
+        # wait for the stale input to arrive
+        transport._wait_for(select.POLLIN, 1)
+        self.assertEqual(transport.send_and_receive(protocol.get_full_command("QPI")), response)
+        inverter.join()
+        transport.close()
+        device.close()
+
+    def test_closed_device(self):
+        """ test the transport closes the device after an error """
+        host, device = socket.socketpair()
+        transport = HIDRawTransport("socketpair", fd=host.detach(), timeout=0.5)
+        device.close()
+        with self.assertRaises(OSError):
+            transport.send_and_receive(b"QPI\xbe\xac\r")
+        self.assertFalse(transport.is_open)
+
+    def test_pty(self):
+        """ test the transport with a pty as the device """
+        master, slave = os.openpty()
+        # raw mode, so the line discipline does not translate the CR
+        tty.setraw(slave)
+        os.set_blocking(slave, False)
+        transport = HIDRawTransport(os.ttyname(slave), report_gap=0, fd=slave)
+        os.write(master, b"(230.0 50.0\r")
+        self.assertEqual(transport.read_frame(), b"(230.0 50.0\r")
+        transport.close()
+        os.close(master)
@@ -0,0 +1,122 @@
+import gzip
+import os
+import re
+import socket
+import tempfile
+import threading
+import unittest
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from mppsolar.libs.bufferedwriter import BufferedWriter
+from mppsolar.libs.influxwriter import InfluxWriter
+from mppsolar.outputs import to_line_protocol
+from mppsolar.result import ResultView
+
+
+class Handler(BaseHTTPRequestHandler):
+    """ a stand in for the influxdb write api, records the writes and replies with server.status """
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        if self.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        self.server.writes.append((self.path, self.headers.get("Authorization"), body.decode().splitlines()))
+        self.send_response(self.server.status)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class TestInfluxWriter(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.writes = []
+        self.server.status = 204
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.spill = os.path.join(self.tmpdir.name, "influx.spill")
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmpdir.cleanup()
+
+    def writer(self, url, **kwargs):
+        return InfluxWriter(url, batch_size=100, clock=lambda: 0.0, **kwargs)
+
+    def test_writer_needs_write(self):
+        """ test a writer without _write fails when it is created, rather than on its first flush """
+
+        class NoWrite(BufferedWriter):
+            pass
+
+        with self.assertRaises(TypeError):
+            NoWrite(self.url)
+
+    def test_line_protocol(self):
+        """ test the results of a command are one line, with escaped keys and the time they were received """
+        data = ResultView({"_command": "QPIGS", "AC Input Voltage": [230, "V"], "Load, Status": ['on "1"', ""], "Fault": [None, ""]})
+        data.acquired = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        line = to_line_protocol(data, "mpp-solar", {"command": "QPIGS", "device": "inv 1", "tag": None}, False, None, None)
+        self.assertEqual(line, 'mpp-solar,command=QPIGS,device=inv\\ 1 ac_input_voltage=230.0,load\\,_status="on \\"1\\"" 1704067200000000000')
+        self.assertIsNone(to_line_protocol(data, "mpp-solar", {}, False, None, re.compile("^fault")))
+
+    def test_http_write(self):
+        """ test the buffered lines are written in one gzipped post to the write api """
+        writer = self.writer(f"{self.url}?org=home&bucket=solar", token="secret")
+        writer.add("mpp-solar,command=QPIGS battery_voltage=52.1 1")
+        writer.add("mpp-solar,command=QPIRI battery_type=\"AGM\" 2")
+        self.assertTrue(writer.flush())
+        writer.close()
+        self.assertEqual(
+            self.server.writes,
+            [("/api/v2/write?org=home&bucket=solar", "Token secret", ["mpp-solar,command=QPIGS battery_voltage=52.1 1", 'mpp-solar,command=QPIRI battery_type="AGM" 2'])],
+        )
+        self.assertEqual(writer.metrics()["written"], 2)
+
+    def test_retry_and_spill(self):
+        """ test lines are kept while the server is unavailable, spilled on close and written on the next success """
+        writer = self.writer(self.url, spill=self.spill)
+        self.server.status = 503
+        writer.add("m f=1.0 1")
+        self.assertFalse(writer.flush())
+        self.assertEqual(writer.metrics()["buffered"], 1)
+        writer.close()
+        self.assertEqual(writer.metrics()["spilled"], 1)
+        with open(self.spill) as f:
+            self.assertEqual(f.read(), "m f=1.0 1\n")
+
+        self.server.status = 204
+        writer = self.writer(self.url, spill=self.spill)
+        writer.add("m f=2.0 2")
+        self.assertTrue(writer.flush())
+        self.assertEqual(self.server.writes[-2:], [("/api/v2/write", None, ["m f=2.0 2"]), ("/api/v2/write", None, ["m f=1.0 1"])])
+        self.assertFalse(os.path.exists(self.spill))
+        self.assertEqual(writer.metrics()["written"], 2)
+
+        self.server.status = 400
+        writer.add("m f=bad 3")
+        self.assertTrue(writer.flush())
+        self.assertEqual(writer.metrics()["dropped"], 1)
+        writer.close()
+
+    def test_udp(self):
+        """ test udp writes split the lines across datagrams """
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind(("127.0.0.1", 0))
+        sock.settimeout(5)
+        writer = self.writer(f"udp://127.0.0.1:{sock.getsockname()[1]}")
+        for n in range(30):
+            writer.add(f"mpp-solar,command=QPIGS value={n:0>60} {n}")
+        self.assertTrue(writer.flush())
+        lines = []
+        while len(lines) < 30:
+            datagram = sock.recv(65536)
+            self.assertLessEqual(len(datagram), 1400)
+            lines.extend(datagram.decode().splitlines())
+        self.assertEqual(lines[-1], f"mpp-solar,command=QPIGS value={29:0>60} 29")
+        writer.close()
+        sock.close()
@@ -0,0 +1,35 @@
+import re
+import unittest
+
+from mppsolar.helpers import get_key_map
+from powermon.formats.simple import simple
+
+
+class test_key_map(unittest.TestCase):
+    def test_key_map(self):
+        """ test the output keys are formatted and filtered """
+        keys = ["AC Output Voltage", "AC Output Frequency", "Battery Voltage"]
+        self.assertEqual(
+            get_key_map(keys),
+            (
+                ("AC Output Voltage", "ac_output_voltage"),
+                ("AC Output Frequency", "ac_output_frequency"),
+                ("Battery Voltage", "battery_voltage"),
+            ),
+        )
+        self.assertEqual(
+            get_key_map(keys, remove_spaces=False, keep_case=True, filter=re.compile("^AC"), excl_filter=re.compile("Freq")),
+            (("AC Output Voltage", "AC Output Voltage"),),
+        )
+
+    def test_key_map_cached(self):
+        """ test the key map is reused for the same keys and settings """
+        data = {"Battery Voltage": [51.4, "V"]}
+        self.assertIs(get_key_map(data), get_key_map(dict(data)))
+        self.assertIsNot(get_key_map(data), get_key_map(data, keep_case=True))
+
+    def test_powermon_format(self):
+        """ test the powermon formats use the key map """
+        formatter = simple({"filter": "^battery"})
+        data = {"_command": "QPIGS", "Battery Voltage": [51.4, "V"], "AC Output Voltage": [230.0, "V"]}
+        self.assertEqual(formatter.formatAndFilterData(data), {"battery_voltage": [51.4, "V"]})
@@ -0,0 +1,82 @@
+import unittest
+
+try:
+    from pymongo.errors import AutoReconnect, BulkWriteError
+
+    from mppsolar.libs.mongowriter import MongoWriter
+except ImportError:
+    MongoWriter = None
+
+
+class Collection:
+    def __init__(self, client, name):
+        self.client = client
+        self.name = name
+
+    def insert_many(self, documents, ordered=True):
+        if self.client.fail:
+            raise AutoReconnect("connection closed")
+        if self.client.reject:
+            raise BulkWriteError({"writeErrors": [{"index": 0, "errmsg": "duplicate key"}], "nInserted": len(documents) - 1})
+        self.client.inserts.append((self.name, list(documents), ordered))
+
+
+class Client:
+    """ a stand in for MongoClient, creating one counts as a connection """
+
+    connects = 0
+
+    def __init__(self, url):
+        Client.connects += 1
+        self.fail = False
+        self.reject = False
+        self.inserts = []
+
+    def __getitem__(self, database):
+        return Database(self)
+
+
+class Database:
+    def __init__(self, client):
+        self.client = client
+
+    def __getitem__(self, name):
+        return Collection(self.client, name)
+
+
+@unittest.skipIf(MongoWriter is None, "pymongo not installed")
+class TestMongoWriter(unittest.TestCase):
+    def writer(self, url):
+        return MongoWriter(url, client_factory=Client, batch_size=100, clock=lambda: 0.0)
+
+    def test_insert_many(self):
+        """ test the documents are written with one unordered insert_many per collection, on one client """
+        connects = Client.connects
+        writer = self.writer("mongodb://test-insert")
+        writer.add("mppsolar", "QPIGS", {"n": 1})
+        writer.add("mppsolar", "QPIRI", {"n": 2})
+        writer.add("mppsolar", "QPIGS", {"n": 3})
+        self.assertTrue(writer.flush())
+        writer.add("mppsolar", "QPIGS", {"n": 4})
+        self.assertTrue(writer.flush())
+        self.assertEqual(
+            writer.client.inserts,
+            [("QPIGS", [{"n": 1}, {"n": 3}], False), ("QPIRI", [{"n": 2}], False), ("QPIGS", [{"n": 4}], False)],
+        )
+        self.assertEqual(Client.connects, connects + 1)
+        self.assertIs(self.writer("mongodb://test-insert").client, writer.client)
+        writer.close()
+
+    def test_retry_and_reject(self):
+        """ test documents are kept after a connection error, and rejected documents are not retried """
+        writer = self.writer("mongodb://test-retry")
+        writer.client.fail = True
+        writer.add("mppsolar", "QPIGS", {"n": 1})
+        self.assertFalse(writer.flush())
+        self.assertEqual(writer.metrics()["buffered"], 1)
+        writer.client.fail = False
+        writer.client.reject = True
+        self.assertFalse(writer._due(0.0))
+        self.assertTrue(writer.flush())
+        self.assertEqual(writer.metrics(), {"buffered": 0, "written": 0, "dropped": 1, "errors": 1})
+        writer.close()
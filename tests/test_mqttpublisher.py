@@ -0,0 +1,103 @@
+import threading
+import unittest
+
+import paho.mqtt.client as mqtt_client
+
+from mppsolar.libs.mqttpublisher import MqttPublisher
+
+
+class PublishInfo:
+    def __init__(self, mid, rc=mqtt_client.MQTT_ERR_SUCCESS):
+        self.mid = mid
+        self.rc = rc
+
+
+class Client:
+    """ records published messages, they complete when ack() is called (or at once if immediate) """
+
+    def __init__(self, immediate=False):
+        self.immediate = immediate
+        self.messages = []
+        self.on_publish = None
+        self.max_inflight = None
+
+    def max_inflight_messages_set(self, inflight):
+        self.max_inflight = inflight
+
+    def publish(self, topic, payload, qos=0, retain=False):
+        mid = len(self.messages) + 1
+        self.messages.append((topic, payload, qos, retain))
+        if self.immediate:
+            self.on_publish(self, None, mid)
+        return PublishInfo(mid)
+
+    def ack(self, mid):
+        self.on_publish(self, None, mid)
+
+
+class TestMqttPublisher(unittest.TestCase):
+    def msgs(self, count):
+        return [{"topic": f"test/{n}", "payload": n} for n in range(count)]
+
+    def test_batch_not_waited_for(self):
+        """ test a QoS 0 batch is queued without waiting for each message """
+        client = Client()
+        publisher = MqttPublisher(client, window=10, timeout=1)
+        self.assertEqual(publisher.publish_batch(self.msgs(5)), 0)
+        self.assertEqual(len(client.messages), 5)
+        self.assertEqual(publisher.metrics()["in_flight"], 5)
+        for mid in range(1, 6):
+            client.ack(mid)
+        self.assertTrue(publisher.flush(1))
+        metrics = publisher.metrics()
+        self.assertEqual((metrics["published"], metrics["dropped"], metrics["in_flight"]), (5, 0, 0))
+
+    def test_completed_before_recorded(self):
+        """ test messages completed before publish returns are counted """
+        client = Client(immediate=True)
+        publisher = MqttPublisher(client)
+        publisher.publish_batch(self.msgs(3), qos=1)
+        self.assertEqual(publisher.metrics()["published"], 3)
+        self.assertEqual(publisher.metrics()["in_flight"], 0)
+
+    def test_window(self):
+        """ test publishing waits for space in the window """
+        client = Client()
+        publisher = MqttPublisher(client, window=2, timeout=5)
+        self.assertEqual(client.max_inflight, 2)
+        done = threading.Event()
+        thread = threading.Thread(target=lambda: (publisher.publish_batch(self.msgs(3)), done.set()))
+        thread.start()
+        self.assertFalse(done.wait(0.2))
+        self.assertEqual(len(client.messages), 2)
+        client.ack(1)
+        self.assertTrue(done.wait(5))
+        self.assertEqual(len(client.messages), 3)
+
+    def test_dropped(self):
+        """ test messages are dropped when the window stays full or the client is not connected """
+        client = Client()
+        publisher = MqttPublisher(client, window=1, timeout=0.1)
+        self.assertEqual(publisher.publish_batch(self.msgs(2)), 0)
+        # the first message timed out and was dropped to make space
+        self.assertEqual(publisher.metrics()["dropped"], 1)
+        publisher = MqttPublisher(mqtt_client.Client())
+        self.assertEqual(publisher.publish_batch(self.msgs(2)), 2)
+        self.assertEqual(publisher.metrics()["dropped"], 2)
+        # a waited for batch counts the messages that did not complete
+        publisher = MqttPublisher(Client(), timeout=0.1)
+        self.assertEqual(publisher.publish_batch(self.msgs(2), qos=1), 2)
+
+    def test_late_completion(self):
+        """ test a message completing after it was dropped is not matched to a later message reusing its mid """
+        client = Client()
+        publisher = MqttPublisher(client, window=1, timeout=0.1)
+        publisher.publish_batch(self.msgs(2))
+        client.ack(1)
+        self.assertEqual(publisher.metrics()["published"], 0)
+        # paho has wrapped its mid counter
+        client.messages.clear()
+        publisher.publish_batch(self.msgs(1))
+        self.assertEqual(publisher.metrics()["in_flight"], 1)
+        client.ack(1)
+        self.assertEqual(publisher.metrics()["published"], 1)
@@ -1,7 +1,25 @@
 import unittest
 
 # from mppsolar.outputs import get_outputs
+from mppsolar.outputs.compact_mqtt import compact_mqtt
 from mppsolar.outputs.mqtt import mqtt as mqtt
+from powermon.formats.compact import compact
+from powermon.outputs.mqtt import MQTT
+
+
+class Broker:
+    """ records the topics of each batch, reporting dropped messages not published """
+
+    results_topic = "mpp-solar"
+
+    def __init__(self):
+        self.batches = []
+        self.dropped = 0
+        self.connects = 1
+
+    def publishMultiple(self, msgs):
+        self.batches.append([msg["topic"] for msg in msgs])
+        return self.dropped
 
 
 class test_mqtt_output(unittest.TestCase):
@@ -38,3 +56,68 @@ class test_mqtt_output(unittest.TestCase):
 
         # print(result)
         self.assertEqual(msgs, expected)
+
+    def test_compact_mqtt_out(self):
+        """test the compact mqtt output sends one message, and the schema only when it changes"""
+        data = {
+            "_command": "QPGS0",
+            "_command_description": "Parallel Information inquiry",
+            "Battery voltage": [51.4, "V"],
+            "Fault code": ["No fault", ""],
+        }
+        op = compact_mqtt()
+        msgs = op.build_msgs(data=data, name="inv1", keep_case=False, filter=None, excl_filter=None)
+        expected = [
+            {
+                "topic": "mpp-solar/inv1/QPGS0/schema",
+                "payload": '{"command":"QPGS0","description":"Parallel Information inquiry","fields":{"battery_voltage":{"unit":"V"},"fault_code":{}}}',
+                "retain": True,
+            },
+            {"topic": "mpp-solar/inv1/QPGS0", "payload": '{"battery_voltage":51.4,"fault_code":"No fault"}'},
+        ]
+        self.assertEqual(msgs, expected)
+        data["Battery voltage"] = [51.2, "V"]
+        msgs = op.build_msgs(data=data, name="inv1", keep_case=False, filter=None, excl_filter=None)
+        self.assertEqual(msgs, [{"topic": "mpp-solar/inv1/QPGS0", "payload": '{"battery_voltage":51.2,"fault_code":"No fault"}'}])
+
+    def test_compact_mqtt_schema_not_published(self):
+        """test a schema that was not published is sent again with the next results"""
+        data = {"_command": "QPGS0", "Battery voltage": [51.4, "V"]}
+        broker = Broker()
+        broker.dropped = 1
+        op = compact_mqtt()
+        op.output(data=data, name="inv1", mqtt_broker=broker, keep_case=False, filter=None, excl_filter=None)
+        broker.dropped = 0
+        op.output(data=data, name="inv1", mqtt_broker=broker, keep_case=False, filter=None, excl_filter=None)
+        op.output(data=data, name="inv1", mqtt_broker=broker, keep_case=False, filter=None, excl_filter=None)
+        schema = ["mpp-solar/inv1/QPGS0/schema", "mpp-solar/inv1/QPGS0"]
+        self.assertEqual(broker.batches, [schema, schema, ["mpp-solar/inv1/QPGS0"]])
+
+    def test_powermon_compact_schema_not_published(self):
+        """test powermon sends a schema that was not published again with the next results"""
+        data = {"_command": "QPGS0", "Battery voltage": [51.4, "V"]}
+        broker = Broker()
+        broker.dropped = 1
+        output = MQTT({"tag": "inv1"}, broker, compact({}, "mpp-solar", "inv1"))
+        output.output(data)
+        broker.dropped = 0
+        output.output(data)
+        output.output(data)
+        schema = ["mpp-solar/inv1/QPGS0/schema", "mpp-solar/inv1/QPGS0"]
+        self.assertEqual(broker.batches, [schema, schema, ["mpp-solar/inv1/QPGS0"]])
+
+    def test_compact_schema_after_reconnect(self):
+        """test the schemas are sent again after the broker reconnects, as it may have lost the retained schemas"""
+        data = {"_command": "QPGS0", "Battery voltage": [51.4, "V"]}
+        broker = Broker()
+        op = compact_mqtt()
+        output = MQTT({"tag": "inv1"}, broker, compact({}, "mpp-solar", "inv1", broker))
+        for _ in range(2):
+            op.output(data=data, name="inv1", mqtt_broker=broker, keep_case=False, filter=None, excl_filter=None)
+            output.output(data)
+        broker.connects += 1
+        op.output(data=data, name="inv1", mqtt_broker=broker, keep_case=False, filter=None, excl_filter=None)
+        output.output(data)
+        schema = ["mpp-solar/inv1/QPGS0/schema", "mpp-solar/inv1/QPGS0"]
+        values = ["mpp-solar/inv1/QPGS0"]
+        self.assertEqual(broker.batches, [schema, schema, values, values, schema, schema])
@@ -0,0 +1,45 @@
+import re
+import unittest
+
+from mppsolar.libs.outputpipeline import OutputPipeline
+
+
+class TestOutputPipeline(unittest.TestCase):
+    def test_outputs_shared(self):
+        """ test each output module is instantiated once and shared by the routes """
+        pipeline = OutputPipeline()
+        first = pipeline.add("screen,json", tag="QPIGS")
+        second = pipeline.add("json", tag="QMOD")
+        self.assertIs(first.outputs[1], second.outputs[0])
+        self.assertEqual([type(op).__name__ for op in first.outputs], ["screen", "json"])
+
+    def test_unknown_output_skipped(self):
+        """ test an unknown output is left out of the route """
+        pipeline = OutputPipeline()
+        route = pipeline.add("json,nosuchoutput")
+        self.assertEqual([type(op).__name__ for op in route.outputs], ["json"])
+
+    def test_settings_resolved(self):
+        """ test the filters are compiled and the common settings merged when the route is added """
+        pipeline = OutputPipeline(mqtt_topic="solar")
+        route = pipeline.add("json", filter="^ac", excl_filter=None, tag="QPIGS", keep_case=True)
+        self.assertIsInstance(route.kwargs["filter"], re.Pattern)
+        self.assertIsNone(route.kwargs["excl_filter"])
+        self.assertEqual(route.kwargs["mqtt_topic"], "solar")
+        self.assertEqual(route.kwargs["tag"], "QPIGS")
+
+    def test_send(self):
+        """ test send passes the results and route settings to each output """
+        calls = []
+
+        class Recorder:
+            def output(self, **kwargs):
+                calls.append(kwargs)
+
+        pipeline = OutputPipeline(mqtt_topic="solar")
+        route = pipeline.add("json", tag="QPIGS")
+        route.outputs = [Recorder()]
+        pipeline.send(route, {"ac_output_voltage": [230.0, "V"]})
+        self.assertEqual(calls[0]["data"], {"ac_output_voltage": [230.0, "V"]})
+        self.assertEqual(calls[0]["tag"], "QPIGS")
+        self.assertEqual(calls[0]["mqtt_topic"], "solar")
@@ -0,0 +1,88 @@
+import threading
+import unittest
+
+from mppsolar.libs.outputqueue import BLOCK, COALESCE, DROP_OLDEST, OutputQueue
+
+
+class TestOutputQueue(unittest.TestCase):
+    def setUp(self):
+        self.sent = []
+        # holds the lane thread in its first job until released
+        self.release = threading.Event()
+        self.started = threading.Event()
+
+    def blocking(self):
+        self.started.set()
+        self.release.wait(5)
+
+    def send(self, value):
+        return lambda: self.sent.append(value)
+
+    def fill(self, queue):
+        queue.put("out", "first", self.blocking)
+        self.assertTrue(self.started.wait(5))
+
+    def test_outputs_in_order(self):
+        """ test the results sent to an output are run in order """
+        queue = OutputQueue(10)
+        for value in range(5):
+            queue.put("out", value, self.send(value))
+        queue.close(timeout=5)
+        self.assertEqual(self.sent, [0, 1, 2, 3, 4])
+        metrics = queue.metrics()["out"]
+        self.assertEqual(metrics["done"], 5)
+        self.assertEqual(metrics["depth"], 0)
+
+    def test_drop_oldest(self):
+        """ test a full queue drops the oldest result """
+        queue = OutputQueue(2, DROP_OLDEST)
+        self.fill(queue)
+        for value in range(4):
+            queue.put("out", value, self.send(value))
+        self.release.set()
+        queue.close(timeout=5)
+        self.assertEqual(self.sent, [2, 3])
+        self.assertEqual(queue.metrics()["out"]["dropped"], 2)
+
+    def test_coalesce(self):
+        """ test a queued result is replaced by a newer result from the same command """
+        queue = OutputQueue(5, COALESCE)
+        self.fill(queue)
+        queue.put("out", "QPIGS", self.send("QPIGS 1"))
+        queue.put("out", "QMOD", self.send("QMOD 1"))
+        queue.put("out", "QPIGS", self.send("QPIGS 2"))
+        self.release.set()
+        queue.close(timeout=5)
+        self.assertEqual(self.sent, ["QPIGS 2", "QMOD 1"])
+        self.assertEqual(queue.metrics()["out"]["coalesced"], 1)
+
+    def test_block(self):
+        """ test a full queue blocks the producer until there is space """
+        queue = OutputQueue(1, BLOCK)
+        self.fill(queue)
+        queue.put("out", 1, self.send(1))
+        producer = threading.Thread(target=queue.put, args=("out", 2, self.send(2)))
+        producer.start()
+        producer.join(0.1)
+        self.assertTrue(producer.is_alive())
+        self.release.set()
+        producer.join(5)
+        queue.close(timeout=5)
+        self.assertEqual(self.sent, [1, 2])
+
+    def test_slow_output_does_not_delay_others(self):
+        """ test each output has its own lane and errors are counted """
+        queue = OutputQueue(5)
+        self.fill(queue)
+        queue.put("other", 1, self.send(1))
+        queue.put("other", 2, lambda: 1 / 0)
+        self.assertTrue(queue._lanes["other"].flush(5))
+        self.assertEqual(self.sent, [1])
+        self.assertEqual(queue.metrics()["other"]["errors"], 1)
+        self.release.set()
+        queue.close(timeout=5)
+
+    def test_invalid_policy(self):
+        """ test an unknown policy is rejected """
+        with self.assertRaises(ValueError):
+            OutputQueue(5, "newest")
@@ -0,0 +1,77 @@
+import threading
+import time
+import unittest
+
+from mppsolar.libs.portworkers import PortWorkerPool
+
+
+class FakeDevice:
+    """ device taking delay seconds per command, or blocking until released if hung """
+
+    def __init__(self, name, port, delay=0.0, hung=False):
+        self._name = name
+        self._port_name = port
+        self.delay = delay
+        self.release = threading.Event()
+        if not hung:
+            self.release.set()
+        self.commands = []
+
+    def run_command(self, command, as_reading=False):
+        self.release.wait()
+        time.sleep(self.delay)
+        self.commands.append(command)
+        return {"_command": command, "Result": [self._name, ""]}
+
+
+class test_portworkers(unittest.TestCase):
+    def test_ports_concurrent(self):
+        """ test ports run concurrently and the commands of a port in order """
+        a = FakeDevice("a", "/dev/ttyUSB0", delay=0.1)
+        b = FakeDevice("b", "/dev/ttyUSB0", delay=0.1)
+        c = FakeDevice("c", "/dev/ttyUSB1", delay=0.1)
+        commands = [(a, "QPI"), (c, "QPI"), (b, "QMOD"), (a, "QID"), (c, "QMOD")]
+        pool = PortWorkerPool(commands)
+        results = []
+        start = time.monotonic()
+        pool.run(lambda item, result: results.append((item[0]._name, item[1])))
+        elapsed = time.monotonic() - start
+        pool.stop()
+        self.assertEqual(len(results), 5)
+        self.assertEqual([r for r in results if r[0] in "ab"], [("a", "QPI"), ("a", "QID"), ("b", "QMOD")])
+        self.assertLess(elapsed, 0.45)
+
+    def test_hung_device(self):
+        """ test a hung device misses its deadline without delaying the other ports """
+        hung = FakeDevice("hung", "3C:A5:49:AA:AA:AA", hung=True)
+        ok = FakeDevice("ok", "/dev/ttyUSB0")
+        pool = PortWorkerPool([(hung, "getCellData"), (hung, "getInfo"), (ok, "QPI")], deadline=5, deadlines={"hung": 0.2})
+        results = []
+        start = time.monotonic()
+        pool.run(lambda item, result: results.append((item[0]._name, item[1], result)))
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertEqual([(name, command) for name, command, _ in results], [("ok", "QPI"), ("hung", "getCellData")])
+        self.assertIn("ERROR", results[1][2])
+
+        # the late result is discarded and the rest of the hung port's commands are skipped
+        hung.release.set()
+        time.sleep(0.1)
+        self.assertEqual(hung.commands, ["getCellData"])
+        self.assertEqual(len(results), 2)
+        pool.stop()
+
+    def test_ports_scheduled_independently(self):
+        """ test a slow port does not delay the schedule of the other ports """
+        slow = FakeDevice("slow", "/dev/ttyUSB0", delay=0.6)
+        fast = FakeDevice("fast", "/dev/ttyUSB1")
+        pool = PortWorkerPool([(slow, "QPIGS"), (fast, "QPIGS")], schedules={"slow": (1, 0)}, pause=0.1)
+        notified = []
+        thread = threading.Thread(target=pool.run, args=(lambda item, result: None, lambda: notified.append(1)), daemon=True)
+        thread.start()
+        time.sleep(1)
+        pool.stop()
+        thread.join(2)
+        self.assertFalse(thread.is_alive())
+        self.assertLessEqual(len(slow.commands), 1)
+        self.assertGreaterEqual(len(fast.commands), 7)
+        self.assertTrue(notified)
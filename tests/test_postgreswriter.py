@@ -0,0 +1,112 @@
+import time
+import unittest
+
+try:
+    from mppsolar.libs.postgreswriter import PostgresWriter
+except ImportError:
+    PostgresWriter = None
+
+
+class Cursor:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def mogrify(self, template, args):
+        return repr(tuple(str(arg) for arg in args)).encode()
+
+    def execute(self, sql):
+        if self.connection.pool.fail:
+            raise Exception("server closed the connection unexpectedly")
+        self.connection.pool.statements.append(sql)
+
+
+class Connection:
+    encoding = "UTF8"
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    def cursor(self):
+        return Cursor(self)
+
+    def commit(self):
+        pass
+
+
+class Pool:
+    """ a stand in for the psycopg2 connection pool """
+
+    def __init__(self):
+        self.fail = False
+        self.statements = []
+        self.created = 0
+
+    def __call__(self):
+        self.created += 1
+        return self
+
+    def getconn(self):
+        return Connection(self)
+
+    def putconn(self, conn, close=False):
+        pass
+
+    def closeall(self):
+        pass
+
+
+@unittest.skipIf(PostgresWriter is None, "psycopg2 not installed")
+class TestPostgresWriter(unittest.TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.pool = Pool()
+
+    def writer(self, **kwargs):
+        return PostgresWriter("postgresql://test", pool_factory=self.pool, clock=lambda: self.now, **kwargs)
+
+    def test_batched(self):
+        """ test the buffered rows are written in one statement on one pooled connection """
+        writer = self.writer(batch_size=10)
+        for n in range(3):
+            writer.add("QPIGS", {"battery_voltage": 50 + n}, "2024-01-01T00:00:0{n}")
+        self.assertEqual(self.pool.statements, [])
+        self.assertTrue(writer.flush())
+        writer.add("QPIRI", {"battery_type": "AGM"}, "2024-01-01T00:00:04")
+        writer.close()
+        self.assertEqual(len(self.pool.statements), 2)
+        self.assertEqual(self.pool.statements[0].count(b"QPIGS"), 3)
+        self.assertEqual(self.pool.created, 1)
+        self.assertEqual(writer.metrics()["written"], 4)
+
+    def test_batch_size(self):
+        """ test the rows are written in the background once batch_size rows are buffered """
+        writer = self.writer(batch_size=2, flush_interval=10)
+        writer.add("QPIGS", {}, "")
+        self.assertFalse(writer._due(self.now))
+        self.assertTrue(writer._due(self.now + 10))
+        writer.add("QPIGS", {}, "")
+        deadline = time.monotonic() + 5
+        while not self.pool.statements and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(len(self.pool.statements), 1)
+        writer.close()
+
+    def test_retry(self):
+        """ test rows are kept when the write fails and retried after a delay """
+        writer = self.writer(batch_size=10, flush_interval=1)
+        self.pool.fail = True
+        writer.add("QPIGS", {}, "")
+        self.assertFalse(writer.flush())
+        self.assertFalse(writer._due(self.now))
+        self.assertTrue(writer._due(self.now + 1))
+        self.pool.fail = False
+        self.assertTrue(writer.flush())
+        self.assertEqual(self.pool.created, 2)
+        self.assertEqual(writer.metrics(), {"buffered": 0, "written": 1, "dropped": 0, "errors": 1})
+        writer.close()
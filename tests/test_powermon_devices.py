@@ -0,0 +1,77 @@
+import threading
+import unittest
+
+from powermon import get_device_configs
+from powermon.libs.apicoordinator import ApiCoordinator
+from powermon.libs.deviceworker import DeviceWorker
+from powermon.libs.schedule import IntervalCommandSchedule, OneTimeCommandSchedule, Schedule
+
+
+class StubPort:
+    def __init__(self):
+        self.connected = False
+
+    def connect(self):
+        self.connected = True
+
+
+class StubDevice:
+    def __init__(self, name):
+        self.name = name
+        self.port = StubPort()
+
+
+class RecordingCommand:
+    def __init__(self, name, runs):
+        self.name = name
+        self.runs = runs
+
+    def run(self, lean=None):
+        self.runs.append((self.name, threading.current_thread().name))
+
+
+class TestPowermonDevices(unittest.TestCase):
+    def test_device_configs(self):
+        """ test a single device and a devices list both give device, scheduling pairs """
+        self.assertEqual(get_device_configs({"device": {"name": "a"}, "scheduling": {"loop": 5}}), [({"name": "a"}, {"loop": 5})])
+        config = {
+            "devices": [{"name": "a", "scheduling": {"loop": 1}}, {"name": "b"}],
+            "scheduling": {"loop": 5},
+        }
+        self.assertEqual([(device["name"], scheduling) for device, scheduling in get_device_configs(config)], [("a", {"loop": 1}), ("b", {"loop": 5})])
+
+    def test_workers_run_each_device(self):
+        """ test each device schedule runs in its own worker thread """
+        runs = []
+        finished = threading.Event()
+        schedules = [
+            Schedule([OneTimeCommandSchedule([RecordingCommand(name, runs)])], "once", None, StubDevice(name))
+            for name in ("inverter", "bms")
+        ]
+        workers = [DeviceWorker(schedule, finished) for schedule in schedules]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(timeout=5)
+        self.assertTrue(all(worker.done for worker in workers))
+        self.assertTrue(finished.is_set())
+        self.assertEqual(sorted(runs), [("bms", "device bms"), ("inverter", "device inverter")])
+        self.assertTrue(all(schedule.device.port.connected for schedule in schedules))
+
+    def test_stop_worker(self):
+        """ test stopping a worker wakes its waiting schedule """
+        schedule = Schedule([IntervalCommandSchedule(3600, [])], 60, None, StubDevice("inverter"))
+        worker = DeviceWorker(schedule)
+        worker.start()
+        worker.stop()
+        worker.join(timeout=5)
+        self.assertTrue(worker.done)
+
+    def test_adhoc_device(self):
+        """ test adhoc commands go to the named device schedule """
+        schedules = [Schedule([], 60, None, StubDevice(name)) for name in ("inverter", "bms")]
+        coordinator = ApiCoordinator.__new__(ApiCoordinator)
+        coordinator.schedules = schedules
+        self.assertIs(coordinator.getSchedule(), schedules[0])
+        self.assertIs(coordinator.getSchedule("bms"), schedules[1])
+        self.assertIsNone(coordinator.getSchedule("missing"))
@@ -0,0 +1,115 @@
+import threading
+import unittest
+from datetime import datetime
+
+import yaml
+
+from powermon import ConfigLoader
+from powermon.libs.schedule import (
+    IntervalCommandSchedule,
+    LoopCommandSchedule,
+    OneTimeCommandSchedule,
+    Schedule,
+    TimeCommandSchedule,
+)
+
+
+class FakeClock:
+    def __init__(self, wall=None):
+        self.now = 1000.0
+        self.wall_base = wall if wall is not None else datetime(2023, 6, 1, 12, 0, 0).timestamp()
+
+    def clock(self):
+        return self.now
+
+    def wall(self):
+        return self.wall_base + self.now - 1000.0
+
+
+class RecordingCommand:
+    def __init__(self, name, runs, clock=None, duration=0):
+        self.name = name
+        self.runs = runs
+        self._clock = clock
+        self.duration = duration
+
+    def run(self, lean=None):
+        self.runs.append((self.name, self._clock.now if self._clock else None))
+        if self._clock:
+            self._clock.now += self.duration
+
+
+def make_schedule(schedules, clock, loopDuration=10):
+    return Schedule(schedules, loopDuration, None, None, clock=clock.clock, wall_clock=clock.wall)
+
+
+class TestPowermonSchedule(unittest.TestCase):
+    def test_loop_schedule_fixed_rate(self):
+        """ test a loop schedule runs every loopCount * loop seconds """
+        clock = FakeClock()
+        runs = []
+        schedule = make_schedule([LoopCommandSchedule(3, [RecordingCommand("QPIGS", runs, clock)])], clock)
+        self.assertTrue(schedule.runLoop(max_wait=0))
+        self.assertEqual(runs, [("QPIGS", 1000.0)])
+        self.assertEqual(schedule.next_due(), 30)
+        clock.now = 1029.0
+        schedule.runLoop(max_wait=0)
+        self.assertEqual(len(runs), 1)
+        clock.now = 1030.5
+        schedule.runLoop(max_wait=0)
+        self.assertEqual(runs[-1], ("QPIGS", 1030.5))
+        # stays on the 30s grid rather than drifting by the lateness
+        self.assertEqual(schedule.next_due(), 29.5)
+
+    def test_overrun_skips_missed_runs(self):
+        """ test a command that overruns its interval skips the missed slots """
+        clock = FakeClock()
+        runs = []
+        schedule = make_schedule([IntervalCommandSchedule(5, [RecordingCommand("QPIGS", runs, clock, duration=12)])], clock)
+        schedule.runLoop(max_wait=0)
+        self.assertEqual(clock.now, 1012.0)
+        self.assertEqual(schedule.next_due(), 3)
+
+    def test_time_schedule(self):
+        """ test a time schedule is due at the next occurrence of the wall clock time """
+        clock = FakeClock()
+        runs = []
+        # 15:00:00 read by yaml as seconds after midnight, and as a string
+        for run_time in (54000, "15:00:00", "15:00"):
+            schedule = make_schedule([TimeCommandSchedule(run_time, [RecordingCommand("Q1", runs, clock)])], clock)
+            self.assertAlmostEqual(schedule.next_due(), 3 * 3600)
+        # 09:00 has passed, so it is due tomorrow
+        schedule = make_schedule([TimeCommandSchedule("09:00:00", [RecordingCommand("Q1", runs, clock)])], clock)
+        self.assertAlmostEqual(schedule.next_due(), 21 * 3600)
+
+    def test_time_schedule_from_yaml(self):
+        """ test an unquoted time in the config is a clock time, not the base 60 integer yaml 1.1 reads """
+        clock = FakeClock()
+        for config, due in (("time: 15:00", 3 * 3600), ("time: 15:00:00", 3 * 3600), ("time: 54000", 3 * 3600), ("time: '13:30'", 1.5 * 3600)):
+            run_time = yaml.load(config, Loader=ConfigLoader)["time"]
+            schedule = make_schedule([TimeCommandSchedule(run_time, [RecordingCommand("Q1", [], clock)])], clock)
+            self.assertAlmostEqual(schedule.next_due(), due, msg=config)
+
+    def test_once(self):
+        """ test loop once runs the commands and stops """
+        clock = FakeClock()
+        runs = []
+        schedule = make_schedule(
+            [OneTimeCommandSchedule([RecordingCommand("QPIRI", runs)]), IntervalCommandSchedule(60, [RecordingCommand("QPIGS", runs)])],
+            clock,
+            loopDuration="once",
+        )
+        self.assertFalse(schedule.runLoop())
+        self.assertEqual([run[0] for run in runs], ["QPIRI", "QPIGS"])
+
+    def test_adhoc_command_wakes_loop(self):
+        """ test an adhoc command added from another thread wakes a waiting runLoop """
+        runs = []
+        schedule = Schedule([IntervalCommandSchedule(3600, [])], 60, None, None)
+        schedule.runLoop(max_wait=0)
+        schedule.parseCommandConfig = lambda config, mqtt_broker, device, output_queue=None: RecordingCommand(config["command"], runs)
+        timer = threading.Timer(0.05, schedule.addOneTimeCommandFromConfig, args=({"command": "QMOD"},))
+        timer.start()
+        self.assertTrue(schedule.runLoop(max_wait=5))
+        timer.join()
+        self.assertEqual(runs, [("QMOD", None)])
@@ -30,6 +30,19 @@ class test_pi30_decode(unittest.TestCase):
         result = protocol.decode(response, command)
         self.assertEqual(result, expected)
 
+    def test_pi30_QPI_lean(self):
+        """test the lean decode of a QPI response"""
+        protocol = pi()
+        response = b"(PI30\x9a\x0b\r"
+        command = "QPI"
+        expected = {
+            "_command": "QPI",
+            "_command_description": "Protocol ID inquiry",
+            "Protocol ID": ["PI30", ""],
+        }
+        result = protocol.decode(response, command, lean=True)
+        self.assertEqual(result, expected)
+
     def test_pi30_QPIGS(self):
         """test the decode of a QPIGS response"""
         protocol = pi()
@@ -0,0 +1,129 @@
+import logging
+import pkgutil
+import unittest
+
+import mppsolar.protocols
+from mppsolar.protocols import get_protocol
+from mppsolar.protocols.pi30 import pi30
+from mppsolar.outputs import to_json
+from mppsolar.outputs.screen import screen
+from mppsolar.result import Reading, ReadingBuilder, ResultSchema, ResultView
+
+
+class test_result(unittest.TestCase):
+    maxDiff = None
+
+    def test_reading_from_dict(self):
+        """test a Reading behaves as the dict it was built from"""
+        results = {
+            "_command": "QPI",
+            "_command_description": "Protocol ID inquiry",
+            "Protocol ID": ["PI30", ""],
+            "Battery Voltage": [52.1, "V", {"icon": "mdi:battery"}],
+        }
+        reading = Reading.from_dict(results)
+        self.assertEqual(reading, results)
+        self.assertEqual(list(reading), list(results))
+        self.assertEqual(reading["Battery Voltage"], [52.1, "V", {"icon": "mdi:battery"}])
+        self.assertEqual(reading.value("Battery Voltage"), 52.1)
+        self.assertEqual(reading.schema.output_keys, ("protocol_id", "battery_voltage"))
+
+    def test_schema_shared(self):
+        """test readings with the same layout share a schema"""
+        first = Reading.from_dict({"AC Input Voltage": [230.0, "V"]})
+        second = Reading.from_dict({"AC Input Voltage": [231.5, "V"]})
+        self.assertIs(first.schema, second.schema)
+        self.assertIsNot(first.schema, ResultSchema.get(["AC Input Voltage"], ["A"], [None]))
+
+    def test_reading_copy_on_write(self):
+        """test changing a Reading does not change its schema"""
+        first = Reading.from_dict({"_command": "QPI", "Protocol ID": ["PI30", ""]})
+        second = Reading.from_dict({"_command": "QPI", "Protocol ID": ["PI30", ""]})
+        first.pop("_command")
+        first["extra"] = [1, ""]
+        self.assertEqual(first, {"Protocol ID": ["PI30", ""], "extra": [1, ""]})
+        self.assertEqual(second, {"_command": "QPI", "Protocol ID": ["PI30", ""]})
+
+    def test_decode_as_reading(self):
+        """test decode can return a Reading"""
+        protocol = pi30()
+        response = b"(PI30\x9a\x0b\r"
+        result = protocol.decode(response, "QPI", as_reading=True)
+        self.assertIsInstance(result, Reading)
+        self.assertEqual(result, protocol.decode(response, "QPI"))
+        # the next decode of the command is filled in against the same schema
+        self.assertIs(protocol.decode(response, "QPI", as_reading=True).schema, result.schema)
+
+    def test_decode_as_reading_all_protocols(self):
+        """test a Reading decode matches the dict decode for the test responses of every protocol"""
+        logging.disable(logging.CRITICAL)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        compared = 0
+        for _, name, _ in pkgutil.iter_modules(mppsolar.protocols.__path__):
+            try:
+                protocol = get_protocol(name.upper())
+            except Exception:
+                continue
+            if protocol is None:
+                continue
+            for command, command_defn in protocol.COMMANDS.items():
+                for response in command_defn.get("test_responses", []):
+                    try:
+                        protocol.get_full_command(command)
+                        expected = protocol.decode(response, command)
+                    except Exception:
+                        # some test responses do not decode (or need a command value)
+                        continue
+                    # the second decode is built against the cached schema
+                    for _ in range(2):
+                        reading = protocol.decode(response, command, as_reading=True)
+                        self.assertEqual(list(reading.items()), list(expected.items()), f"{name} {command}")
+                    compared += 1
+        self.assertGreater(compared, 500)
+
+    def test_reading_builder(self):
+        """test a ReadingBuilder keeps the schema while the fields match it, and builds a new one when they do not"""
+        schema = ResultSchema.get(["Battery Voltage", "Protocol ID"], ["V", ""], [None, None])
+        builder = ReadingBuilder(schema)
+        builder.set_metadata("_command", "QPI")
+        builder.add("Battery Voltage", 52.1, "V")
+        self.assertEqual(builder["Battery Voltage"], [52.1, "V"])
+        builder.add("Protocol ID", "PI30", "")
+        reading = builder.build()
+        self.assertIs(reading.schema, schema)
+        self.assertEqual(reading, {"_command": "QPI", "Battery Voltage": [52.1, "V"], "Protocol ID": ["PI30", ""]})
+
+        builder = ReadingBuilder(schema)
+        builder.add("Battery Voltage", 52.1, "V")
+        builder.add("Battery Current", 3, "A", {"icon": "mdi:current-dc"})
+        builder.add("Battery Voltage", 52.3, "V")
+        reading = builder.build()
+        self.assertIsNot(reading.schema, schema)
+        self.assertEqual(reading, {"Battery Voltage": [52.3, "V"], "Battery Current": [3, "A", {"icon": "mdi:current-dc"}]})
+
+    def test_result_view(self):
+        """test a ResultView is the fields only and does not change the results"""
+        results = {
+            "_command": "QPI",
+            "_command_description": "Protocol ID inquiry",
+            "raw_response": ["(PI30\x9a\x0b\r", ""],
+            "Protocol ID": ["PI30", ""],
+        }
+        view = ResultView.of(results)
+        self.assertIs(ResultView.of(view), view)
+        self.assertEqual(dict(view), {"Protocol ID": ["PI30", ""]})
+        self.assertNotIn("_command", view)
+        self.assertEqual(view.command, "QPI")
+        self.assertEqual(view.command_description, "Protocol ID inquiry")
+        with self.assertRaises(TypeError):
+            view["Protocol ID"] = ["PI17", ""]
+        self.assertEqual(len(results), 4)
+
+    def test_result_view_shared(self):
+        """test an output does not change the results seen by the next output"""
+        view = ResultView.of({"_command": "QPI", "_command_description": "Protocol ID inquiry", "Protocol ID": ["PI30", ""]})
+        screen().output(data=view)
+        self.assertEqual(
+            to_json(view, False, None, None, metadata=("_command", "_command_description")),
+            {"_command": "QPI", "_command_description": "Protocol ID inquiry", "protocol_id": "PI30"},
+        )
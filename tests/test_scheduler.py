@@ -0,0 +1,74 @@
+import unittest
+
+from mppsolar.libs.scheduler import FixedRateScheduler
+
+
+class FakeClock:
+    """ monotonic and wall clocks that only move when slept or advanced """
+
+    def __init__(self, monotonic=1000.0, wall=1700000005.0):
+        self.monotonic = monotonic
+        self.wall = wall
+
+    def advance(self, seconds):
+        self.monotonic += seconds
+        self.wall += seconds
+
+    def scheduler(self):
+        return FixedRateScheduler(clock=lambda: self.monotonic, wall_clock=lambda: self.wall, sleep=self.advance)
+
+
+class test_scheduler(unittest.TestCase):
+    def test_aligned_grid(self):
+        """ test sections run on a wall clock aligned grid, plus their offset """
+        clock = FakeClock()
+        scheduler = clock.scheduler()
+        scheduler.add("inverter", 10)
+        scheduler.add("bms", 10, offset=2.5)
+        self.assertEqual(scheduler.wait(), ["inverter"])
+        self.assertEqual(clock.wall % 10, 0)
+        scheduler.complete("inverter")
+        self.assertEqual(scheduler.wait(), ["bms"])
+        self.assertEqual(clock.wall % 10, 2.5)
+
+    def test_no_drift(self):
+        """ test the time taken by the commands does not add to the period """
+        clock = FakeClock()
+        scheduler = clock.scheduler()
+        scheduler.add("inverter", 5)
+        run_times = []
+        for _ in range(5):
+            scheduler.wait()
+            run_times.append(clock.wall)
+            # commands take 1.7s
+            clock.advance(1.7)
+            self.assertEqual(scheduler.complete("inverter"), 0)
+        self.assertEqual([b - a for a, b in zip(run_times, run_times[1:])], [5.0] * 4)
+
+    def test_overrun(self):
+        """ test an overrun skips the missed slots and is counted """
+        clock = FakeClock()
+        scheduler = clock.scheduler()
+        section = scheduler.add("bms", 5)
+        scheduler.wait()
+        start = clock.wall
+        clock.advance(11)
+        self.assertEqual(scheduler.complete("bms"), 2)
+        self.assertEqual(section.overruns, 2)
+        scheduler.wait()
+        # back on the grid
+        self.assertEqual(clock.wall - start, 15)
+
+    def test_interval_per_section(self):
+        """ test sections with different intervals """
+        clock = FakeClock(wall=1699999998.0)
+        scheduler = clock.scheduler()
+        scheduler.add("fast", 2)
+        scheduler.add("slow", 6)
+        runs = []
+        while clock.wall < 1700000010.0:
+            for name in scheduler.wait():
+                runs.append((clock.wall - 1699999998.0, name))
+                scheduler.complete(name)
+        self.assertEqual([t for t, name in runs if name == "slow"], [0, 6, 12])
+        self.assertEqual([t for t, name in runs if name == "fast"], [0, 2, 4, 6, 8, 10, 12])
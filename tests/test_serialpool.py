@@ -0,0 +1,84 @@
+import time
+import unittest
+
+from mppsolar.inout.serialpool import SerialPool
+
+
+class test_serialpool(unittest.TestCase):
+    def test_connection_reused(self):
+        """ test the same open port is used for each connection """
+        pool = SerialPool()
+        with pool.connection("loop://", 2400) as s:
+            s.write(b"QPI\r")
+            first = s
+        with pool.connection("loop://", 2400) as s:
+            self.assertIs(s, first)
+            self.assertTrue(s.is_open)
+            self.assertEqual(s.read(4), b"QPI\r")
+        self.assertEqual(pool.get("loop://", 2400).opens, 1)
+        pool.close_all()
+        self.assertFalse(first.is_open)
+
+    def test_reopen_after_error(self):
+        """ test a port is closed after an error and reopened on next use """
+        pool = SerialPool()
+        with self.assertRaises(OSError):
+            with pool.connection("loop://", 2400) as s:
+                first = s
+                raise OSError("device went away")
+        self.assertFalse(first.is_open)
+        with pool.connection("loop://", 2400) as s:
+            self.assertIsNot(s, first)
+            self.assertTrue(s.is_open)
+        self.assertEqual(pool.get("loop://", 2400).opens, 2)
+        pool.close_all()
+
+    def test_close_idle(self):
+        """ test ports unused for longer than the idle timeout are closed """
+        pool = SerialPool(idle_timeout=0.01)
+        with pool.connection("loop://", 2400) as s:
+            pass
+        time.sleep(0.02)
+        pool.close_idle()
+        self.assertFalse(s.is_open)
+        self.assertIsNone(pool.get("loop://", 2400).serial)
+
+    def test_close_idle_used_meanwhile(self):
+        """ test a port used between the idle check and taking its lock is kept open """
+        pool = SerialPool(idle_timeout=0.05)
+        with pool.connection("loop://", 2400) as s:
+            pass
+        port = pool.get("loop://", 2400)
+        lock = port.lock
+
+        class UsedLock:
+            """ a command runs on the port just before close_idle takes the lock """
+
+            def acquire(self, blocking=True):
+                port.last_used = time.monotonic()
+                return lock.acquire(blocking)
+
+            def release(self):
+                lock.release()
+
+        port.last_used -= 1
+        port.lock = UsedLock()
+        pool.close_idle()
+        self.assertTrue(s.is_open)
+        port.lock = lock
+        pool.close_all()
+
+    def test_idle_timer(self):
+        """ test an idle port is closed without any other port being used """
+        pool = SerialPool(idle_timeout=0.05)
+        with pool.connection("loop://", 2400) as s:
+            pass
+        deadline = time.monotonic() + 5
+        while s.is_open and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertFalse(s.is_open)
+        # the timer stops once no ports are open
+        deadline = time.monotonic() + 5
+        while pool._timer is not None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertIsNone(pool._timer)
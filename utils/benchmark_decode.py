@@ -0,0 +1,60 @@
+"""
+Microbenchmark of AbstractProtocol.decode, normal vs lean decoding
+- run with: python utils/benchmark_decode.py
+- raw_response used to be built a byte at a time (quadratic in the response length), the baseline
+  column times that build, the current column the single decode that replaced it for both paths
+- so a lean decode only saves the (now cheap) raw_response copy, little over a normal decode
+"""
+import logging
+import timeit
+
+from mppsolar.protocols import get_protocol
+
+# protocol, command, number of decodes
+BENCHMARKS = [
+    ("PI30MAX", "QPIGS", 5000),
+    ("JK02", "getCellData", 2000),
+    ("VED", "vedtext", 5000),
+]
+
+
+def baseline_raw_response(response) -> str:
+    """
+    The raw_response as decode built it before, a byte at a time
+    """
+    _response = b""
+    for item in response:
+        if type(item) is int:
+            _response += chr(item).encode()
+        else:
+            _response += item.encode()
+    return _response.decode("utf-8", errors="replace")
+
+
+def per_call(function, number) -> float:
+    return timeit.timeit(function, number=number) / number * 1e6
+
+
+def benchmark(protocol_id, command, number):
+    protocol = get_protocol(protocol_id)
+    command_defn = protocol.get_command_defn(command)
+    response = command_defn["test_responses"][0]
+    protocol.get_full_command(command)
+    baseline = per_call(lambda: baseline_raw_response(response), number)
+    current = per_call(lambda: protocol.get_raw_response(response), number)
+    normal = per_call(lambda: protocol.decode(response, command), number)
+    lean = per_call(lambda: protocol.decode(response, command, lean=True), number)
+    print(f"{protocol_id:<8} {command:<12} {len(response):>5} bytes {baseline:>9.1f}us {current:>9.1f}us {normal:>9.1f}us {lean:>9.1f}us")
+
+
+def main():
+    logging.basicConfig(level=logging.WARNING)
+    print(f"{'':<22} {'':>11} {'raw_response':^23} {'decode':^23}")
+    print(f"{'protocol':<8} {'command':<12} {'response':>11} {'baseline':>11} {'current':>11} {'normal':>11} {'lean':>11}")
+    for protocol_id, command, number in BENCHMARKS:
+        benchmark(protocol_id, command, number)
+    print("The raw_response is no longer built a byte at a time for either decode, so lean gains little more")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Latency benchmark of the hidraw transport, fixed sleeps (the previous HIDRawIO) vs HIDRawTransport
+- a pty stands in for /dev/hidraw0 with a thread answering as a PI30 inverter
+- run with: python utils/benchmark_hidraw.py
+"""
+import logging
+import os
+import threading
+import time
+import tty
+
+from mppsolar.inout.hidrawtransport import REPORT_GAP, HIDRawTransport
+from mppsolar.protocols import get_protocol
+
+# command, number of runs
+BENCHMARKS = [
+    ("QPI", 3),
+    ("QPIRI", 3),
+    ("QPIGS", 3),
+]
+
+
+def fake_inverter(master, responses, stop):
+    """
+    Answer each command received on the pty master with its response, in 8 byte reports
+    """
+    received = b""
+    while not stop.is_set():
+        try:
+            received += os.read(master, 64)
+        except OSError:
+            return
+        while b"\r" in received:
+            command, received = received.split(b"\r", 1)
+            response = responses.get(command + b"\r", b"(NAK\x73\x73\r")
+            for i in range(0, len(response), 8):
+                os.write(master, response[i:i + 8].ljust(8, b"\x00"))
+
+
+def fixed_sleep_send_and_receive(device, full_command):
+    """
+    The send and receive of HIDRawIO before HIDRawTransport, open per command and fixed sleeps
+    """
+    response_line = bytes()
+    usb0 = os.open(device, os.O_RDWR | os.O_NONBLOCK)
+    to_send = full_command
+    if len(to_send) <= 8:
+        time.sleep(0.35)
+        os.write(usb0, to_send)
+    elif len(to_send) > 8 and len(to_send) < 11:
+        time.sleep(0.35)
+        os.write(usb0, to_send[:5])
+        time.sleep(0.35)
+        os.write(usb0, to_send[5:])
+    else:
+        while len(to_send) > 0:
+            send, to_send = to_send[:8], to_send[8:]
+            time.sleep(0.35)
+            os.write(usb0, send)
+    time.sleep(0.25)
+    for _ in range(100):
+        try:
+            time.sleep(0.15)
+            response_line += os.read(usb0, 256)
+        except Exception:
+            pass
+        if bytes([13]) in response_line:
+            response_line = response_line[: response_line.find(bytes([13])) + 1]
+            break
+    os.close(usb0)
+    return response_line
+
+
+def timed(function, number):
+    start = time.perf_counter()
+    for _ in range(number):
+        result = function()
+    return (time.perf_counter() - start) / number * 1000, result
+
+
+def main():
+    logging.basicConfig(level=logging.WARNING)
+    protocol = get_protocol("PI30")
+    responses = {}
+    for command, _ in BENCHMARKS:
+        responses[protocol.get_full_command(command)] = protocol.get_command_defn(command)["test_responses"][0]
+
+    master, slave = os.openpty()
+    tty.setraw(slave)
+    device = os.ttyname(slave)
+    stop = threading.Event()
+    threading.Thread(target=fake_inverter, args=(master, responses, stop), daemon=True).start()
+    transport = HIDRawTransport(device, report_gap=REPORT_GAP)
+
+    print(f"report gap {REPORT_GAP}s")
+    print(f"{'command':<8} {'fixed sleeps':>14} {'poll':>10}")
+    for command, number in BENCHMARKS:
+        full_command = protocol.get_full_command(command)
+        old, old_result = timed(lambda: fixed_sleep_send_and_receive(device, full_command), number)
+        new, new_result = timed(lambda: transport.send_and_receive(full_command), number)
+        if old_result != new_result:
+            print(f"{command}: responses differ {old_result} {new_result}")
+        print(f"{command:<8} {old:>12.1f}ms {new:>8.1f}ms")
+    stop.set()
+    transport.close()
+    os.close(slave)
+    os.close(master)
+
+
+if __name__ == "__main__":
+    main()